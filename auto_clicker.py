@@ -7,21 +7,22 @@ Automated mouse clicking with customizable settings
 import threading
 import time
 import random
-try:
-    import pynput
-    from pynput import mouse, keyboard
-    from pynput.mouse import Button, Listener as MouseListener
-    from pynput.keyboard import Key, Listener as KeyboardListener
-except ImportError:
-    print("Warning: pynput not installed. Please install with: pip install pynput")
-    pynput = None
+from scheduler import DeadlineScheduler, POLICY_SKIP, clock_ns
+from input_backend import get_backend
+from hotkey_service import get_hotkey_service
+from click_pattern import ClickPattern
+from metrics import get_registry
+from status_bus import get_status_bus
 
 class AutoClicker:
-    def __init__(self):
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
         self.is_clicking = False
         self.click_thread = None
-        self.hotkey_listener = None
+        self.hotkey_service = get_hotkey_service(self.backend)
+        self.registered_hotkey = None
         self.stop_clicking_flag = False
+        self.status_bus = get_status_bus()
         
         # Default settings
         self.click_interval = 0.1  # seconds
@@ -31,16 +32,39 @@ class AutoClicker:
         self.click_type = 'single'
         self.repeat_times = 0  # 0 means unlimited
         self.hotkey = 'F6'
+        self.schedule_policy = POLICY_SKIP  # what to do with missed click deadlines
+        self.scheduler = None
+        
+        # Burst mode: clicks emitted per wake-up, and the longest gap between wake-ups
+        self.burst_size = 1
+        self.max_gap_ns = 0
         
         # Click position (None means current cursor position)
         self.click_position = None
         
+        # Multi-target pattern (None when clicking a single position)
+        self.click_pattern = None
+        
+        # Live totals: clicks in the current (or last) run, and process-wide metrics
+        self.click_count = 0
+        self.error = None  # exception that ended the current (or last) run, if any
+        registry = get_registry()
+        self.clicks_metric = registry.counter(
+            'automation_clicks_total', 'Mouse clicks sent by the auto clicker')
+        self.lateness_metric = registry.histogram(
+            'automation_click_lateness_seconds', 'Click fire time minus scheduled time')
+        
     def start_clicking(self, interval=0.1, random_offset=False, random_offset_val=0.04,
                       mouse_button='left', click_type='single', repeat_times=0, 
-                      hotkey='F6', position=None):
-        """Start auto clicking with specified settings"""
-        if not pynput:
-            print("Cannot start clicking: pynput not available")
+                      hotkey='F6', position=None, schedule_policy=POLICY_SKIP, burst_size=1):
+        """Start auto clicking with specified settings.
+        
+        With burst_size > 1 the worker wakes once per burst_size clicks and
+        emits them through the backend's batch path, which is what makes
+        sub-millisecond intervals (5k+ CPS) sustainable.
+        """
+        if not self.backend.available:
+            print(f"Cannot start clicking: {self.backend.name} backend not available")
             return
             
         if self.is_clicking:
@@ -48,7 +72,8 @@ class AutoClicker:
             return
             
         # Store settings
-        self.click_interval = max(0.001, interval)  # Minimum 1ms
+        self.burst_size = max(1, int(burst_size))
+        self.click_interval = max(0.001 / self.burst_size, interval)  # Minimum 1ms per wake-up
         self.random_offset = random_offset
         self.random_offset_ms = random_offset_val
         self.mouse_button = mouse_button
@@ -56,9 +81,13 @@ class AutoClicker:
         self.repeat_times = repeat_times
         self.hotkey = hotkey
         self.click_position = position
+        self.schedule_policy = schedule_policy
+        self.click_pattern = None
         self.stop_clicking_flag = False
+        self.error = None
         
-        print(f"Starting auto clicker - Interval: {interval}s, Button: {mouse_button}, Type: {click_type}")
+        print(f"Starting auto clicker - Interval: {interval}s, Button: {mouse_button}, Type: {click_type}"
+              + (f", Burst: {self.burst_size}" if self.burst_size > 1 else ""))
         print(f"Press {hotkey} to stop")
         
         # Setup hotkey listener
@@ -69,94 +98,167 @@ class AutoClicker:
         self.click_thread.daemon = True
         self.click_thread.start()
         
+    def start_pattern(self, pattern, hotkey='F6'):
+        """Start clicking a multi-target pattern (ClickPattern or list of points)"""
+        if not self.backend.available:
+            print(f"Cannot start clicking: {self.backend.name} backend not available")
+            return
+            
+        if self.is_clicking:
+            print("Auto clicker is already running")
+            return
+            
+        if not isinstance(pattern, ClickPattern):
+            pattern = ClickPattern(pattern)
+        self.click_pattern = pattern
+        self.hotkey = hotkey
+        self.stop_clicking_flag = False
+        self.error = None
+        self.scheduler = None  # patterns keep their own timing stats
+        
+        print(f"Starting click pattern - {len(pattern)} targets")
+        print(f"Press {hotkey} to stop")
+        
+        self.setup_hotkey_listener()
+        
+        self.click_thread = threading.Thread(target=self._pattern_worker)
+        self.click_thread.daemon = True
+        self.click_thread.start()
+        
     def setup_hotkey_listener(self):
-        """Setup hotkey listener for toggling clicking"""
-        def on_key_press(key):
-            try:
-                # Check for hotkey
-                key_str = ''
-                if hasattr(key, 'name'):
-                    key_str = key.name.upper()
-                else:
-                    key_str = str(key).replace("'", "").upper()
-                    
-                if key_str == self.hotkey.upper():
-                    if self.is_clicking:
-                        self.stop_clicking()
-                    else:
-                        # If stopped, restart with current settings
-                        self.start_clicking(self.click_interval, self.random_offset,
-                                          self.random_offset_ms, self.mouse_button,
-                                          self.click_type, self.repeat_times, self.hotkey)
-            except Exception as e:
-                print(f"Hotkey error: {e}")
-                
-        self.hotkey_listener = KeyboardListener(on_press=on_key_press)
-        self.hotkey_listener.start()
+        """Register the toggle hotkey with the shared hotkey service"""
+        if self.registered_hotkey is None:
+            self.hotkey_service.register(self.hotkey, self._on_hotkey)
+        elif self.registered_hotkey != self.hotkey:
+            self.hotkey_service.rebind(self.registered_hotkey, self.hotkey, self._on_hotkey)
+        self.registered_hotkey = self.hotkey
+        
+    def _on_hotkey(self):
+        """Toggle clicking when the hotkey is pressed"""
+        if self.is_clicking:
+            self.stop_clicking()
+        elif self.click_pattern is not None:
+            self.start_pattern(self.click_pattern, self.hotkey)
+        else:
+            # If stopped, restart with current settings
+            self.start_clicking(self.click_interval, self.random_offset,
+                              self.random_offset_ms, self.mouse_button,
+                              self.click_type, self.repeat_times, self.hotkey,
+                              self.click_position, self.schedule_policy, self.burst_size)
         
     def _clicking_worker(self):
         """Worker thread for clicking"""
-        if not pynput:
+        if not self.backend.available:
             return
             
-        mouse_controller = mouse.Controller()
+        mouse_controller = self.backend.mouse_controller()
         self.is_clicking = True
+        self.status_bus.publish('clicker', 'running')
         
-        # Map button strings to pynput buttons
-        button_map = {
-            'left': Button.left,
-            'right': Button.right,
-            'middle': Button.middle
-        }
+        button = self.backend.button(self.mouse_button)
+        count = 2 if self.click_type.lower() == 'double' else 1
+        burst_size = self.burst_size
+        click_burst = self.backend.click_burst
         
-        button = button_map.get(self.mouse_button.lower(), Button.left)
+        # Clicks fire on absolute deadlines so click cost never adds to the interval;
+        # in burst mode each deadline emits a whole burst
+        burst_interval = self.click_interval * burst_size
+        scheduler = DeadlineScheduler(burst_interval, self.schedule_policy,
+                                      lateness_histogram=self.lateness_metric)
+        self.scheduler = scheduler
+        should_stop = lambda: self.stop_clicking_flag
         
+        self.max_gap_ns = 0
+        last_fire_ns = None
+        last_position = None
+        clicks_metric = self.clicks_metric
+        self.click_count = 0
         try:
-            click_count = 0
+            scheduler.start()
             
             while not self.stop_clicking_flag:
                 # Check if we've reached the repeat limit
-                if self.repeat_times > 0 and click_count >= self.repeat_times:
+                clicks = burst_size
+                if self.repeat_times > 0:
+                    clicks = min(clicks, self.repeat_times - self.click_count)
+                    if clicks <= 0:
+                        break
+                    
+                # Wait for this click's deadline
+                if not scheduler.wait(should_stop):
                     break
                     
-                # Set click position if specified
-                if self.click_position:
+                # Move to the click position only when it changes
+                if self.click_position and self.click_position != last_position:
                     mouse_controller.position = self.click_position
+                    last_position = self.click_position
                     
-                # Perform click
-                if self.click_type.lower() == 'double':
-                    mouse_controller.click(button, 2)
+                # Perform click(s)
+                if clicks == 1:
+                    mouse_controller.click(button, count)
                 else:
-                    mouse_controller.click(button, 1)
+                    click_burst(mouse_controller, button, clicks, count)
                     
-                click_count += 1
+                now = clock_ns()
+                if last_fire_ns is not None and now - last_fire_ns > self.max_gap_ns:
+                    self.max_gap_ns = now - last_fire_ns
+                last_fire_ns = now
+                self.click_count += clicks
+                clicks_metric.inc(clicks)
                 
                 # Calculate delay
-                delay = self.click_interval
+                delay = burst_interval
                 if self.random_offset and self.random_offset_ms > 0:
                     # Add random offset
                     offset = random.uniform(-self.random_offset_ms, self.random_offset_ms)
                     delay = max(0.001, delay + offset)
                     
-                # Wait before next click
-                if not self.stop_clicking_flag:
-                    time.sleep(delay)
+                # Schedule next click relative to this click's deadline
+                scheduler.advance(delay)
                     
         except Exception as e:
             print(f"Clicking error: {e}")
+            self.error = e
+        finally:
+            self.is_clicking = False
+            self.status_bus.publish('clicker', 'stopped', clicks=self.click_count)
+            stats = scheduler.get_stats()
+            print(f"Auto clicking stopped. Total clicks: {self.click_count}, "
+                  f"achieved {stats['achieved_rate'] * burst_size:.1f}/"
+                  f"{stats['target_rate'] * burst_size:.1f} CPS")
+            
+    def _pattern_worker(self):
+        """Worker thread for pattern clicking; one thread for all targets"""
+        mouse_controller = self.backend.mouse_controller()
+        self.is_clicking = True
+        self.status_bus.publish('clicker', 'running')
+        pattern = self.click_pattern
+        
+        try:
+            pattern.run(mouse_controller, self.backend.button,
+                        lambda: self.stop_clicking_flag,
+                        clicks_counter=self.clicks_metric,
+                        lateness_histogram=self.lateness_metric)
+        except Exception as e:
+            print(f"Clicking error: {e}")
+            self.error = e
         finally:
             self.is_clicking = False
-            if self.hotkey_listener:
-                self.hotkey_listener.stop()
-            print(f"Auto clicking stopped. Total clicks: {click_count}")
+            stats = pattern.get_stats(per_target=False)
+            self.status_bus.publish('clicker', 'stopped', clicks=stats['clicks'])
+            print(f"Click pattern stopped. Total clicks: {stats['clicks']}, "
+                  f"achieved {stats['achieved_rate']:.1f}/{stats['target_rate']:.1f} CPS")
             
+    def get_pattern_stats(self):
+        """Get aggregate and per-target stats for the current (or last) pattern"""
+        if self.click_pattern is None:
+            return None
+        return self.click_pattern.get_stats()
+        
     def stop_clicking(self):
         """Stop auto clicking"""
         self.stop_clicking_flag = True
         self.is_clicking = False
-        
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
             
     def set_click_position(self, x=None, y=None):
         """Set specific click position. None means use current cursor position"""
@@ -167,32 +269,24 @@ class AutoClicker:
             
     def get_current_position(self):
         """Get current mouse position"""
-        if not pynput:
+        if not self.backend.available:
             return None
             
         try:
-            mouse_controller = mouse.Controller()
+            mouse_controller = self.backend.mouse_controller()
             return mouse_controller.position
         except:
             return None
             
     def click_at_position(self, x, y, button='left', click_type='single', count=1):
         """Perform a single click or series of clicks at specific position"""
-        if not pynput:
-            print("Cannot click: pynput not available")
+        if not self.backend.available:
+            print(f"Cannot click: {self.backend.name} backend not available")
             return
             
         try:
-            mouse_controller = mouse.Controller()
-            
-            # Map button string to pynput button
-            button_map = {
-                'left': Button.left,
-                'right': Button.right,
-                'middle': Button.middle
-            }
-            
-            btn = button_map.get(button.lower(), Button.left)
+            mouse_controller = self.backend.mouse_controller()
+            btn = self.backend.button(button)
             
             # Move to position
             mouse_controller.position = (x, y)
@@ -215,29 +309,57 @@ class AutoClicker:
         """Change the hotkey for toggling clicking"""
         self.hotkey = hotkey
         
-        # Restart hotkey listener if running
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
+        # Rebind in place; the shared listener keeps running
+        if self.registered_hotkey is not None:
             self.setup_hotkey_listener()
             
     def get_status(self):
         """Get current status information"""
-        return {
+        status = {
             'is_clicking': self.is_clicking,
             'interval': self.click_interval,
             'button': self.mouse_button,
             'click_type': self.click_type,
             'repeat_times': self.repeat_times,
             'hotkey': self.hotkey,
-            'position': self.click_position
+            'position': self.click_position,
+            'schedule_policy': self.schedule_policy,
+            'burst_size': self.burst_size,
+            'target_cps': calculate_cps_from_interval(self.click_interval),
+            'achieved_cps': 0.0,
+            'clicks': self.click_count,
+            'total_clicks': self.clicks_metric.value,
+            'error': str(self.error) if self.error else None
         }
         
+        # Timing stats from the current (or last) run
+        if self.scheduler:
+            stats = self.scheduler.get_stats()
+            status['achieved_cps'] = stats['achieved_rate'] * self.burst_size
+            status['missed_clicks'] = stats['skipped'] * self.burst_size
+            status['late_clicks'] = stats['late_events']
+            status['max_lateness_ms'] = stats['max_lateness_ms']
+            status['max_gap_ms'] = self.max_gap_ns / 1e6
+            
+        if self.click_pattern is not None:
+            stats = self.click_pattern.get_stats(per_target=False)
+            status['pattern_targets'] = stats['targets']
+            status['clicks'] = stats['clicks']
+            status['target_cps'] = stats['target_rate']
+            status['achieved_cps'] = stats['achieved_rate']
+            status['missed_clicks'] = stats['skipped']
+            status['late_clicks'] = stats['late']
+            status['max_lateness_ms'] = stats['max_lateness_ms']
+            
+        return status
+        
     def cleanup(self):
         """Cleanup resources"""
         self.stop_clicking()
         
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
+        if self.registered_hotkey is not None:
+            self.hotkey_service.unregister(self.registered_hotkey, self._on_hotkey)
+            self.registered_hotkey = None
             
         # Wait for thread to finish
         if self.click_thread and self.click_thread.is_alive():
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Click Pattern Benchmark
+Per-target rate accuracy of the heap-scheduled multi-target clicker
+"""
+
+import sys
+
+from common import emit, quiet
+from auto_clicker import AutoClicker
+from click_pattern import ClickPattern
+from input_backend import FakeBackend
+
+
+def measure(targets, total_cps, duration=1.0):
+    """Click a grid of targets sharing total_cps between them for about duration seconds"""
+    backend = FakeBackend()
+    clicker = AutoClicker(backend)
+    columns = max(1, int(targets ** 0.5))
+    rows = (targets + columns - 1) // columns
+    per_target_rate = total_cps / (columns * rows)
+    clicks = max(2, int(per_target_rate * duration))
+    pattern = ClickPattern.grid(0, 0, columns, rows, 10, 10,
+                                interval=1.0 / per_target_rate, repeat_times=clicks)
+    with quiet():
+        clicker.start_pattern(pattern)
+        clicker.click_thread.join()
+
+    stats = pattern.get_stats(per_target=False)
+    stats['per_target_target_rate'] = per_target_rate
+    return stats
+
+
+def run(sizes=(10, 100, 1000, 5000), total_cps=2000, duration=2.0):
+    return {
+        'benchmark': 'click_pattern',
+        'runs': [measure(size, total_cps, duration) for size in sizes],
+    }
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    emit(run(duration=duration))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Auto Clicker Benchmark
+Maximum sustainable clicks per second and click timing jitter
+"""
+
+import sys
+
+from common import emit, gap_stats, quiet
+from auto_clicker import AutoClicker
+from input_backend import FakeBackend
+
+SUSTAINED_FRACTION = 0.95  # achieved/target ratio that still counts as sustained
+
+
+def measure_rate(target_cps, duration=1.0, burst_size=1):
+    """Run the clicker at target_cps for about duration seconds"""
+    backend = FakeBackend()
+    clicker = AutoClicker(backend)
+    clicks = max(2, int(target_cps * duration))
+    with quiet():
+        clicker.start_clicking(interval=1.0 / target_cps, repeat_times=clicks,
+                               burst_size=burst_size)
+        clicker.click_thread.join()
+
+    stamps = [t for t, kind, _ in backend.events if kind == 'click']
+    result = gap_stats(stamps, expected_ns=1e9 / target_cps)
+    result['target_cps'] = target_cps
+    result['burst_size'] = burst_size
+    # Clicks in one burst share a flush, so the worst case is the gap between bursts
+    result['max_burst_gap_ms'] = clicker.max_gap_ns / 1e6
+    result['sustained'] = result.get('achieved_rate', 0.0) >= target_cps * SUSTAINED_FRACTION
+    return result
+
+
+def run(targets=(100, 500, 1000, 2000, 5000, 10000), duration=1.0,
+        burst_targets=(5000, 10000, 20000), burst_size=20):
+    runs = [measure_rate(target, duration) for target in targets]
+    burst_runs = [measure_rate(target, duration, burst_size) for target in burst_targets]
+    sustained = [r['target_cps'] for r in runs if r['sustained']]
+    burst_sustained = [r['target_cps'] for r in burst_runs if r['sustained']]
+    return {
+        'benchmark': 'clicker_max_cps',
+        'max_sustained_cps': max(sustained) if sustained else 0,
+        'burst_max_sustained_cps': max(burst_sustained) if burst_sustained else 0,
+        'runs': runs,
+        'burst_runs': burst_runs,
+    }
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    emit(run(duration=duration))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Event Buffer Benchmark
+Compares memory use of the columnar EventBuffer against a list of action dicts
+"""
+
+import sys
+import time
+import tracemalloc
+
+from common import emit, generate_actions
+from event_buffer import EventBuffer
+
+
+def measure(build):
+    """Return (peak bytes retained, seconds) for building a container"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build()
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return retained, elapsed
+
+
+def run(count=1_000_000):
+    dict_bytes, dict_time = measure(lambda: list(generate_actions(count)))
+    buffer_bytes, buffer_time = measure(lambda: EventBuffer(generate_actions(count)))
+    return {
+        'benchmark': 'event_buffer_memory',
+        'events': count,
+        'dict_list_bytes': dict_bytes,
+        'event_buffer_bytes': buffer_bytes,
+        'dict_list_bytes_per_event': dict_bytes / count,
+        'event_buffer_bytes_per_event': buffer_bytes / count,
+        'memory_ratio': dict_bytes / buffer_bytes if buffer_bytes else 0.0,
+        'dict_list_build_s': dict_time,
+        'event_buffer_build_s': buffer_time,
+    }
+
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    emit(run(events))
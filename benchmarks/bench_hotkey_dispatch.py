@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Hotkey Dispatch Benchmark
+Per-keystroke overhead of the shared hotkey service with all engines registered
+"""
+
+import sys
+import time
+
+from common import emit, quiet
+from auto_clicker import AutoClicker
+from hotkey_presser import HotkeyPresser
+from input_backend import FakeBackend
+from macro_recorder import MacroRecorder
+
+
+def run(keystrokes=200_000):
+    backend = FakeBackend()
+    clicker = AutoClicker(backend)
+    presser = HotkeyPresser(backend)
+    recorder = MacroRecorder(backend)
+
+    # Register every module's hotkey, as with all three tabs active
+    service = clicker.hotkey_service
+    clicker.setup_hotkey_listener()
+    presser.setup_hotkey_listener()
+    recorder.setup_playback_hotkey_listener()
+
+    # Ordinary typing: none of these keys is a registered hotkey
+    keys = [backend.special_key('space'), 'a', 's', 'd', backend.special_key('shift')]
+    stream = (('press', keys[i % len(keys)]) for i in range(keystrokes))
+
+    with quiet():
+        start = time.perf_counter()
+        backend.replay(stream)
+        elapsed = time.perf_counter() - start
+
+    stats = service.get_stats()
+    with quiet():
+        clicker.cleanup()
+        presser.cleanup()
+        recorder.cleanup()
+
+    return {
+        'benchmark': 'hotkey_dispatch',
+        'keystrokes': keystrokes,
+        'listeners': 1,
+        'registered_hotkeys': stats['hotkeys'],
+        'dispatch_ns_mean': stats['dispatch_ns_mean'],
+        'dispatch_ns_max': stats['dispatch_ns_max'],
+        'wall_ns_per_keystroke': elapsed / keystrokes * 1e9,
+    }
+
+
+if __name__ == "__main__":
+    keystrokes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    emit(run(keystrokes))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Recorder Ingestion Benchmark
+Recorder throughput under synthetic mouse input, paced and unpaced
+"""
+
+import sys
+import time
+
+from common import emit, mouse_stream, quiet
+from input_backend import FakeBackend
+from macro_recorder import MacroRecorder
+
+
+def measure(count, rate=None):
+    """Replay count synthetic mouse moves into a recording session"""
+    backend = FakeBackend()
+    recorder = MacroRecorder(backend)
+    with quiet():
+        recorder.start_recording()
+        start = time.perf_counter()
+        delivered = backend.replay(mouse_stream(count), rate=rate)
+        elapsed = time.perf_counter() - start
+        recorder.stop_recording()
+
+    recorded = len(recorder.recorded_actions)
+    ingest = recorder.get_ingest_stats()
+    return {
+        'input_rate': rate or 'unpaced',
+        'delivered': delivered,
+        'recorded': recorded,
+        'lost': delivered - recorded,
+        'dropped': ingest['dropped'],
+        'late': ingest['late'],
+        'max_lag_ms': ingest['max_lag_ms'],
+        'elapsed_s': elapsed,
+        'ingested_per_s': recorded / elapsed if elapsed else 0.0,
+    }
+
+
+def run(duration=2.0, rates=(1000, 2000, 5000), capacity_events=200_000):
+    return {
+        'benchmark': 'recorder_ingestion',
+        'paced': [measure(int(rate * duration), rate) for rate in rates],
+        'capacity': measure(capacity_events),
+    }
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    emit(run(duration))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Macro Library Benchmark
+Cold indexing, incremental refresh and query times for a directory of macros
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from common import emit, generate_actions, quiet
+from event_buffer import EventBuffer
+from macro_format import write_binary
+from macro_library import MacroLibrary
+
+
+def populate(directory, count, events):
+    for i in range(count):
+        write_binary(os.path.join(directory, f"macro_{i:05d}.amsm"),
+                     EventBuffer(generate_actions(events, seed=i)))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(count=2000, events=1000, changed=20):
+    with tempfile.TemporaryDirectory() as directory:
+        populate(directory, count, events)
+        with quiet():
+            library = MacroLibrary(directory)
+            cold, cold_ms = timed(library.refresh)
+            _, warm_ms = timed(library.refresh)
+
+            # Rewrite a few files; only those are read again
+            for i in range(changed):
+                write_binary(os.path.join(directory, f"macro_{i:05d}.amsm"),
+                             EventBuffer(generate_actions(events, seed=count + i)))
+            incremental, incremental_ms = timed(library.refresh)
+
+            listing, list_ms = timed(library.list)
+            _, query_ms = timed(lambda: library.query(name='macro_01', min_duration=0.5, limit=50))
+            library.close()
+
+            # A new process opening the existing index
+            reopened = MacroLibrary(directory)
+            _, reopen_ms = timed(reopened.refresh)
+            reopened.close()
+
+    return {
+        'benchmark': 'macro_library',
+        'macros': count,
+        'events_per_macro': events,
+        'cold_index_ms': cold_ms,
+        'cold_added': cold['added'],
+        'warm_refresh_ms': warm_ms,
+        'incremental_refresh_ms': incremental_ms,
+        'incremental_updated': incremental['updated'],
+        'reopen_refresh_ms': reopen_ms,
+        'list_ms': list_ms,
+        'listed': len(listing),
+        'query_ms': query_ms,
+    }
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    emit(run(count))
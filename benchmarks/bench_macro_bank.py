@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Macro Bank Benchmark
+Hotkey press to first injected event with hundreds of bound macros
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import emit, generate_actions, percentile, quiet
+from event_buffer import EventBuffer
+from input_backend import FakeBackend
+from macro_bank import MacroBank
+from macro_format import write_binary
+from macro_recorder import MacroRecorder
+
+SPEED = 50.0  # keeps each playback short so triggers can follow each other quickly
+
+
+def latency_stats(latencies):
+    latencies = sorted(latencies)
+    return {
+        'triggers': len(latencies),
+        'mean_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50_ms': percentile(latencies, 0.50),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] if latencies else 0.0,
+    }
+
+
+def wait_idle(recorder):
+    thread = recorder.playback_thread
+    if thread is not None:
+        thread.join(5.0)
+
+
+def trigger_latencies(backend, bank, recorder, hotkeys, triggers, seed=0):
+    """Press random bound hotkeys and collect each playback's trigger latency (ms)"""
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(triggers):
+        backend.dispatch(('press', rng.choice(hotkeys)))
+        bank.wait()
+        wait_idle(recorder)
+        latency = recorder.get_playback_stats()['trigger_latency_ms']
+        if latency is not None:
+            latencies.append(latency)
+    return latencies
+
+
+def cold_latencies(backend, recorder, files, triggers, seed=0):
+    """The same presses served the old way: load_macro then play_macro"""
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(triggers):
+        backend.clear()
+        start = time.perf_counter_ns()
+        recorder.load_macro(rng.choice(files))
+        recorder.play_macro(SPEED)
+        wait_idle(recorder)
+        if backend.events:
+            first_offset = recorder.compile_playback(SPEED).offsets_ns[0]
+            latencies.append((backend.events[0][0] - start - first_offset) / 1e6)
+    return latencies
+
+
+def run(macros=300, events=500, triggers=300, budget_fraction=0.25):
+    backend = FakeBackend()
+    with tempfile.TemporaryDirectory() as directory, quiet():
+        files = []
+        for i in range(macros):
+            filename = os.path.join(directory, f"macro_{i:04d}.amsm")
+            write_binary(filename, EventBuffer(generate_actions(events, seed=i)))
+            files.append(filename)
+        hotkeys = [f"K{i}" for i in range(macros)]
+
+        recorder = MacroRecorder(backend)
+        bank = MacroBank(recorder)
+        start = time.perf_counter()
+        for hotkey, filename in zip(hotkeys, files):
+            bank.bind(hotkey, filename, speed=SPEED)
+        bind_ms = (time.perf_counter() - start) * 1000
+
+        # Dispatch overhead only: every key is bound, nothing else is listening
+        warm = trigger_latencies(backend, bank, recorder, hotkeys, triggers)
+        warm_stats = bank.get_stats()
+
+        # Same bindings with room for only part of them
+        bank.clear()
+        bank.memory_budget = int(warm_stats['bytes_used'] * budget_fraction)
+        bank.refresh()
+        bank.hits = bank.misses = bank.evictions = 0
+        constrained = trigger_latencies(backend, bank, recorder, hotkeys, triggers, seed=1)
+        constrained_stats = bank.get_stats()
+        bank.cleanup()
+
+        cold = cold_latencies(backend, recorder, files, min(triggers, 100))
+        recorder.cleanup()
+
+    return {
+        'benchmark': 'macro_bank',
+        'bound_macros': macros,
+        'events_per_macro': events,
+        'bind_ms': bind_ms,
+        'bytes_per_macro': warm_stats['bytes_used'] / macros,
+        'preloaded_trigger_ms': latency_stats(warm),
+        'constrained': {
+            'memory_budget': constrained_stats['memory_budget'],
+            'hit_rate': constrained_stats['hits'] / max(1, constrained_stats['hits'] + constrained_stats['misses']),
+            'evictions': constrained_stats['evictions'],
+            'trigger_ms': latency_stats(constrained),
+        },
+        'load_and_play_ms': latency_stats(cold),
+    }
+
+
+if __name__ == "__main__":
+    macros = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    emit(run(macros))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Macro I/O Benchmark
+save_macro / load_macro throughput for JSON and binary macro files
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from common import emit, generate_actions, quiet
+from event_buffer import EventBuffer
+from input_backend import FakeBackend
+from macro_recorder import MacroRecorder
+
+DEFAULT_SIZES = (10_000, 1_000_000, 10_000_000)
+JSON_MAX_EVENTS = 1_000_000  # pretty-printed JSON beyond this takes minutes and GBs
+
+
+def measure(recorder, directory, file_format, count):
+    filename = os.path.join(directory, f"bench_{count}.{'amsm' if file_format == 'binary' else 'json'}")
+    with quiet():
+        start = time.perf_counter()
+        recorder.save_macro(filename, file_format)
+        save_s = time.perf_counter() - start
+
+        loader = MacroRecorder(recorder.backend)
+        start = time.perf_counter()
+        loader.load_macro(filename)
+        load_s = time.perf_counter() - start
+
+    # Binary loads are lazy; also time decoding every event
+    start = time.perf_counter()
+    decoded = sum(1 for _ in loader.recorded_actions)
+    iterate_s = time.perf_counter() - start
+
+    result = {
+        'format': file_format,
+        'events': count,
+        'file_bytes': os.path.getsize(filename),
+        'save_s': save_s,
+        'load_s': load_s,
+        'iterate_s': iterate_s,
+        'save_events_per_s': count / save_s if save_s else 0.0,
+        'load_and_iterate_events_per_s': decoded / (load_s + iterate_s) if load_s + iterate_s else 0.0,
+    }
+    with quiet():
+        loader.cleanup()
+    os.remove(filename)
+    return result
+
+
+def run(sizes=DEFAULT_SIZES, formats=('binary', 'json'), json_max=JSON_MAX_EVENTS):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            recorder = MacroRecorder(FakeBackend())
+            recorder.recorded_actions = EventBuffer(generate_actions(count))
+            for file_format in formats:
+                if file_format == 'json' and count > json_max:
+                    results.append({'format': 'json', 'events': count, 'skipped': True})
+                    continue
+                results.append(measure(recorder, directory, file_format, count))
+    return {'benchmark': 'macro_io', 'runs': results}
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    emit(run(sizes))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Multi-Key Presser Benchmark
+Per-job rate accuracy and flush coalescing with many keys on one thread
+"""
+
+import sys
+import time
+
+from common import emit, quiet
+from input_backend import FakeBackend
+from multi_presser import MultiKeyPresser
+
+KEYS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def measure(jobs, duration=1.0, shared_rate=None):
+    """Run jobs keys for duration seconds, at staggered rates or all at shared_rate"""
+    backend = FakeBackend()
+    presser = MultiKeyPresser(backend)
+    for i in range(jobs):
+        rate = shared_rate or 20 + 10 * (i % 8)
+        presser.add_job(key=KEYS[i % len(KEYS)], rate=rate)
+    with quiet():
+        presser.start_all()
+        time.sleep(duration)
+        status = presser.get_status()
+        presser.cleanup()
+
+    errors = [abs(job['achieved_rate'] / job['target_rate'] - 1) * 100
+              for job in status['jobs'] if job['achieved_rate']]
+    return {
+        'jobs': jobs,
+        'shared_rate': shared_rate,
+        'presses': sum(job['presses'] for job in status['jobs']),
+        'max_rate_error_pct': max(errors) if errors else 0.0,
+        'mean_rate_error_pct': sum(errors) / len(errors) if errors else 0.0,
+        'flushes': status['flushes'],
+        'events_sent': status['events_sent'],
+        'events_per_flush': status['events_sent'] / status['flushes'] if status['flushes'] else 0.0,
+        'max_batch': status['max_batch'],
+    }
+
+
+def run(sizes=(1, 8, 32), duration=1.0):
+    return {
+        'benchmark': 'multi_presser',
+        'staggered_rates': [measure(size, duration) for size in sizes],
+        # Same rate for every key: presses line up and should share flushes
+        'shared_rate': [measure(size, duration, shared_rate=50) for size in sizes],
+    }
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    emit(run(duration=duration))
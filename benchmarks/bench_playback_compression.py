@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Playback Compression Benchmark
+Wall-clock time of one macro played as recorded, gap-capped, move-collapsed and at max speed
+"""
+
+import sys
+import time
+
+from common import emit, generate_actions, quiet
+from event_buffer import EventBuffer, action_timestamp_ns
+from input_backend import FakeBackend
+from macro_recorder import MacroRecorder
+
+MODES = {
+    'recorded': {},
+    'max_gap': {'max_gap': 0.05},
+    'collapse_moves': {'max_gap': 0.05, 'collapse_moves': True},
+    'max_speed': {'collapse_moves': True, 'settle': 0.005},
+}
+
+
+def idle_macro(events, pauses, pause_s):
+    """Generated actions with a few long idle pauses, like a real recording"""
+    every = max(1, events // (pauses + 1))
+    shift_ns = 0
+    actions = []
+    for i, action in enumerate(generate_actions(events)):
+        if i and i % every == 0 and shift_ns < pauses * pause_s * 1e9:
+            shift_ns += int(pause_s * 1e9)
+        action['timestamp_ns'] = action_timestamp_ns(action) + shift_ns
+        actions.append(action)
+    return EventBuffer(actions)
+
+
+def discrete_events(events):
+    """Output events that must survive compression unchanged, in order"""
+    return [(kind, args) for _, kind, args in events if kind != 'move']
+
+
+def run(events=2000, pauses=4, pause_s=0.5):
+    backend = FakeBackend()
+    recorder = MacroRecorder(backend)
+    recorder.recorded_actions = idle_macro(events, pauses, pause_s)
+
+    results = {}
+    reference = None
+    with quiet():
+        for mode, options in MODES.items():
+            backend.clear()
+            start = time.perf_counter()
+            recorder.play_macro(**options)
+            recorder.playback_thread.join()
+            wall_s = time.perf_counter() - start
+            stats = recorder.get_playback_stats()
+
+            moves = [args for _, kind, args in backend.events if kind == 'move']
+            discrete = discrete_events(backend.events)
+            if reference is None:
+                reference = (moves[-1], discrete)
+            results[mode] = {
+                'wall_s': wall_s,
+                'cycle_s': stats['cycle_s'],
+                'time_saved_s': stats['time_saved_s'],
+                'actions_played': stats['actions_played'],
+                'mean_lateness_ms': stats['mean_lateness_ms'],
+                'same_final_position': moves[-1] == reference[0],
+                'same_clicks_and_keys': discrete == reference[1],
+            }
+        recorder.cleanup()
+
+    return {
+        'benchmark': 'playback_compression',
+        'events': events,
+        'idle_pauses': pauses,
+        'pause_s': pause_s,
+        'modes': results,
+    }
+
+
+if __name__ == "__main__":
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    emit(run(events))
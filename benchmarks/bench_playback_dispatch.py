@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Playback Dispatch Benchmark
+Per-action dispatch overhead of interpreted vs. precompiled macro playback
+"""
+
+import sys
+import time
+
+from common import emit, generate_actions
+from event_buffer import EventBuffer
+from input_backend import FakeBackend
+from macro_recorder import MacroRecorder
+
+
+def run(count=100_000, repeats=5):
+    backend = FakeBackend()
+    recorder = MacroRecorder(backend)
+    recorder.recorded_actions = EventBuffer(generate_actions(count))
+    actions = list(recorder.recorded_actions)
+    mouse_controller, keyboard_controller = recorder._get_controllers()
+
+    # Interpreted: type dispatch, button map and key parsing on every action
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for action in actions:
+            recorder._execute_action(action, mouse_controller, keyboard_controller)
+        backend.clear()
+    interpreted = (time.perf_counter() - start) / (count * repeats)
+
+    start = time.perf_counter()
+    plan = recorder.compile_playback(1.0)
+    compile_time = time.perf_counter() - start
+
+    # Compiled: call the pre-bound step
+    schedule = list(zip(plan.offsets_ns, plan.steps, plan.labels))
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for _offset, (step, args), _label in schedule:
+            step(*args)
+        backend.clear()
+    compiled = (time.perf_counter() - start) / (len(schedule) * repeats)
+
+    return {
+        'benchmark': 'playback_dispatch',
+        'actions': count,
+        'interpreted_ns_per_action': interpreted * 1e9,
+        'compiled_ns_per_action': compiled * 1e9,
+        'speedup': interpreted / compiled if compiled else 0.0,
+        'compile_s': compile_time,
+    }
+
+
+if __name__ == "__main__":
+    actions = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    emit(run(actions))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Playback Timing Benchmark
+Per-action lateness and jitter of macro playback against the recorded timeline
+"""
+
+import sys
+
+from common import emit, generate_actions, percentile, quiet
+from event_buffer import EventBuffer
+from input_backend import FakeBackend
+from macro_recorder import MacroRecorder
+
+
+def run(count=5000, rate=1000, speed=1.0):
+    backend = FakeBackend()
+    recorder = MacroRecorder(backend)
+    recorder.recorded_actions = EventBuffer(generate_actions(count, rate=rate))
+    plan = recorder.compile_playback(speed)
+
+    with quiet():
+        recorder.play_macro(speed, 1)
+        recorder.playback_thread.join()
+
+    # Fake events line up 1:1 with plan steps; compare against the first one
+    stamps = [t for t, _kind, _args in backend.events]
+    anchor = stamps[0] - plan.offsets_ns[0] if stamps else 0
+    lateness = sorted((t - anchor - offset) / 1e6 for t, offset in zip(stamps, plan.offsets_ns))
+
+    stats = recorder.get_playback_stats()
+    return {
+        'benchmark': 'playback_timing',
+        'actions': count,
+        'recorded_rate': rate,
+        'speed': speed,
+        'actions_played': stats['actions_played'],
+        'late_actions': stats['late_actions'],
+        'lateness_mean_ms': sum(lateness) / len(lateness) if lateness else 0.0,
+        'lateness_p50_ms': percentile(lateness, 0.50),
+        'lateness_p99_ms': percentile(lateness, 0.99),
+        'lateness_max_ms': lateness[-1] if lateness else 0.0,
+        'end_drift_ms': (stamps[-1] - anchor - plan.offsets_ns[len(stamps) - 1]) / 1e6 if stamps else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    emit(run(count))
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Hotkey Presser Benchmark
+Press-rate and hold-duration accuracy of continuous mode
+"""
+
+import sys
+import time
+
+from common import emit, gap_stats, quiet
+from hotkey_presser import HotkeyPresser
+from input_backend import FakeBackend
+
+
+def measure_interval(interval, duration=1.0, hold_duration=0.001, jitter=0.0):
+    """Run continuous mode at interval for duration seconds"""
+    backend = FakeBackend()
+    presser = HotkeyPresser(backend)
+    with quiet():
+        presser.start_pressing('f', 'continuous', interval, hold_duration=hold_duration,
+                               jitter=jitter)
+        time.sleep(duration)
+        presser.stop_pressing()
+        presser.press_thread.join()
+
+    stamps = [t for t, kind, _ in backend.events if kind == 'key_press']
+    releases = [t for t, kind, _ in backend.events if kind == 'key_release']
+    holds = [(r - p) / 1e6 for p, r in zip(stamps, releases)]
+    result = gap_stats(stamps, expected_ns=interval * 1e9)
+    result['interval_s'] = interval
+    result['jitter_s'] = jitter
+    result['hold_target_ms'] = presser.hold_duration * 1000
+    if holds:
+        result['hold_mean_ms'] = sum(holds) / len(holds)
+        result['hold_max_ms'] = max(holds)
+    if 'achieved_rate' in result:
+        result['rate_error_pct'] = (result['achieved_rate'] / result['target_rate'] - 1) * 100
+    return result
+
+
+def run(intervals=(0.05, 0.01, 0.005, 0.002), duration=1.0):
+    return {
+        'benchmark': 'presser_rate_accuracy',
+        'runs': [measure_interval(interval, duration) for interval in intervals],
+        'jitter_runs': [measure_interval(interval, duration, interval / 4, interval / 8)
+                        for interval in intervals],
+    }
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    emit(run(duration=duration))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Import cost of the GUI startup path, measured with python -X importtime
+"""
+
+import os
+import subprocess
+import sys
+
+from common import REPO_ROOT, emit
+
+LAZY_MODULES = ('pynput', 'macro_recorder', 'auto_clicker', 'hotkey_presser')
+
+# Build the window when a display is available; report import cost either way
+WINDOW_PROBE = """
+import time
+start = time.perf_counter()
+import main
+try:
+    app = main.AutoMationSuite()
+    app.root.update()
+    print('window_ms', (time.perf_counter() - start) * 1000)
+    app.root.destroy()
+except Exception as e:
+    print('window_ms', 'unavailable')
+"""
+
+
+def import_profile(code):
+    """Run code in a fresh interpreter under -X importtime and parse its report"""
+    env = dict(os.environ, AMS_INPUT_BACKEND='fake')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_ROOT,
+                          env=env, capture_output=True, text=True, timeout=60)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    window_ms = None
+    for line in proc.stdout.splitlines():
+        if line.startswith('window_ms'):
+            value = line.split()[1]
+            window_ms = float(value) if value != 'unavailable' else None
+    return modules, window_ms
+
+
+def summarise(modules, top=8):
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        'modules_imported': len(modules),
+        'total_import_ms': sum(self_us for self_us, _ in modules.values()) / 1000,
+        'lazy_modules_loaded': [name for name in LAZY_MODULES if name in modules],
+        'slowest_self_ms': {name: self_us / 1000 for name, (self_us, _) in slowest},
+    }
+
+
+def run(repeats=3):
+    lazy = []
+    eager = []
+    window = []
+    for _ in range(repeats):
+        modules, window_ms = import_profile(WINDOW_PROBE)
+        lazy.append(summarise(modules))
+        if window_ms is not None:
+            window.append(window_ms)
+        # What startup used to load before the first window: every engine up front
+        modules, _ = import_profile("import main, macro_recorder, auto_clicker, hotkey_presser")
+        eager.append(summarise(modules))
+
+    best_lazy = min(lazy, key=lambda result: result['total_import_ms'])
+    best_eager = min(eager, key=lambda result: result['total_import_ms'])
+    return {
+        'benchmark': 'startup',
+        'repeats': repeats,
+        'lazy_startup': best_lazy,
+        'eager_engines': best_eager,
+        'import_ms_saved': best_eager['total_import_ms'] - best_lazy['total_import_ms'],
+        'time_to_first_window_ms': min(window) if window else None,
+    }
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    emit(run(repeats))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Macro Transform Benchmark
+Throughput and peak memory of a streaming transform pipeline as macro size grows
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import emit, generate_actions
+from macro_format import write_binary
+import macro_transform as mt
+
+
+def pipeline(source, other):
+    """Trim, retime, merge, offset and filter in one pass"""
+    return mt.apply_steps(mt.read_macro(source), [
+        lambda actions: mt.trim(actions, 1.0, None),
+        lambda actions: mt.retime(actions, [(0.0, 10.0, 0.5)]),
+        lambda actions: mt.merge(actions, mt.read_macro(other)),
+        lambda actions: mt.offset(actions, 25, -25),
+        lambda actions: mt.filter_types(actions, ['mouse_scroll'], keep=False),
+    ])
+
+
+def run(sizes=(100_000, 500_000), other_events=10_000):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        other = os.path.join(directory, 'other.amsm')
+        write_binary(other, generate_actions(other_events, seed=1))
+        for events in sizes:
+            source = os.path.join(directory, f"source_{events}.amsm")
+            target = os.path.join(directory, f"target_{events}.amsm")
+            write_binary(source, generate_actions(events))
+
+            start = time.perf_counter()
+            written = mt.write_macro(target, pipeline(source, other))
+            elapsed = time.perf_counter() - start
+
+            # Second pass under tracemalloc: peak Python allocations while streaming
+            tracemalloc.start()
+            mt.write_macro(target, pipeline(source, other))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append({
+                'events_in': events + other_events,
+                'events_out': written,
+                'source_bytes': os.path.getsize(source),
+                'elapsed_s': elapsed,
+                'events_per_s': (events + other_events) / elapsed,
+                'peak_traced_kb': peak / 1024,
+            })
+
+    return {
+        'benchmark': 'transform',
+        'pipeline': ['trim', 'retime', 'merge', 'offset', 'filter_types'],
+        'runs': results,
+    }
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(arg) for arg in sys.argv[1:]) or (100_000, 500_000)
+    emit(run(sizes))
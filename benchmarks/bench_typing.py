@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Bulk Typing Benchmark
+Characters/sec of per-character vs. chunked vs. pasted text injection
+"""
+
+import random
+import sys
+
+from common import emit, quiet
+from hotkey_presser import HotkeyPresser
+from input_backend import FakeBackend
+from text_injector import STRATEGY_PASTE
+
+
+def make_text(size, seed=0):
+    """Roughly size characters of word-like text"""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9)))
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def measure(text, **options):
+    backend = FakeBackend()
+    presser = HotkeyPresser(backend)
+    with quiet():
+        job = presser.type_text(text, **options)
+    progress = job.progress()
+    return {
+        'chars': progress['typed'],
+        'strategy': progress['strategy'],
+        'chunk_size': progress['chunk_size'],
+        'target_rate': progress['target_rate'],
+        'elapsed_s': progress['elapsed'],
+        'chars_per_second': progress['chars_per_second'],
+        'backend_calls': len(backend.events),
+    }
+
+
+def run(size=100_000, limited_rate=50_000):
+    text = make_text(size)
+    per_char = measure(text, typing_speed=0)
+    chunked = measure(text, bulk=True)
+    return {
+        'benchmark': 'bulk_typing',
+        'text_bytes': len(text),
+        'per_character': per_char,
+        'chunked': chunked,
+        'rate_limited': measure(text, bulk=True, rate=limited_rate),
+        'paste': measure(text, bulk=True, strategy=STRATEGY_PASTE),
+        'chunked_speedup': chunked['chars_per_second'] / per_char['chars_per_second']
+                           if per_char['chars_per_second'] else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    emit(run(size))
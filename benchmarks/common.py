@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark Helpers
+Shared setup, synthetic data and statistics for the benchmark scripts
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def generate_actions(count, seed=0, rate=1000):
+    """Generate a recording dominated by mouse movement sampled at rate Hz"""
+    rng = random.Random(seed)
+    x, y = 500, 500
+    for i in range(count):
+        timestamp_ns = i * 1_000_000_000 // rate
+        roll = rng.random()
+        if roll < 0.95:
+            x += rng.randint(-3, 3)
+            y += rng.randint(-3, 3)
+            yield {'type': 'mouse_move', 'timestamp_ns': timestamp_ns, 'x': x, 'y': y}
+        elif roll < 0.97:
+            yield {'type': 'mouse_click', 'timestamp_ns': timestamp_ns, 'x': x, 'y': y,
+                   'button': 'Button.left', 'pressed': roll < 0.96}
+        elif roll < 0.98:
+            yield {'type': 'mouse_scroll', 'timestamp_ns': timestamp_ns, 'x': x, 'y': y, 'dx': 0, 'dy': -1}
+        else:
+            yield {'type': 'key_press' if roll < 0.99 else 'key_release',
+                   'timestamp_ns': timestamp_ns, 'key': rng.choice('wasd')}
+
+
+def mouse_stream(count, seed=0):
+    """Synthetic listener events for FakeBackend.replay: a wandering pointer"""
+    rng = random.Random(seed)
+    x, y = 500, 500
+    for _ in range(count):
+        x += rng.randint(-3, 3)
+        y += rng.randint(-3, 3)
+        yield ('move', x, y)
+
+
+def quiet():
+    """Swallow the engines' progress prints while a benchmark runs"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def gap_stats(timestamps_ns, expected_ns=None):
+    """Summarise the gaps between consecutive event timestamps (in ms)"""
+    gaps = sorted((b - a) / 1e6 for a, b in zip(timestamps_ns, timestamps_ns[1:]))
+    if not gaps:
+        return {'events': len(timestamps_ns)}
+
+    mean = sum(gaps) / len(gaps)
+    stats = {
+        'events': len(timestamps_ns),
+        'achieved_rate': 1000.0 / mean if mean else 0.0,
+        'gap_mean_ms': mean,
+        'gap_stdev_ms': math.sqrt(sum((g - mean) ** 2 for g in gaps) / len(gaps)),
+        'gap_p50_ms': percentile(gaps, 0.50),
+        'gap_p99_ms': percentile(gaps, 0.99),
+        'gap_max_ms': gaps[-1],
+    }
+    if expected_ns:
+        stats['target_rate'] = 1e9 / expected_ns
+    return stats
+
+
+def emit(result):
+    """Print a benchmark result (or list of results) as JSON"""
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Runs the engine benchmarks and writes one JSON report for comparing releases
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+import common
+import bench_click_pattern
+import bench_clicker
+import bench_event_buffer
+import bench_hotkey_dispatch
+import bench_ingestion
+import bench_library
+import bench_macro_bank
+import bench_macro_io
+import bench_multi_presser
+import bench_playback_compression
+import bench_playback_dispatch
+import bench_playback_timing
+import bench_presser
+import bench_startup
+import bench_transform
+import bench_typing
+
+# name -> (full run, quick run)
+BENCHMARKS = {
+    'clicker': (lambda: bench_clicker.run(),
+                lambda: bench_clicker.run(targets=(100, 1000, 5000), duration=0.3,
+                                          burst_targets=(5000, 20000))),
+    'click_pattern': (lambda: bench_click_pattern.run(),
+                      lambda: bench_click_pattern.run(sizes=(10, 1000), duration=0.5)),
+    'presser': (lambda: bench_presser.run(),
+                lambda: bench_presser.run(intervals=(0.01, 0.002), duration=0.3)),
+    'multi_presser': (lambda: bench_multi_presser.run(),
+                      lambda: bench_multi_presser.run(sizes=(8,), duration=0.5)),
+    'typing': (lambda: bench_typing.run(),
+               lambda: bench_typing.run(10_000, limited_rate=20_000)),
+    'playback_dispatch': (lambda: bench_playback_dispatch.run(),
+                          lambda: bench_playback_dispatch.run(10_000, repeats=2)),
+    'playback_compression': (lambda: bench_playback_compression.run(),
+                             lambda: bench_playback_compression.run(500, pauses=2, pause_s=0.2)),
+    'playback_timing': (lambda: bench_playback_timing.run(),
+                        lambda: bench_playback_timing.run(1000)),
+    'ingestion': (lambda: bench_ingestion.run(),
+                  lambda: bench_ingestion.run(duration=0.5, capacity_events=20_000)),
+    'hotkey_dispatch': (lambda: bench_hotkey_dispatch.run(),
+                        lambda: bench_hotkey_dispatch.run(20_000)),
+    'event_buffer': (lambda: bench_event_buffer.run(),
+                     lambda: bench_event_buffer.run(50_000)),
+    'macro_io': (lambda: bench_macro_io.run(),
+                 lambda: bench_macro_io.run(sizes=(10_000, 100_000))),
+    'macro_bank': (lambda: bench_macro_bank.run(),
+                   lambda: bench_macro_bank.run(macros=50, events=200, triggers=50)),
+    'library': (lambda: bench_library.run(),
+                lambda: bench_library.run(count=200, events=200, changed=5)),
+    'transform': (lambda: bench_transform.run(),
+                  lambda: bench_transform.run(sizes=(20_000, 100_000))),
+    'startup': (lambda: bench_startup.run(),
+                lambda: bench_startup.run(repeats=1)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run AutoMation Suite benchmarks")
+    parser.add_argument('names', nargs='*',
+                        help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--quick', action='store_true', help="smaller sizes and shorter runs")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    report = {
+        'created': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'results': {},
+    }
+    for name in args.names or BENCHMARKS:
+        full, quick = BENCHMARKS[name]
+        print(f"Running {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        result = quick() if args.quick else full()
+        result['wall_s'] = time.perf_counter() - start
+        report['results'][name] = result
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        common.emit(report)
+
+
+if __name__ == "__main__":
+    main()
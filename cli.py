@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+AutoMation Suite CLI
+Headless runner for macros, click patterns and key pressing, with a JSON timing summary
+
+Examples:
+    python cli.py play demo.amsm --speed 2 --repeats 3
+    python cli.py play demo.amsm --max-gap 0.5 --collapse-moves
+    python cli.py click --at 500 300 --rate 50 --duration 10
+    python cli.py pattern --points 100,100 200,100 300,100 --rate 5 --duration 30
+    python cli.py press space --rate 20 --duration 5
+    python cli.py transform long.amsm clip.amsm --trim 10 40 --offset 0 -20
+
+Engine messages go to stderr; stdout carries only the JSON summary.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from event_buffer import EVENT_TYPES
+from input_backend import BACKENDS, get_backend, set_backend
+from macro_library import DEFAULT_LIBRARY_DIR, MacroLibrary
+from metrics import get_registry
+from scheduler import POLICIES, POLICY_SKIP
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1        # the job could not start or reported an error
+EXIT_USAGE = 2         # bad arguments (argparse uses this too)
+EXIT_UNAVAILABLE = 3   # the input backend is not usable here
+EXIT_INTERRUPTED = 130
+
+# How often a running job is checked for completion
+POLL_INTERVAL = 0.05
+
+
+class TransformStep(argparse.Action):
+    """Collect transform options in the order they are given on the command line"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        steps = list(getattr(namespace, 'steps', None) or [])
+        steps.append((self.dest, values))
+        namespace.steps = steps
+
+
+def open_time(value):
+    """A time in seconds, or '-' for an open end"""
+    return None if value == '-' else float(value)
+
+
+class JobError(Exception):
+    """A job that cannot run; carries the exit code to finish with"""
+
+    def __init__(self, message, exit_code=EXIT_FAILED):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def wait_for(thread, stop, duration=None):
+    """Wait for a worker thread to finish, calling stop() after duration seconds.
+
+    Returns True if the job was stopped because its duration ran out.
+    """
+    deadline = time.perf_counter() + duration if duration else None
+    while thread is not None and thread.is_alive():
+        if deadline is None:
+            thread.join(POLL_INTERVAL)
+            continue
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            stop()
+            thread.join(5.0)
+            return True
+        thread.join(min(POLL_INTERVAL, remaining))
+    return False
+
+
+def latency_summary(name):
+    """Lateness of the fires recorded by one metrics histogram, in ms"""
+    snapshot = get_registry().histogram(name).snapshot()
+    return {
+        'count': snapshot['count'],
+        'mean_ms': snapshot['mean'] * 1000,
+        'p50_ms': snapshot['p50'] * 1000,
+        'p99_ms': snapshot['p99'] * 1000,
+        'max_ms': snapshot['max'] * 1000,
+    }
+
+
+def require_backend(backend):
+    if not backend.available:
+        raise JobError(f"{backend.name} backend not available", EXIT_UNAVAILABLE)
+
+
+# Commands; each returns the job-specific part of the summary
+def cmd_play(args, backend):
+    """Play a macro file, or a macro from the library by name"""
+    from macro_recorder import MacroRecorder
+
+    require_backend(backend)
+    filename = args.file
+    if not os.path.exists(filename):
+        library = MacroLibrary(args.library)
+        library.refresh()
+        filename = library.resolve(args.file) or filename
+        library.close()
+
+    recorder = MacroRecorder(backend)
+    try:
+        if not recorder.load_macro(filename):
+            raise JobError(f"Could not load macro {args.file}")
+        settle = args.settle / 1000.0 if args.max_speed else None
+        if not recorder.play_macro(args.speed, args.repeats, args.hotkey,
+                                   args.max_gap, args.collapse_moves, settle):
+            raise JobError("Playback did not start")
+        timed_out = wait_for(recorder.playback_thread, recorder.stop_playback, args.duration)
+        if recorder.playback_thread.is_alive():
+            raise JobError("Playback did not stop")
+        error = recorder.get_playback_stats()['error']
+        if error:
+            raise JobError(f"Playback failed: {error}")
+        return {
+            'file': filename,
+            'actions': len(recorder.recorded_actions),
+            'speed': args.speed,
+            'repeats': args.repeats,
+            'stopped_by_duration': timed_out,
+            'progress': recorder.get_playback_progress(),
+            'playback': recorder.get_playback_stats(),
+            'lateness': latency_summary('automation_playback_lateness_seconds'),
+        }
+    finally:
+        recorder.cleanup()
+
+
+def interval_from(args):
+    if args.rate:
+        return 1.0 / args.rate
+    return args.interval
+
+
+def cmd_click(args, backend):
+    """Click one position (or the cursor) at a fixed rate"""
+    from auto_clicker import AutoClicker
+
+    require_backend(backend)
+    clicker = AutoClicker(backend)
+    try:
+        clicker.start_clicking(interval_from(args), args.random_offset > 0, args.random_offset / 1000.0,
+                               args.button, args.click_type, args.count, args.hotkey,
+                               tuple(args.at) if args.at else None, args.policy, args.burst)
+        if clicker.click_thread is None:
+            raise JobError("Clicking did not start")
+        timed_out = wait_for(clicker.click_thread, clicker.stop_clicking, args.duration)
+        if clicker.error:
+            raise JobError(f"Clicking failed: {clicker.error}")
+        status = clicker.get_status()
+        status['stopped_by_duration'] = timed_out
+        status['lateness'] = latency_summary('automation_click_lateness_seconds')
+        return status
+    finally:
+        clicker.cleanup()
+
+
+def load_points(args):
+    """Targets for the pattern command from --points, --file or --grid"""
+    if args.points:
+        return [tuple(int(value) for value in point.split(',')) for point in args.points]
+    if args.file:
+        with open(args.file) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('targets', [])
+        return [point if isinstance(point, dict) else tuple(point) for point in data]
+    left, top, columns, rows, spacing_x, spacing_y = args.grid
+    return [(left + column * spacing_x, top + row * spacing_y)
+            for row in range(rows) for column in range(columns)]
+
+
+def cmd_pattern(args, backend):
+    """Click a multi-target pattern"""
+    from auto_clicker import AutoClicker
+    from click_pattern import ClickPattern
+
+    require_backend(backend)
+    try:
+        points = load_points(args)
+    except (OSError, ValueError) as e:
+        raise JobError(f"Could not read pattern: {e}", EXIT_USAGE)
+    if not points:
+        raise JobError("Pattern has no targets", EXIT_USAGE)
+
+    defaults = {'button': args.button, 'click_type': args.click_type, 'dwell': args.dwell / 1000.0,
+                'repeat_times': args.count}
+    if args.sequence:
+        pattern = ClickPattern.sequence(points, args.sequence, args.policy, **defaults)
+    else:
+        pattern = ClickPattern.from_points(points, args.policy, interval=interval_from(args), **defaults)
+
+    clicker = AutoClicker(backend)
+    try:
+        clicker.start_pattern(pattern, args.hotkey)
+        if clicker.click_thread is None:
+            raise JobError("Clicking did not start")
+        timed_out = wait_for(clicker.click_thread, clicker.stop_clicking, args.duration)
+        if clicker.error:
+            raise JobError(f"Clicking failed: {clicker.error}")
+        stats = pattern.get_stats(per_target=args.per_target)
+        stats['stopped_by_duration'] = timed_out
+        stats['lateness'] = latency_summary('automation_click_lateness_seconds')
+        return stats
+    finally:
+        clicker.cleanup()
+
+
+def cmd_press(args, backend):
+    """Press (or hold) one key"""
+    from hotkey_presser import HotkeyPresser, parse_key
+
+    require_backend(backend)
+    if parse_key(backend, args.key) is None:
+        raise JobError(f"Invalid key: {args.key}", EXIT_USAGE)
+    presser = HotkeyPresser(backend)
+    try:
+        presser.start_pressing(args.key, args.mode, interval_from(args), args.hotkey,
+                               hold_duration=args.hold / 1000.0, jitter=args.jitter / 1000.0,
+                               schedule_policy=args.policy)
+        if presser.press_thread is None:
+            raise JobError("Pressing did not start")
+        timed_out = wait_for(presser.press_thread, presser.stop_pressing, args.duration)
+        if presser.error:
+            raise JobError(f"Pressing failed: {presser.error}")
+        status = presser.get_status()
+        status['stopped_by_duration'] = timed_out
+        status['lateness'] = latency_summary('automation_key_press_lateness_seconds')
+        return status
+    finally:
+        presser.cleanup()
+
+
+def cmd_library(args, backend):
+    """List and search the macro library index"""
+    library = MacroLibrary(args.library)
+    try:
+        result = {'directory': library.directory}
+        if not args.no_refresh:
+            result['refresh'] = library.refresh()
+        if args.set_tags:
+            name, tags = args.set_tags[0], args.set_tags[1:]
+            if not library.set_tags(name, tags):
+                raise JobError(f"No macro named {name} in the library")
+        try:
+            macros = library.query(args.name, args.tag, args.min_duration, args.max_duration,
+                                   args.type, args.order_by, args.limit)
+        except ValueError as e:
+            raise JobError(str(e), EXIT_USAGE)
+        result['count'] = len(macros)
+        result['macros'] = macros
+        return result
+    finally:
+        library.close()
+
+
+def transform_step(name, values):
+    """Build a macro_transform step from one command-line option"""
+    import macro_transform as mt
+
+    if name == 'trim':
+        start, end = (open_time(value) for value in values)
+        return lambda actions: mt.trim(actions, start, end)
+    if name == 'shift':
+        return lambda actions: mt.shift(actions, values)
+    if name == 'concat':
+        return lambda actions: mt.concat(actions, mt.read_macro(values))
+    if name == 'splice':
+        filename, at = values[0], float(values[1])
+        return lambda actions: mt.splice(actions, mt.read_macro(filename), at)
+    if name == 'merge':
+        return lambda actions: mt.merge(actions, mt.read_macro(values))
+    if name == 'retime':
+        start, end, scale = (float(value) for value in values)
+        return lambda actions: mt.retime(actions, [(start, end, scale)])
+    if name == 'keep_types':
+        return lambda actions: mt.filter_types(actions, values)
+    if name == 'drop_types':
+        return lambda actions: mt.filter_types(actions, values, keep=False)
+    if name == 'offset':
+        return lambda actions: mt.offset(actions, *values)
+    raise JobError(f"Unknown transform: {name}", EXIT_USAGE)
+
+
+def cmd_transform(args, backend):
+    """Stream a macro file through transform steps into a new file"""
+    from macro_transform import apply_steps, read_macro, write_macro
+
+    if not os.path.exists(args.input):
+        raise JobError(f"No such macro file: {args.input}")
+    steps = [transform_step(name, values) for name, values in args.steps or ()]
+    for name, values in args.steps or ():
+        if name in ('concat', 'merge', 'splice'):
+            other = values if name != 'splice' else values[0]
+            if not os.path.exists(other):
+                raise JobError(f"No such macro file: {other}")
+
+    events_in = 0
+
+    def counted(actions):
+        nonlocal events_in
+        for action in actions:
+            events_in += 1
+            yield action
+
+    start = time.perf_counter()
+    try:
+        events_out = write_macro(args.target, apply_steps(counted(read_macro(args.input)), steps))
+    except ValueError as e:
+        raise JobError(str(e), EXIT_USAGE)
+    elapsed = time.perf_counter() - start
+    return {
+        'input': args.input,
+        'output': args.target,
+        'steps': [name for name, _ in args.steps or ()],
+        'events_in': events_in,
+        'events_out': events_out,
+        'elapsed_s': elapsed,
+        'events_per_s': (events_in / elapsed) if elapsed else 0.0,
+    }
+
+
+COMMANDS = {
+    'play': cmd_play,
+    'click': cmd_click,
+    'pattern': cmd_pattern,
+    'press': cmd_press,
+    'library': cmd_library,
+    'transform': cmd_transform,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run AutoMation Suite jobs without the GUI")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=None,
+                        help="input backend (default: AMS_INPUT_BACKEND or pynput)")
+    parser.add_argument('--output', help="write the JSON summary to this file instead of stdout")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="serve Prometheus metrics on localhost while the job runs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    timing = argparse.ArgumentParser(add_help=False)
+    timing.add_argument('--duration', type=float, default=None,
+                        help="stop after this many seconds (default: until done or Ctrl+C)")
+    timing.add_argument('--policy', choices=POLICIES, default=POLICY_SKIP,
+                        help="what to do with missed deadlines")
+
+    rate = argparse.ArgumentParser(add_help=False)
+    group = rate.add_mutually_exclusive_group()
+    group.add_argument('--rate', type=float, default=None, help="events per second")
+    group.add_argument('--interval', type=float, default=0.1, help="seconds between events")
+
+    mouse = argparse.ArgumentParser(add_help=False)
+    mouse.add_argument('--button', choices=('left', 'right', 'middle'), default='left')
+    mouse.add_argument('--count', type=int, default=0,
+                       help="stop after this many clicks, per target for patterns (0: unlimited)")
+    mouse.add_argument('--hotkey', default='F6', help="toggle hotkey")
+
+    play = subparsers.add_parser('play', parents=[timing], help="play a macro file")
+    play.add_argument('file')
+    play.add_argument('--speed', type=float, default=1.0)
+    play.add_argument('--repeats', type=int, default=1, help="0 repeats until stopped")
+    play.add_argument('--hotkey', default='F10', help="stop hotkey")
+    play.add_argument('--library', default=DEFAULT_LIBRARY_DIR,
+                      help="library to look the macro up in when FILE is not a path")
+    play.add_argument('--max-gap', type=float, default=None, help="cap idle gaps at this many seconds")
+    play.add_argument('--collapse-moves', action='store_true',
+                      help="play each run of mouse moves as its final position")
+    play.add_argument('--max-speed', action='store_true',
+                      help="play as fast as possible, pausing only around clicks and keys")
+    play.add_argument('--settle', type=float, default=10.0,
+                      help="pause around clicks and keys in --max-speed mode, in ms")
+
+    click = subparsers.add_parser('click', parents=[timing, rate, mouse], help="click at a fixed rate")
+    click.add_argument('--at', type=int, nargs=2, metavar=('X', 'Y'),
+                       help="click position (default: wherever the cursor is)")
+    click.add_argument('--click-type', choices=('single', 'double'), default='single')
+    click.add_argument('--burst', type=int, default=1, help="clicks per wake-up")
+    click.add_argument('--random-offset', type=float, default=0.0, help="random ± offset in ms")
+
+    pattern = subparsers.add_parser('pattern', parents=[timing, rate, mouse], help="click a multi-target pattern")
+    source = pattern.add_mutually_exclusive_group(required=True)
+    source.add_argument('--points', nargs='+', metavar='X,Y')
+    source.add_argument('--file', help="JSON list of [x, y] points or ClickTarget dicts")
+    source.add_argument('--grid', type=int, nargs=6,
+                        metavar=('LEFT', 'TOP', 'COLUMNS', 'ROWS', 'DX', 'DY'))
+    pattern.add_argument('--click-type', choices=('single', 'double', 'triple'), default='single')
+    pattern.add_argument('--sequence', type=float, default=None, metavar='STEP',
+                         help="visit the points in order, one every STEP seconds")
+    pattern.add_argument('--dwell', type=float, default=0.0, help="button hold time in ms")
+    pattern.add_argument('--per-target', action='store_true', help="include per-target stats")
+
+    press = subparsers.add_parser('press', parents=[timing, rate], help="press or hold a key")
+    press.add_argument('key')
+    press.add_argument('--mode', choices=('continuous', 'hold'), default='continuous')
+    press.add_argument('--hold', type=float, default=1.0, help="hold time of each press in ms")
+    press.add_argument('--jitter', type=float, default=0.0, help="random press shift in ms")
+    press.add_argument('--hotkey', default='F8', help="toggle hotkey")
+    library = subparsers.add_parser('library', help="list and search the macro library")
+    library.add_argument('--library', default=DEFAULT_LIBRARY_DIR, help="library directory")
+    library.add_argument('--name', help="name contains")
+    library.add_argument('--tag')
+    library.add_argument('--min-duration', type=float, default=None, help="seconds")
+    library.add_argument('--max-duration', type=float, default=None, help="seconds")
+    library.add_argument('--type', choices=EVENT_TYPES, default=None,
+                         help="only macros containing this event type")
+    library.add_argument('--order-by', choices=('name', 'duration_ns', 'events', 'created', 'mtime_ns'),
+                         default='name')
+    library.add_argument('--limit', type=int, default=None)
+    library.add_argument('--no-refresh', action='store_true',
+                         help="list from the index without checking the directory for changes")
+    library.add_argument('--set-tags', nargs='+', metavar=('NAME', 'TAG'),
+                         help="replace a macro's tags")
+
+    transform = subparsers.add_parser(
+        'transform', help="edit a macro file with streaming transforms, applied in the order given")
+    transform.add_argument('input')
+    # Not 'output': that is the summary file option
+    transform.add_argument('target', metavar='OUTPUT', help="output file; .amsm, .amslog or .json")
+    transform.set_defaults(steps=None)
+    transform.add_argument('--trim', nargs=2, metavar=('START', 'END'), action=TransformStep,
+                           help="keep START to END seconds ('-' for either end)")
+    transform.add_argument('--shift', type=float, metavar='SECONDS', action=TransformStep)
+    transform.add_argument('--concat', metavar='FILE', action=TransformStep, help="append another macro")
+    transform.add_argument('--splice', nargs=2, metavar=('FILE', 'AT'), action=TransformStep,
+                           help="insert another macro at AT seconds")
+    transform.add_argument('--merge', metavar='FILE', action=TransformStep,
+                           help="interleave another macro by timestamp")
+    transform.add_argument('--retime', nargs=3, metavar=('START', 'END', 'SCALE'), action=TransformStep,
+                           help="multiply the length of START to END seconds by SCALE")
+    transform.add_argument('--keep-types', nargs='+', choices=EVENT_TYPES, action=TransformStep)
+    transform.add_argument('--drop-types', nargs='+', choices=EVENT_TYPES, action=TransformStep)
+    transform.add_argument('--offset', nargs=2, type=int, metavar=('DX', 'DY'), action=TransformStep,
+                           help="move mouse events by DX, DY pixels")
+    return parser
+
+
+def emit(summary, output=None):
+    text = json.dumps(summary, indent=2, default=str)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    summary = {
+        'command': args.command,
+        'started': datetime.now().isoformat(),
+    }
+    exit_code = EXIT_OK
+    start = time.perf_counter()
+    # Engines report progress with print(); keep stdout for the summary
+    with contextlib.redirect_stdout(sys.stderr):
+        backend = get_backend(args.backend) if args.backend else get_backend()
+        set_backend(backend)
+        summary['backend'] = backend.name
+        try:
+            if args.metrics_port is not None:
+                get_registry().serve(args.metrics_port)
+            summary['result'] = COMMANDS[args.command](args, backend)
+        except JobError as e:
+            exit_code = e.exit_code
+            summary['error'] = str(e)
+        except KeyboardInterrupt:
+            exit_code = EXIT_INTERRUPTED
+            summary['error'] = 'interrupted'
+        except Exception as e:
+            exit_code = EXIT_FAILED
+            summary['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            get_registry().stop_server()
+
+    summary['wall_s'] = time.perf_counter() - start
+    summary['exit_code'] = exit_code
+    emit(summary, args.output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Click Pattern Module
+Multi-target click patterns driven by one heap-scheduled worker
+"""
+
+import heapq
+
+from event_buffer import NS_PER_SECOND
+from scheduler import POLICY_SKIP, POLICIES, clock_ns, get_sleep_granularity_ns, wait_until
+
+CLICK_COUNTS = {'single': 1, 'double': 2, 'triple': 3}
+
+# Heap entry kinds; releases sort first so a held button is let go before
+# a press due at the same time
+RELEASE = 0
+PRESS = 1
+
+
+class ClickTarget:
+    """One point in a click pattern with its own button, click type and rate.
+
+    interval is the time between this target's clicks and phase delays its
+    first click from the start of the pattern. dwell > 0 holds the button
+    down, with the cursor on the target, for that long (at most interval)
+    on each click. Clicks of other targets that fall due during the hold
+    wait for its release, since moving the cursor would turn the hold into
+    a drag.
+    repeat_times limits this target's clicks (0 means unlimited).
+    """
+
+    def __init__(self, x, y, button='left', click_type='single', interval=0.1,
+                 dwell=0.0, phase=0.0, repeat_times=0):
+        if click_type.lower() not in CLICK_COUNTS:
+            raise ValueError(f"Unknown click type: {click_type}")
+
+        self.x = int(x)
+        self.y = int(y)
+        self.button = button
+        self.click_type = click_type.lower()
+        self.interval = max(0.001, interval)  # Minimum 1ms, as for the single clicker
+        self.dwell = max(0.0, dwell)
+        self.phase = max(0.0, phase)
+        self.repeat_times = repeat_times
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.clicks = 0
+        self.skipped = 0
+        self.late = 0
+        self.max_lateness_ns = 0
+        self.first_click_ns = None
+        self.last_click_ns = None
+
+    def achieved_rate(self):
+        """Clicks per second this target actually got"""
+        if self.clicks < 2:
+            return 0.0
+        span = (self.last_click_ns - self.first_click_ns) / NS_PER_SECOND
+        return (self.clicks - 1) / span if span > 0 else 0.0
+
+    def get_stats(self):
+        return {
+            'position': (self.x, self.y),
+            'button': self.button,
+            'click_type': self.click_type,
+            'target_rate': 1.0 / self.interval,
+            'achieved_rate': self.achieved_rate(),
+            'clicks': self.clicks,
+            'skipped': self.skipped,
+            'late': self.late,
+            'max_lateness_ms': self.max_lateness_ns / 1e6,
+        }
+
+
+def make_target(point, **defaults):
+    """Build a ClickTarget from a ClickTarget, an (x, y) tuple or a dict of its arguments"""
+    if isinstance(point, ClickTarget):
+        return point
+    if isinstance(point, dict):
+        options = dict(defaults)
+        options.update(point)
+        return ClickTarget(**options)
+    x, y = point
+    return ClickTarget(x, y, **defaults)
+
+
+class ClickPattern:
+    """A set of click targets interleaved by a single worker.
+
+    Every target's next deadline sits in one heap keyed by time, so the
+    worker always sleeps until whichever target is due next. Targets run
+    at independent rates on absolute timelines, and the cost per click is
+    O(log n) in the number of targets, with no thread per target. A click
+    with dwell is a press entry plus a release entry dwell later; presses
+    that come up while a button is held are put back to the release, and
+    are counted late against their own deadline.
+    """
+
+    def __init__(self, targets, policy=POLICY_SKIP, max_catch_up=10):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+
+        self.targets = [make_target(target) for target in targets]
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.start_ns = None
+        self.stop_ns = None
+
+    @classmethod
+    def from_points(cls, points, policy=POLICY_SKIP, stagger=True, **defaults):
+        """Build a pattern where every point shares the given ClickTarget settings.
+
+        With stagger, first clicks are spread evenly over one interval
+        instead of all targets firing at once when the pattern starts.
+        """
+        targets = [make_target(point, **defaults) for point in points]
+        if stagger:
+            for i, target in enumerate(targets):
+                target.phase += target.interval * i / len(targets)
+        return cls(targets, policy)
+
+    @classmethod
+    def sequence(cls, points, step=0.1, policy=POLICY_SKIP, **defaults):
+        """Visit points in order, one every step seconds, looping over the list"""
+        count = len(points)
+        targets = []
+        for i, point in enumerate(points):
+            target = make_target(point, **defaults)
+            target.interval = max(0.001, step * count)
+            target.phase = step * i
+            targets.append(target)
+        return cls(targets, policy)
+
+    @classmethod
+    def grid(cls, left, top, columns, rows, spacing_x, spacing_y, policy=POLICY_SKIP,
+             stagger=True, **defaults):
+        """Pattern over a columns x rows grid of points starting at (left, top)"""
+        points = [(left + column * spacing_x, top + row * spacing_y)
+                  for row in range(rows) for column in range(columns)]
+        return cls.from_points(points, policy, stagger, **defaults)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def run(self, mouse_controller, resolve_button, should_stop=None, spin_threshold_ns=None,
+            clicks_counter=None, lateness_histogram=None):
+        """Click the pattern until every target is done or should_stop() is true.
+
+        clicks_counter and lateness_histogram are optional metrics that
+        receive every click and its lateness (seconds).
+        """
+        if spin_threshold_ns is None:
+            spin_threshold_ns = get_sleep_granularity_ns() * 2 + 100_000
+        should_stop = should_stop or (lambda: False)
+
+        # Resolve everything the hot loop needs once
+        buttons = {}
+        prepared = []
+        for target in self.targets:
+            target.reset_stats()
+            button = buttons.get(target.button)
+            if button is None:
+                button = buttons[target.button] = resolve_button(target.button)
+            prepared.append((target, (target.x, target.y), button,
+                             CLICK_COUNTS[target.click_type],
+                             int(target.interval * NS_PER_SECOND),
+                             int(min(target.dwell, target.interval) * NS_PER_SECOND)))
+
+        self.start_ns = clock_ns()
+        self.stop_ns = None
+        # Entries are (fire time, kind, target, deadline); a press postponed by
+        # a hold fires later than the deadline it is timed against
+        heap = []
+        for i, target in enumerate(self.targets):
+            first_ns = self.start_ns + int(target.phase * NS_PER_SECOND)
+            heap.append((first_ns, PRESS, i, first_ns))
+        heapq.heapify(heap)
+        held = None  # (release time, target) while a dwell holds a button down
+
+        try:
+            while heap and not should_stop():
+                fire_ns, kind, i, deadline_ns = heap[0]
+                if not wait_until(fire_ns, spin_threshold_ns, should_stop):
+                    break
+
+                target, position, button, count, interval_ns, dwell_ns = prepared[i]
+                if kind == RELEASE:
+                    heapq.heappop(heap)
+                    mouse_controller.position = position
+                    mouse_controller.release(button)
+                    held = None
+                    continue
+                if held is not None:
+                    # Keep the cursor on the held target until its release
+                    heapq.heapreplace(heap, (held[0], PRESS, i, deadline_ns))
+                    continue
+
+                now = clock_ns()
+                lateness = now - deadline_ns
+                if lateness > spin_threshold_ns:
+                    target.late += 1
+                if lateness > target.max_lateness_ns:
+                    target.max_lateness_ns = lateness
+                if lateness_histogram is not None:
+                    lateness_histogram.observe(lateness / 1e9)
+
+                mouse_controller.position = position
+                if dwell_ns:
+                    if count > 1:
+                        mouse_controller.click(button, count - 1)
+                    mouse_controller.press(button)
+                    held = (fire_ns + dwell_ns, i)
+                else:
+                    mouse_controller.click(button, count)
+
+                if target.first_click_ns is None:
+                    target.first_click_ns = now
+                target.last_click_ns = now
+                target.clicks += 1
+                if clicks_counter is not None:
+                    clicks_counter.inc()
+
+                if target.repeat_times and target.clicks >= target.repeat_times:
+                    heapq.heappop(heap)
+                else:
+                    next_ns = self._next_deadline(target, deadline_ns, interval_ns)
+                    heapq.heapreplace(heap, (next_ns, PRESS, i, next_ns))
+                if dwell_ns:
+                    heapq.heappush(heap, (held[0], RELEASE, i, held[0]))
+        finally:
+            # Never leave a button held
+            if held is not None:
+                position, button = prepared[held[1]][1:3]
+                mouse_controller.position = position
+                mouse_controller.release(button)
+            self.stop_ns = clock_ns()
+
+    def _next_deadline(self, target, deadline_ns, interval_ns):
+        """Next deadline for a target, applying the missed-deadline policy"""
+        deadline_ns += interval_ns
+        behind = clock_ns() - deadline_ns
+        if behind <= 0:
+            return deadline_ns
+
+        missed = behind // interval_ns
+        if self.policy == POLICY_SKIP:
+            if missed:
+                deadline_ns += missed * interval_ns
+                target.skipped += missed
+        elif missed > self.max_catch_up:
+            dropped = missed - self.max_catch_up
+            deadline_ns += dropped * interval_ns
+            target.skipped += dropped
+        return deadline_ns
+
+    def total_clicks(self):
+        return sum(target.clicks for target in self.targets)
+
+    def get_stats(self, per_target=True):
+        """Aggregate (and optionally per-target) rates for the current or last run"""
+        elapsed = 0.0
+        if self.start_ns is not None:
+            elapsed = ((self.stop_ns or clock_ns()) - self.start_ns) / NS_PER_SECOND
+        clicks = self.total_clicks()
+        target_rate = sum(1.0 / target.interval for target in self.targets)
+        rates = [target.achieved_rate() for target in self.targets if target.clicks > 1]
+
+        stats = {
+            'targets': len(self.targets),
+            'policy': self.policy,
+            'clicks': clicks,
+            'skipped': sum(target.skipped for target in self.targets),
+            'late': sum(target.late for target in self.targets),
+            'max_lateness_ms': max((target.max_lateness_ns for target in self.targets),
+                                   default=0) / 1e6,
+            'target_rate': target_rate,
+            'achieved_rate': clicks / elapsed if elapsed > 0 else 0.0,
+            'min_target_rate': min(rates) if rates else 0.0,
+            'max_target_rate': max(rates) if rates else 0.0,
+        }
+        if per_target:
+            stats['per_target'] = [target.get_stats() for target in self.targets]
+        return stats
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Event Buffer Module
+Compact columnar storage for recorded macro events
+"""
+
+from array import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Event type codes, stored in the 'type' column
+MOUSE_MOVE = 0
+MOUSE_CLICK = 1
+MOUSE_SCROLL = 2
+KEY_PRESS = 3
+KEY_RELEASE = 4
+
+EVENT_TYPES = ('mouse_move', 'mouse_click', 'mouse_scroll', 'key_press', 'key_release')
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+NO_SYMBOL = -1  # 'symbol' column value for events without a button/key
+
+NS_PER_SECOND = 1_000_000_000
+
+# Column name -> array typecode
+COLUMNS = (
+    ('type', 'B'),
+    ('timestamp_ns', 'q'),  # integer nanoseconds since the start of the recording
+    ('x', 'i'),
+    ('y', 'i'),
+    ('dx', 'i'),
+    ('dy', 'i'),
+    ('symbol', 'i'),   # index into the interned symbol table (button or key name)
+    ('pressed', 'b'),
+)
+
+
+def seconds_to_ns(seconds):
+    """Convert a float-seconds timestamp (pre-nanosecond macros) to integer ns"""
+    return int(round(seconds * NS_PER_SECOND))
+
+
+def action_timestamp_ns(action):
+    """Integer ns timestamp of an action dict, migrating float-second timestamps"""
+    timestamp = action.get('timestamp_ns')
+    if timestamp is None:
+        timestamp = seconds_to_ns(action['timestamp'])
+    return timestamp
+
+
+class EventBuffer:
+    """Columnar store for macro events with a list-of-dicts view.
+
+    Each event occupies one slot in a set of parallel typed arrays, and
+    button/key names are interned into a shared symbol table. Indexing and
+    iteration rebuild the same dicts the recorder has always produced, so
+    code written against a list of action dicts keeps working. The dicts
+    are copies: changing one does not change the buffer.
+
+    Timestamps are stored as integer nanoseconds. Dicts carry them as
+    'timestamp_ns' alongside the float-seconds 'timestamp' older code and
+    files use; dicts with only 'timestamp' are converted on append.
+    """
+
+    def __init__(self, actions=None):
+        self.types = array('B')
+        self.timestamps = array('q')
+        self.xs = array('i')
+        self.ys = array('i')
+        self.dxs = array('i')
+        self.dys = array('i')
+        self.symbols = array('i')
+        self.pressed = array('b')
+
+        # Interned button/key names
+        self.symbol_table = []
+        self.symbol_ids = {}
+
+        if actions:
+            self.extend(actions)
+
+    def intern(self, name):
+        """Get the symbol id for a button or key name, adding it if new"""
+        symbol = self.symbol_ids.get(name)
+        if symbol is None:
+            symbol = len(self.symbol_table)
+            self.symbol_table.append(name)
+            self.symbol_ids[name] = symbol
+        return symbol
+
+    def _append_row(self, code, timestamp, x=0, y=0, dx=0, dy=0, symbol=NO_SYMBOL, pressed=0):
+        self.types.append(code)
+        self.timestamps.append(timestamp)
+        self.xs.append(int(x))
+        self.ys.append(int(y))
+        self.dxs.append(int(dx))
+        self.dys.append(int(dy))
+        self.symbols.append(symbol)
+        self.pressed.append(pressed)
+
+    # Typed appenders used by the recorder callbacks (no dict construction)
+    def append_move(self, timestamp, x, y):
+        self._append_row(MOUSE_MOVE, timestamp, x, y)
+
+    def append_click(self, timestamp, x, y, button, pressed):
+        self._append_row(MOUSE_CLICK, timestamp, x, y, symbol=self.intern(button),
+                         pressed=1 if pressed else 0)
+
+    def append_scroll(self, timestamp, x, y, dx, dy):
+        self._append_row(MOUSE_SCROLL, timestamp, x, y, dx, dy)
+
+    def append_key(self, timestamp, key, pressed):
+        code = KEY_PRESS if pressed else KEY_RELEASE
+        self._append_row(code, timestamp, symbol=self.intern(key))
+
+    def append_from(self, other, index):
+        """Copy one event from another EventBuffer"""
+        symbol = other.symbols[index]
+        if symbol != NO_SYMBOL:
+            symbol = self.intern(other.symbol_table[symbol])
+        self._append_row(other.types[index], other.timestamps[index], other.xs[index],
+                         other.ys[index], other.dxs[index], other.dys[index], symbol,
+                         other.pressed[index])
+
+    def append(self, action):
+        """Append an action dict in the recorder's dict format"""
+        action_type = action['type']
+        timestamp = action_timestamp_ns(action)
+
+        if action_type == 'mouse_move':
+            self.append_move(timestamp, action['x'], action['y'])
+        elif action_type == 'mouse_click':
+            self.append_click(timestamp, action['x'], action['y'], action['button'], action['pressed'])
+        elif action_type == 'mouse_scroll':
+            self.append_scroll(timestamp, action['x'], action['y'], action['dx'], action['dy'])
+        elif action_type == 'key_press':
+            self.append_key(timestamp, action['key'], True)
+        elif action_type == 'key_release':
+            self.append_key(timestamp, action['key'], False)
+        else:
+            raise ValueError(f"Unknown action type: {action_type}")
+
+    def extend(self, actions):
+        """Append every action from an iterable of action dicts or another buffer"""
+        if isinstance(actions, EventBuffer):
+            self._extend_buffer(actions)
+            return
+        for action in actions:
+            self.append(action)
+
+    def _extend_buffer(self, other):
+        # Remap the other buffer's symbol ids into this buffer's table
+        remap = [self.intern(name) for name in other.symbol_table]
+        self.types.extend(other.types)
+        self.timestamps.extend(other.timestamps)
+        self.xs.extend(other.xs)
+        self.ys.extend(other.ys)
+        self.dxs.extend(other.dxs)
+        self.dys.extend(other.dys)
+        self.symbols.extend(array('i', (remap[s] if s != NO_SYMBOL else NO_SYMBOL
+                                        for s in other.symbols)))
+        self.pressed.extend(other.pressed)
+
+    def clear(self):
+        """Remove all events"""
+        self.__init__()
+
+    def get(self, index):
+        """Rebuild the action dict for one event"""
+        code = self.types[index]
+        timestamp_ns = self.timestamps[index]
+        timestamp = timestamp_ns / NS_PER_SECOND
+
+        if code == MOUSE_MOVE:
+            return {'type': 'mouse_move', 'timestamp': timestamp, 'timestamp_ns': timestamp_ns,
+                    'x': self.xs[index], 'y': self.ys[index]}
+        if code == MOUSE_CLICK:
+            return {'type': 'mouse_click', 'timestamp': timestamp, 'timestamp_ns': timestamp_ns,
+                    'x': self.xs[index], 'y': self.ys[index],
+                    'button': self.symbol_table[self.symbols[index]],
+                    'pressed': bool(self.pressed[index])}
+        if code == MOUSE_SCROLL:
+            return {'type': 'mouse_scroll', 'timestamp': timestamp, 'timestamp_ns': timestamp_ns,
+                    'x': self.xs[index], 'y': self.ys[index],
+                    'dx': self.dxs[index], 'dy': self.dys[index]}
+        return {'type': EVENT_TYPES[code], 'timestamp': timestamp, 'timestamp_ns': timestamp_ns,
+                'key': self.symbol_table[self.symbols[index]]}
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return EventBuffer(self.get(i) for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        return self.get(index)
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self.get(index)
+
+    def to_list(self):
+        """Get all events as a list of action dicts (e.g. for JSON)"""
+        return list(self)
+
+    def columns(self):
+        """Get the raw column arrays keyed by column name"""
+        return {
+            'type': self.types,
+            'timestamp_ns': self.timestamps,
+            'x': self.xs,
+            'y': self.ys,
+            'dx': self.dxs,
+            'dy': self.dys,
+            'symbol': self.symbols,
+            'pressed': self.pressed,
+        }
+
+    def to_numpy(self):
+        """Get zero-copy NumPy views of the columns (requires numpy)"""
+        if numpy is None:
+            raise RuntimeError("numpy is not installed")
+        return {name: numpy.frombuffer(column, dtype=column.typecode)
+                for name, column in self.columns().items()}
+
+    def memory_usage(self):
+        """Approximate bytes used by the column data"""
+        total = sum(column.buffer_info()[1] * column.itemsize for column in self.columns().values())
+        return total + sum(len(name) for name in self.symbol_table)
+
+    @classmethod
+    def from_actions(cls, actions):
+        """Build a buffer from a list of action dicts"""
+        return actions if isinstance(actions, cls) else cls(actions)
@@ -6,31 +6,55 @@ Automatically press or hold down keys for gaming applications
 
 import threading
 import time
-try:
-    import pynput
-    from pynput import keyboard
-    from pynput.keyboard import Key, Listener as KeyboardListener
-except ImportError:
-    print("Warning: pynput not installed. Please install with: pip install pynput")
-    pynput = None
+import random
+from scheduler import DeadlineScheduler, POLICY_SKIP, get_sleep_granularity_ns, wait_until
+from input_backend import get_backend
+from hotkey_service import get_hotkey_service
+from text_injector import DEFAULT_CHUNK_SIZE, STRATEGY_TYPE, TypingJob
+from metrics import get_registry
+from status_bus import get_status_bus
 
 class HotkeyPresser:
-    def __init__(self):
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
         self.is_pressing = False
         self.press_thread = None
-        self.hotkey_listener = None
+        self.hotkey_service = get_hotkey_service(self.backend)
+        self.registered_hotkey = None
         self.stop_pressing_flag = False
+        self.status_bus = get_status_bus()
         
         # Default settings
         self.target_key = 'f'
         self.press_mode = 'continuous'  # 'continuous' or 'hold'
-        self.press_interval = 0.05  # seconds between presses in continuous mode
+        self.press_interval = 0.05  # seconds from one press to the next in continuous mode
+        self.hold_duration = 0.001  # seconds each press is held down
+        self.jitter = 0.0  # max random shift of each press (seconds)
         self.activation_hotkey = 'F8'
+        self.schedule_policy = POLICY_SKIP  # what to do with missed press deadlines
+        self.scheduler = None
         
-    def start_pressing(self, key='f', mode='continuous', interval=0.05, activation_hotkey='F8'):
-        """Start pressing/holding the specified key"""
-        if not pynput:
-            print("Cannot start key pressing: pynput not available")
+        # Live totals: presses in the current (or last) run, and process-wide metrics
+        self.press_count = 0
+        self.error = None  # exception that ended the current (or last) run, if any
+        self.presses_metric, self.lateness_metric = get_press_metrics()
+        
+        # Current (or last) type_text job
+        self.typing_job = None
+        
+    def start_pressing(self, key='f', mode='continuous', interval=0.05, activation_hotkey='F8',
+                       rate=None, hold_duration=0.001, duty_cycle=None, jitter=0.0,
+                       schedule_policy=POLICY_SKIP):
+        """Start pressing/holding the specified key.
+        
+        In continuous mode presses start every interval seconds (or rate
+        presses/sec) on an absolute timeline, and each is held for
+        hold_duration seconds (or duty_cycle of the period). jitter shifts
+        each press randomly by up to that many seconds without changing the
+        long-run rate.
+        """
+        if not self.backend.available:
+            print(f"Cannot start key pressing: {self.backend.name} backend not available")
             return
             
         if self.is_pressing:
@@ -40,13 +64,25 @@ class HotkeyPresser:
         # Store settings
         self.target_key = key.lower()
         self.press_mode = mode
+        if rate:
+            interval = 1.0 / rate
         self.press_interval = max(0.001, interval)  # Minimum 1ms
+        if duty_cycle is not None:
+            hold_duration = self.press_interval * duty_cycle
+        # The key has to be released before the next press
+        self.hold_duration = min(max(0.0, hold_duration), self.press_interval / 2)
+        self.jitter = min(max(0.0, jitter), (self.press_interval - self.hold_duration) / 2)
         self.activation_hotkey = activation_hotkey
+        self.schedule_policy = schedule_policy
         self.stop_pressing_flag = False
+        self.error = None
+        # Continuous runs create their own; hold runs have none, and must
+        # not report the last continuous run's timing
+        self.scheduler = None
         
         print(f"Starting hotkey presser - Key: {key}, Mode: {mode}")
         if mode == 'continuous':
-            print(f"Interval: {interval}s")
+            print(f"Rate: {1.0 / self.press_interval:.1f}/s, hold {self.hold_duration * 1000:.1f}ms")
         print(f"Press {activation_hotkey} to toggle")
         
         # Setup hotkey listener
@@ -58,36 +94,32 @@ class HotkeyPresser:
         self.press_thread.start()
         
     def setup_hotkey_listener(self):
-        """Setup hotkey listener for toggling key pressing"""
-        def on_key_press(key):
-            try:
-                # Check for activation hotkey
-                key_str = ''
-                if hasattr(key, 'name'):
-                    key_str = key.name.upper()
-                else:
-                    key_str = str(key).replace("'", "").upper()
-                    
-                if key_str == self.activation_hotkey.upper():
-                    if self.is_pressing:
-                        self.stop_pressing()
-                    else:
-                        # If stopped, restart with current settings
-                        self.start_pressing(self.target_key, self.press_mode,
-                                          self.press_interval, self.activation_hotkey)
-            except Exception as e:
-                print(f"Hotkey error: {e}")
-                
-        self.hotkey_listener = KeyboardListener(on_press=on_key_press)
-        self.hotkey_listener.start()
+        """Register the activation hotkey with the shared hotkey service"""
+        if self.registered_hotkey is None:
+            self.hotkey_service.register(self.activation_hotkey, self._on_hotkey)
+        elif self.registered_hotkey != self.activation_hotkey:
+            self.hotkey_service.rebind(self.registered_hotkey, self.activation_hotkey, self._on_hotkey)
+        self.registered_hotkey = self.activation_hotkey
+        
+    def _on_hotkey(self):
+        """Toggle pressing when the activation hotkey is pressed"""
+        if self.is_pressing:
+            self.stop_pressing()
+        else:
+            # If stopped, restart with current settings
+            self.start_pressing(self.target_key, self.press_mode,
+                              self.press_interval, self.activation_hotkey,
+                              hold_duration=self.hold_duration, jitter=self.jitter,
+                              schedule_policy=self.schedule_policy)
         
     def _pressing_worker(self):
         """Worker thread for key pressing/holding"""
-        if not pynput:
+        if not self.backend.available:
             return
             
-        keyboard_controller = keyboard.Controller()
+        keyboard_controller = self.backend.keyboard_controller()
         self.is_pressing = True
+        self.status_bus.publish('presser', 'running')
         
         try:
             # Parse target key
@@ -96,12 +128,14 @@ class HotkeyPresser:
                 print(f"Invalid key: {self.target_key}")
                 return
                 
-            press_count = 0
+            self.press_count = 0
             
             if self.press_mode == 'hold':
                 # Hold down mode - press once and hold until stopped
                 print(f"Holding down key: {self.target_key}")
                 keyboard_controller.press(target_key)
+                self.press_count = 1
+                self.presses_metric.inc()
                 
                 # Keep holding until stopped
                 while not self.stop_pressing_flag:
@@ -112,119 +146,70 @@ class HotkeyPresser:
                 print(f"Released key: {self.target_key}")
                 
             else:
-                # Continuous press mode - repeatedly press and release
+                # Continuous press mode - presses start on an absolute timeline
                 print(f"Continuously pressing key: {self.target_key}")
                 
+                scheduler = DeadlineScheduler(self.press_interval, self.schedule_policy,
+                                              lateness_histogram=self.lateness_metric)
+                self.scheduler = scheduler
+                spin_threshold_ns = get_sleep_granularity_ns() * 2 + 100_000
+                should_stop = lambda: self.stop_pressing_flag
+                hold_ns = int(self.hold_duration * 1e9)
+                presses_metric = self.presses_metric
+                last_offset = 0.0
+                
+                scheduler.start()
                 while not self.stop_pressing_flag:
-                    # Press and release key
+                    if not scheduler.wait(should_stop):
+                        break
+                    deadline_ns = scheduler.next_deadline_ns
+                    
+                    # Press, then release hold_duration after the deadline
                     keyboard_controller.press(target_key)
-                    time.sleep(0.001)  # Very short press duration
+                    wait_until(deadline_ns + hold_ns, spin_threshold_ns)
                     keyboard_controller.release(target_key)
                     
-                    press_count += 1
+                    self.press_count += 1
+                    presses_metric.inc()
                     
-                    # Wait before next press
-                    if not self.stop_pressing_flag:
-                        time.sleep(self.press_interval)
+                    # Jitter moves each press around its slot on the exact grid,
+                    # so offsets never accumulate into rate drift
+                    step = self.press_interval
+                    if self.jitter > 0:
+                        offset = random.uniform(-self.jitter, self.jitter)
+                        step += offset - last_offset
+                        last_offset = offset
+                    scheduler.advance(step)
                         
-                print(f"Stopped continuous pressing. Total presses: {press_count}")
+                stats = scheduler.get_stats()
+                print(f"Stopped continuous pressing. Total presses: {self.press_count}, "
+                      f"achieved {stats['achieved_rate']:.1f}/{stats['target_rate']:.1f} per second")
                 
         except Exception as e:
             print(f"Key pressing error: {e}")
+            self.error = e
         finally:
             self.is_pressing = False
-            if self.hotkey_listener:
-                self.hotkey_listener.stop()
+            self.status_bus.publish('presser', 'stopped', presses=self.press_count)
             print("Hotkey presser stopped")
             
     def _parse_key(self, key_str):
-        """Parse key string to pynput key object"""
-        try:
-            # Convert to lowercase for consistency
-            key_str = key_str.lower().strip()
-            
-            # Handle special keys
-            special_keys = {
-                'space': Key.space,
-                'enter': Key.enter,
-                'tab': Key.tab,
-                'shift': Key.shift,
-                'ctrl': Key.ctrl,
-                'alt': Key.alt,
-                'cmd': Key.cmd,
-                'up': Key.up,
-                'down': Key.down,
-                'left': Key.left,
-                'right': Key.right,
-                'home': Key.home,
-                'end': Key.end,
-                'page_up': Key.page_up,
-                'page_down': Key.page_down,
-                'delete': Key.delete,
-                'backspace': Key.backspace,
-                'insert': Key.insert,
-                'esc': Key.esc,
-                'escape': Key.esc,
-                'caps_lock': Key.caps_lock,
-                'num_lock': Key.num_lock,
-                'scroll_lock': Key.scroll_lock,
-            }
-            
-            # Function keys
-            for i in range(1, 13):
-                special_keys[f'f{i}'] = getattr(Key, f'f{i}')
-                
-            # Check if it's a special key
-            if key_str in special_keys:
-                return special_keys[key_str]
-                
-            # Handle single character keys
-            if len(key_str) == 1 and key_str.isalnum():
-                return key_str
-                
-            # Handle some common symbols
-            symbol_map = {
-                ',': ',',
-                '.': '.',
-                '/': '/',
-                ';': ';',
-                "'": "'",
-                '[': '[',
-                ']': ']',
-                '\\': '\\',
-                '=': '=',
-                '-': '-',
-                '`': '`',
-                '1': '1', '2': '2', '3': '3', '4': '4', '5': '5',
-                '6': '6', '7': '7', '8': '8', '9': '9', '0': '0'
-            }
-            
-            if key_str in symbol_map:
-                return symbol_map[key_str]
-                
-            print(f"Warning: Unrecognized key '{key_str}', treating as character")
-            return key_str
-            
-        except Exception as e:
-            print(f"Error parsing key '{key_str}': {e}")
-            return None
+        """Parse key string to a backend key object"""
+        return parse_key(self.backend, key_str)
             
     def stop_pressing(self):
         """Stop key pressing/holding"""
         self.stop_pressing_flag = True
         self.is_pressing = False
-        
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
             
     def press_key_once(self, key, hold_duration=0.01):
         """Press a key once with specified hold duration"""
-        if not pynput:
-            print("Cannot press key: pynput not available")
+        if not self.backend.available:
+            print(f"Cannot press key: {self.backend.name} backend not available")
             return
             
         try:
-            keyboard_controller = keyboard.Controller()
+            keyboard_controller = self.backend.keyboard_controller()
             target_key = self._parse_key(key)
             
             if target_key:
@@ -240,12 +225,12 @@ class HotkeyPresser:
             
     def send_key_sequence(self, keys, interval=0.05):
         """Send a sequence of keys with specified interval between them"""
-        if not pynput:
-            print("Cannot send key sequence: pynput not available")
+        if not self.backend.available:
+            print(f"Cannot send key sequence: {self.backend.name} backend not available")
             return
             
         try:
-            keyboard_controller = keyboard.Controller()
+            keyboard_controller = self.backend.keyboard_controller()
             
             for key in keys:
                 target_key = self._parse_key(key)
@@ -262,55 +247,178 @@ class HotkeyPresser:
         except Exception as e:
             print(f"Error sending key sequence: {e}")
             
-    def type_text(self, text, typing_speed=0.05):
-        """Type text with specified speed"""
-        if not pynput:
-            print("Cannot type text: pynput not available")
-            return
+    def type_text(self, text, typing_speed=0.05, bulk=False, rate=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE, strategy=STRATEGY_TYPE,
+                  background=False, on_progress=None):
+        """Type text with specified speed.
+        
+        By default characters go out one at a time, typing_speed seconds
+        apart. With bulk=True text is sent in chunks of chunk_size
+        characters per backend call, limited to rate characters/sec (None
+        for unlimited); strategy 'paste' or 'auto' pastes large texts
+        through the clipboard instead. With background=True this returns
+        the running TypingJob straight away (see cancel_typing and
+        get_typing_progress).
+        """
+        if not self.backend.available:
+            print(f"Cannot type text: {self.backend.name} backend not available")
+            return None
             
-        try:
-            keyboard_controller = keyboard.Controller()
+        if bulk:
+            job = TypingJob(self.backend, text, rate, chunk_size, strategy, on_progress=on_progress)
+        else:
+            job = TypingJob(self.backend, text, 1.0 / typing_speed if typing_speed > 0 else None,
+                            chunk_size=1, on_progress=on_progress)
+        self.typing_job = job
+        
+        if background:
+            return job.start()
             
-            for char in text:
-                keyboard_controller.type(char)
-                time.sleep(typing_speed)
-                
-            print(f"Typed text: {text}")
+        job.run()
+        progress = job.progress()
+        print(f"Typed {progress['typed']} characters at {progress['chars_per_second']:.0f} chars/s")
+        return job
+        
+    def cancel_typing(self):
+        """Cancel the current type_text job"""
+        if self.typing_job is not None:
+            self.typing_job.cancel()
             
-        except Exception as e:
-            print(f"Error typing text: {e}")
+    def get_typing_progress(self):
+        """Progress of the current (or last) type_text job, or None"""
+        if self.typing_job is None:
+            return None
+        return self.typing_job.progress()
             
     def set_activation_hotkey(self, hotkey):
         """Change the activation hotkey"""
         self.activation_hotkey = hotkey
         
-        # Restart hotkey listener if running
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
+        # Rebind in place; the shared listener keeps running
+        if self.registered_hotkey is not None:
             self.setup_hotkey_listener()
             
     def get_status(self):
         """Get current status information"""
-        return {
+        status = {
             'is_pressing': self.is_pressing,
             'target_key': self.target_key,
             'press_mode': self.press_mode,
             'press_interval': self.press_interval,
-            'activation_hotkey': self.activation_hotkey
+            'hold_duration': self.hold_duration,
+            'jitter': self.jitter,
+            'activation_hotkey': self.activation_hotkey,
+            'schedule_policy': self.schedule_policy,
+            'target_rate': 1.0 / self.press_interval,
+            'achieved_rate': 0.0,
+            'presses': self.press_count,
+            'total_presses': self.presses_metric.value,
+            'error': str(self.error) if self.error else None
         }
         
+        # Timing stats from the current (or last) continuous run
+        if self.scheduler:
+            stats = self.scheduler.get_stats()
+            status['achieved_rate'] = stats['achieved_rate']
+            status['missed_presses'] = stats['skipped']
+            status['late_presses'] = stats['late_events']
+            status['max_lateness_ms'] = stats['max_lateness_ms']
+            
+        return status
+        
     def cleanup(self):
         """Cleanup resources"""
         self.stop_pressing()
+        self.cancel_typing()
         
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
+        if self.registered_hotkey is not None:
+            self.hotkey_service.unregister(self.registered_hotkey, self._on_hotkey)
+            self.registered_hotkey = None
             
         # Wait for thread to finish
         if self.press_thread and self.press_thread.is_alive():
             self.press_thread.join(timeout=1.0)
 
 # Utility functions
+def get_press_metrics():
+    """Process-wide key press counter and lateness histogram shared by the pressers"""
+    registry = get_registry()
+    return (registry.counter('automation_key_presses_total', 'Key presses sent by the key pressers'),
+            registry.histogram('automation_key_press_lateness_seconds',
+                               'Key press fire time minus scheduled time'))
+
+def parse_key(backend, key_str):
+    """Parse key string to a backend key object (None if it can't be parsed)"""
+    try:
+        # Convert to lowercase for consistency
+        key_str = key_str.lower().strip()
+        
+        # Handle special keys (accepted name -> backend key name)
+        special_keys = {
+            'space': 'space',
+            'enter': 'enter',
+            'tab': 'tab',
+            'shift': 'shift',
+            'ctrl': 'ctrl',
+            'alt': 'alt',
+            'cmd': 'cmd',
+            'up': 'up',
+            'down': 'down',
+            'left': 'left',
+            'right': 'right',
+            'home': 'home',
+            'end': 'end',
+            'page_up': 'page_up',
+            'page_down': 'page_down',
+            'delete': 'delete',
+            'backspace': 'backspace',
+            'insert': 'insert',
+            'esc': 'esc',
+            'escape': 'esc',
+            'caps_lock': 'caps_lock',
+            'num_lock': 'num_lock',
+            'scroll_lock': 'scroll_lock',
+        }
+        
+        # Function keys
+        for i in range(1, 13):
+            special_keys[f'f{i}'] = f'f{i}'
+            
+        # Check if it's a special key
+        if key_str in special_keys:
+            return backend.special_key(special_keys[key_str])
+            
+        # Handle single character keys
+        if len(key_str) == 1 and key_str.isalnum():
+            return key_str
+            
+        # Handle some common symbols
+        symbol_map = {
+            ',': ',',
+            '.': '.',
+            '/': '/',
+            ';': ';',
+            "'": "'",
+            '[': '[',
+            ']': ']',
+            '\\': '\\',
+            '=': '=',
+            '-': '-',
+            '`': '`',
+            '1': '1', '2': '2', '3': '3', '4': '4', '5': '5',
+            '6': '6', '7': '7', '8': '8', '9': '9', '0': '0'
+        }
+        
+        if key_str in symbol_map:
+            return symbol_map[key_str]
+            
+        print(f"Warning: Unrecognized key '{key_str}', treating as character")
+        return key_str
+        
+    except Exception as e:
+        print(f"Error parsing key '{key_str}': {e}")
+        return None
+
 def create_key_combo_presser(keys, activation_hotkey='F7'):
     """Create a hotkey presser for key combinations (like Ctrl+C)"""
     # This would be extended to handle key combinations
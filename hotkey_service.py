@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Hotkey Service Module
+One process-wide keyboard listener dispatching global hotkeys to handlers
+"""
+
+import threading
+import time
+
+from input_backend import get_backend
+
+
+def normalize_key(key):
+    """Normalise a backend key (or hotkey string) to the form hotkeys are matched on"""
+    if isinstance(key, str):
+        return key.replace("'", "").upper()
+    name = getattr(key, 'name', None)
+    if name:
+        return name.upper()
+    return str(key).replace("'", "").upper()
+
+
+class HotkeyService:
+    """Shared global hotkey dispatcher.
+
+    A single keyboard listener serves every registered hotkey. Each key
+    press costs one cached normalisation plus one dict lookup, and
+    handlers can be added, removed or rebound without restarting the
+    listener. The listener starts with the first registration and stops
+    when the last handler is removed.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.listener = None
+        self._lock = threading.Lock()
+
+        # normalised key -> tuple of handlers; tuples are swapped, never mutated,
+        # so the listener thread can read without locking
+        self._handlers = {}
+        self._key_cache = {}
+
+        # Per-event dispatch overhead (excluding handler run time)
+        self.events_seen = 0
+        self.events_matched = 0
+        self.dispatch_ns_total = 0
+        self.dispatch_ns_max = 0
+
+    def register(self, hotkey, handler):
+        """Call handler() whenever hotkey is pressed"""
+        name = normalize_key(hotkey)
+        with self._lock:
+            handlers = self._handlers.get(name, ())
+            if handler not in handlers:
+                self._handlers[name] = handlers + (handler,)
+            self._ensure_listener()
+
+    def unregister(self, hotkey, handler):
+        """Remove a handler registered for hotkey"""
+        name = normalize_key(hotkey)
+        with self._lock:
+            handlers = tuple(h for h in self._handlers.get(name, ()) if h != handler)
+            if handlers:
+                self._handlers[name] = handlers
+            else:
+                self._handlers.pop(name, None)
+            if not self._handlers:
+                self._stop_listener()
+
+    def rebind(self, old_hotkey, new_hotkey, handler):
+        """Move a handler to a different hotkey without touching the listener"""
+        old_name = normalize_key(old_hotkey)
+        new_name = normalize_key(new_hotkey)
+        with self._lock:
+            handlers = tuple(h for h in self._handlers.get(old_name, ()) if h != handler)
+            if handlers:
+                self._handlers[old_name] = handlers
+            else:
+                self._handlers.pop(old_name, None)
+            new_handlers = self._handlers.get(new_name, ())
+            if handler not in new_handlers:
+                self._handlers[new_name] = new_handlers + (handler,)
+            self._ensure_listener()
+
+    def is_registered(self, hotkey, handler):
+        return handler in self._handlers.get(normalize_key(hotkey), ())
+
+    def _ensure_listener(self):
+        if self.listener is None and self.backend.available:
+            self.listener = self.backend.keyboard_listener(on_press=self._on_press)
+            self.listener.start()
+
+    def _stop_listener(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _on_press(self, key):
+        start = time.perf_counter_ns()
+        try:
+            name = self._key_cache[key]
+        except (KeyError, TypeError):
+            name = normalize_key(key)
+            try:
+                self._key_cache[key] = name
+            except TypeError:
+                pass
+        handlers = self._handlers.get(name)
+
+        elapsed = time.perf_counter_ns() - start
+        self.events_seen += 1
+        self.dispatch_ns_total += elapsed
+        if elapsed > self.dispatch_ns_max:
+            self.dispatch_ns_max = elapsed
+
+        if handlers:
+            self.events_matched += 1
+            for handler in handlers:
+                try:
+                    handler()
+                except Exception as e:
+                    print(f"Hotkey error: {e}")
+
+    def get_stats(self):
+        """Get listener and per-event dispatch statistics"""
+        return {
+            'listening': self.listener is not None,
+            'hotkeys': sorted(self._handlers),
+            'events_seen': self.events_seen,
+            'events_matched': self.events_matched,
+            'dispatch_ns_mean': (self.dispatch_ns_total / self.events_seen) if self.events_seen else 0.0,
+            'dispatch_ns_max': self.dispatch_ns_max,
+        }
+
+    def shutdown(self):
+        """Drop all handlers and stop the listener"""
+        with self._lock:
+            self._handlers = {}
+            self._stop_listener()
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_hotkey_service(backend=None):
+    """Get the process-wide hotkey service for a backend (default backend if None)"""
+    backend = backend or get_backend()
+    with _services_lock:
+        service = _services.get(id(backend))
+        if service is None or service.backend is not backend:
+            service = _services[id(backend)] = HotkeyService(backend)
+        return service
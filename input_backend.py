@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Input Backend Module
+Pluggable input injection/monitoring backends (pynput, and an in-process fake)
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+from scheduler import DeadlineScheduler, POLICY_CATCH_UP, clock_ns
+
+_optional_modules = {}
+
+# How long the target application gets to read a pasted clipboard before
+# its previous contents are put back
+CLIPBOARD_RESTORE_DELAY = 0.25  # seconds
+
+
+def optional_import(name):
+    """Import an optional dependency on first use, or None if it isn't installed.
+
+    pynput loads its platform backend (and on Linux connects to the X
+    display) at import time, so optional packages are only imported once a
+    backend actually needs them rather than when this module loads.
+    """
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+def is_installed(name):
+    """Check for a package without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class InputBackend:
+    """Interface every input backend implements.
+
+    Controllers follow pynput's controller protocol: a mouse controller has
+    a settable position plus press/release/click/scroll, and a keyboard
+    controller has press/release/type. Listeners have start()/stop() and
+    call the given callbacks with pynput's callback signatures.
+    """
+
+    name = 'base'
+    available = False
+
+    def mouse_controller(self):
+        raise NotImplementedError
+
+    def keyboard_controller(self):
+        raise NotImplementedError
+
+    def mouse_listener(self, on_move=None, on_click=None, on_scroll=None):
+        raise NotImplementedError
+
+    def keyboard_listener(self, on_press=None, on_release=None):
+        raise NotImplementedError
+
+    def button(self, name):
+        """Backend button for 'left'/'right'/'middle' (or 'Button.left' etc), default left"""
+        raise NotImplementedError
+
+    def special_key(self, name):
+        """Backend key for a special key name like 'space' or 'f1', or None"""
+        raise NotImplementedError
+
+    def click_burst(self, mouse_controller, button, clicks, count=1):
+        """Emit clicks clicks (each of count presses) back to back.
+
+        Backends that can queue events and deliver them in one flush
+        override this; the default just loops over click().
+        """
+        click = mouse_controller.click
+        for _ in range(clicks):
+            click(button, count)
+
+    def paste_text(self, keyboard_controller, text, restore_clipboard=True):
+        """Put text on the clipboard and send the paste shortcut.
+
+        With restore_clipboard the clipboard's previous text is put back
+        CLIPBOARD_RESTORE_DELAY after the shortcut; pass False to leave
+        the pasted text on the clipboard. Returns False (without sending
+        anything) if no clipboard is available, so callers can fall back
+        to typing.
+        """
+        pyperclip = optional_import('pyperclip')
+        if pyperclip is None:
+            return False
+        try:
+            previous = pyperclip.paste() if restore_clipboard else None
+            pyperclip.copy(text)
+        except pyperclip.PyperclipException:
+            return False
+        modifier = self.special_key('cmd' if sys.platform == 'darwin' else 'ctrl')
+        self.key_batch(keyboard_controller, [(modifier, True), ('v', True),
+                                             ('v', False), (modifier, False)])
+        if previous is not None:
+            # The paste is read by the target application asynchronously
+            time.sleep(CLIPBOARD_RESTORE_DELAY)
+            try:
+                pyperclip.copy(previous)
+            except pyperclip.PyperclipException as e:
+                print(f"Could not restore the clipboard: {e}")
+        return True
+
+    def key_batch(self, keyboard_controller, events):
+        """Send a list of (key, pressed) events that are due together.
+
+        Backends that can deliver several key events in one flush override
+        this; the default presses and releases one by one.
+        """
+        for key, pressed in events:
+            if pressed:
+                keyboard_controller.press(key)
+            else:
+                keyboard_controller.release(key)
+
+
+def _button_name(name):
+    name = name.lower()
+    if name.startswith('button.'):
+        name = name[len('button.'):]
+    return name if name in ('left', 'right', 'middle') else 'left'
+
+
+class PynputBackend(InputBackend):
+    """Real input through pynput"""
+
+    name = 'pynput'
+
+    def __init__(self):
+        # Only check that pynput is installed; importing it waits until the
+        # first controller, listener, button or key is needed
+        self.available = is_installed('pynput')
+        self._mouse = None
+        self._keyboard = None
+
+    def _load(self):
+        """Import pynput's mouse and keyboard modules on first use"""
+        if self._mouse is None:
+            mouse = optional_import('pynput.mouse')
+            keyboard = optional_import('pynput.keyboard')
+            if mouse is None or keyboard is None:
+                self.available = False
+                raise RuntimeError("pynput is installed but could not be loaded on this platform")
+            self._mouse, self._keyboard = mouse, keyboard
+        return self._mouse, self._keyboard
+
+    def mouse_controller(self):
+        return self._load()[0].Controller()
+
+    def keyboard_controller(self):
+        return self._load()[1].Controller()
+
+    def mouse_listener(self, on_move=None, on_click=None, on_scroll=None):
+        return self._load()[0].Listener(on_move=on_move, on_click=on_click, on_scroll=on_scroll)
+
+    def keyboard_listener(self, on_press=None, on_release=None):
+        return self._load()[1].Listener(on_press=on_press, on_release=on_release)
+
+    def button(self, name):
+        return getattr(self._load()[0].Button, _button_name(name))
+
+    def special_key(self, name):
+        return getattr(self._load()[1].Key, name, None)
+
+    def click_burst(self, mouse_controller, button, clicks, count=1):
+        # pynput's Xorg controller syncs the display after every press and
+        # release; queue the whole burst through XTest and flush once instead
+        display = getattr(mouse_controller, '_display', None)
+        code = getattr(button, 'value', None)
+        xtest = optional_import('Xlib.ext.xtest') if display is not None else None
+        if xtest is None or not isinstance(code, int):
+            return super().click_burst(mouse_controller, button, clicks, count)
+        X = optional_import('Xlib.X')
+        for _ in range(clicks * count):
+            xtest.fake_input(display, X.ButtonPress, code)
+            xtest.fake_input(display, X.ButtonRelease, code)
+        display.flush()
+
+    def key_batch(self, keyboard_controller, events):
+        # Same idea as click_burst: one XTest flush for the whole batch. Keys
+        # without a direct keycode (e.g. characters needing a modifier) fall
+        # back to pynput, which knows how to synthesise them
+        display = getattr(keyboard_controller, '_display', None)
+        xtest = optional_import('Xlib.ext.xtest') if display is not None else None
+        if xtest is None:
+            return super().key_batch(keyboard_controller, events)
+        X = optional_import('Xlib.X')
+        codes = []
+        for key, pressed in events:
+            code = self._keycode(display, key)
+            if not code:
+                return super().key_batch(keyboard_controller, events)
+            codes.append((X.KeyPress if pressed else X.KeyRelease, code))
+        for event_type, code in codes:
+            xtest.fake_input(display, event_type, code)
+        display.flush()
+
+    def _keycode(self, display, key):
+        if isinstance(key, str):
+            if len(key) != 1 or not (key.isalnum() and key == key.lower()):
+                return 0
+            keysym = optional_import('Xlib.XK').string_to_keysym(key)
+        else:
+            keysym = getattr(getattr(key, 'value', key), 'vk', None)
+        return display.keysym_to_keycode(keysym) if keysym else 0
+
+
+class FakeKey:
+    """Special key emitted by FakeBackend; mimics pynput's Key members"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Key.{self.name}"
+
+    __str__ = __repr__
+
+    def __eq__(self, other):
+        return isinstance(other, FakeKey) and other.name == self.name
+
+    def __hash__(self):
+        return hash(('Key', self.name))
+
+
+class FakeMouseController:
+    """Mouse controller that only records what it is asked to do"""
+
+    def __init__(self, backend):
+        self._emit = backend.events.append
+        self._position = (0, 0)
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+        self._emit((clock_ns(), 'move', value))
+
+    def press(self, button):
+        self._emit((clock_ns(), 'mouse_press', button))
+
+    def release(self, button):
+        self._emit((clock_ns(), 'mouse_release', button))
+
+    def click(self, button, count=1):
+        self._emit((clock_ns(), 'click', (button, count)))
+
+    def scroll(self, dx, dy):
+        self._emit((clock_ns(), 'scroll', (dx, dy)))
+
+
+class FakeKeyboardController:
+    """Keyboard controller that only records what it is asked to do"""
+
+    def __init__(self, backend):
+        self._emit = backend.events.append
+
+    def press(self, key):
+        self._emit((clock_ns(), 'key_press', key))
+
+    def release(self, key):
+        self._emit((clock_ns(), 'key_release', key))
+
+    def type(self, text):
+        self._emit((clock_ns(), 'type', text))
+
+
+class SyntheticListener:
+    """Listener fed by FakeBackend.replay instead of OS hooks"""
+
+    def __init__(self, backend, kind, callbacks):
+        self.backend = backend
+        self.kind = kind
+        self.callbacks = callbacks
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.backend._listeners.append(self)
+
+    def stop(self):
+        self.running = False
+        try:
+            self.backend._listeners.remove(self)
+        except ValueError:
+            pass
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeBackend(InputBackend):
+    """In-process backend for headless runs and benchmarks.
+
+    Controllers append (clock_ns, kind, args) tuples to self.events
+    and never touch the OS. Listeners are SyntheticListeners that receive
+    event streams pushed through replay().
+    """
+
+    name = 'fake'
+    available = True
+
+    def __init__(self):
+        self.events = []
+        self._listeners = []
+
+    def mouse_controller(self):
+        return FakeMouseController(self)
+
+    def keyboard_controller(self):
+        return FakeKeyboardController(self)
+
+    def mouse_listener(self, on_move=None, on_click=None, on_scroll=None):
+        return SyntheticListener(self, 'mouse', {'move': on_move, 'click': on_click,
+                                                 'scroll': on_scroll})
+
+    def keyboard_listener(self, on_press=None, on_release=None):
+        return SyntheticListener(self, 'keyboard', {'press': on_press, 'release': on_release})
+
+    def button(self, name):
+        return f"Button.{_button_name(name)}"
+
+    def special_key(self, name):
+        return FakeKey(name)
+
+    def click_burst(self, mouse_controller, button, clicks, count=1):
+        # One flush: every click in the burst lands with the same timestamp
+        self.events.extend([(clock_ns(), 'click', (button, count))] * clicks)
+
+    def paste_text(self, keyboard_controller, text, restore_clipboard=True):
+        self.events.append((clock_ns(), 'paste', text))
+        return True
+
+    def key_batch(self, keyboard_controller, events):
+        now = clock_ns()
+        self.events.extend((now, 'key_press' if pressed else 'key_release', key)
+                           for key, pressed in events)
+
+    def clear(self):
+        """Forget all recorded output events"""
+        self.events.clear()
+
+    def dispatch(self, event):
+        """Deliver one input event to every running listener.
+
+        event is ('move', x, y), ('click', x, y, button, pressed),
+        ('scroll', x, y, dx, dy), ('press', key) or ('release', key).
+        """
+        kind, args = event[0], event[1:]
+        for listener in list(self._listeners):
+            callback = listener.callbacks.get(kind)
+            if callback and listener.running:
+                if callback(*args) is False:
+                    listener.stop()
+
+    def replay(self, events, rate=None, should_stop=None):
+        """Feed an event stream to the listeners, synchronously.
+
+        With rate (events/sec) events are paced on a deadline timeline;
+        without it they are delivered as fast as possible. Returns the
+        number of events delivered.
+        """
+        scheduler = None
+        if rate:
+            scheduler = DeadlineScheduler(1.0 / rate, POLICY_CATCH_UP)
+            scheduler.start()
+
+        delivered = 0
+        for event in events:
+            if scheduler:
+                if not scheduler.wait(should_stop):
+                    break
+                scheduler.advance()
+            elif should_stop and should_stop():
+                break
+            self.dispatch(event)
+            delivered += 1
+        return delivered
+
+    def replay_async(self, events, rate=None):
+        """Run replay() on a background thread and return the thread"""
+        thread = threading.Thread(target=self.replay, args=(events, rate))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+
+BACKENDS = {
+    'pynput': PynputBackend,
+    'fake': FakeBackend,
+}
+
+_default_backend = None
+
+
+def get_backend(name=None):
+    """Get a backend by name, or the process default.
+
+    The default is chosen by the AMS_INPUT_BACKEND environment variable
+    (pynput if unset) and shared by every module that doesn't get one
+    passed in explicitly.
+    """
+    global _default_backend
+    if name is not None:
+        return BACKENDS[name]()
+
+    if _default_backend is None:
+        _default_backend = BACKENDS[os.environ.get('AMS_INPUT_BACKEND', 'pynput')]()
+        if not _default_backend.available:
+            print("Warning: pynput not installed. Please install with: pip install pynput")
+    return _default_backend
+
+
+def set_backend(backend):
+    """Replace the process default backend"""
+    global _default_backend
+    _default_backend = backend
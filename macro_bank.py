@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Macro Bank Module
+Macros bound to global hotkeys, kept compiled in memory and ready to play
+"""
+
+import os
+import queue
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+from hotkey_service import normalize_key
+from event_buffer import NS_PER_SECOND
+from macro_format import file_hash, open_macro
+from playback_plan import compress_plan
+from scheduler import clock_ns, get_sleep_granularity_ns
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes of compiled plans kept in memory
+
+
+def plan_nbytes(plan):
+    """Approximate memory held by a compiled plan's offsets and steps"""
+    total = (sys.getsizeof(plan.offsets_ns) + sys.getsizeof(plan.steps) + sys.getsizeof(plan.labels))
+    for step in plan.steps:
+        args = step[1]
+        total += sys.getsizeof(step) + sys.getsizeof(args)
+        for arg in args:
+            if isinstance(arg, tuple):
+                total += sys.getsizeof(arg)
+    return total
+
+
+def drop_lead_in(plan):
+    """Shift a plan so its first step fires at offset 0.
+
+    The original duration shrinks by the same amount, so the dropped
+    lead-in is not reported as time saved by compression.
+    """
+    if plan.offsets_ns and plan.offsets_ns[0]:
+        first = plan.offsets_ns[0]
+        plan.offsets_ns = array('q', (offset - first for offset in plan.offsets_ns))
+        plan.duration_ns -= first
+        plan.original_duration_ns -= first
+    return plan
+
+
+class BankEntry:
+    """A compiled plan plus what is needed to tell whether its file changed"""
+
+    def __init__(self, plan, size, mtime_ns, digest):
+        self.plan = plan
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+        self.nbytes = plan_nbytes(plan)
+
+
+class MacroBank:
+    """Macro files bound to hotkeys and played through one MacroRecorder.
+
+    Binding a macro parses and compiles it straight away, so a hotkey press
+    only has to stat the file and start the playback thread. That work, and
+    any stopping or recompiling, runs on the bank's own trigger thread so
+    the shared hotkey listener is never held up. Compiled plans live in an
+    LRU cache capped at memory_budget bytes; evicted or changed macros are
+    recompiled on their next trigger. A file counts as changed
+    when its size or mtime differ and its content hash no longer matches.
+
+    Pressing the hotkey of the macro that is playing stops it; pressing
+    another bound hotkey switches to that macro.
+    """
+
+    def __init__(self, recorder, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.recorder = recorder
+        self.memory_budget = memory_budget
+        self.hotkey_service = recorder.hotkey_service
+        self._lock = threading.Lock()
+
+        # normalised hotkey -> binding dict
+        self._bindings = {}
+        # (file, speed, skip_lead_in, compression) -> BankEntry, least recently used first
+        self._plans = OrderedDict()
+        self.bytes_used = 0
+        self.active = None  # binding of the macro currently playing
+
+        # Hotkey presses waiting for the trigger thread, as (hotkey name, clock_ns)
+        self._triggers = queue.Queue()
+        self._trigger_thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        # Calibrate now rather than inside the first triggered playback
+        get_sleep_granularity_ns()
+
+    def bind(self, hotkey, filename, speed=1.0, repeat_times=1, skip_lead_in=True,
+             max_gap=None, collapse_moves=False, settle=None):
+        """Bind a macro file to a hotkey and preload it. Returns True on success.
+
+        With skip_lead_in the idle time before the macro's first event is
+        dropped, so playback starts as soon as the hotkey is pressed.
+        max_gap, collapse_moves and settle compress the plan as in
+        MacroRecorder.play_macro.
+        """
+        name = normalize_key(hotkey)
+        if name in self._bindings:
+            self.unbind(hotkey)
+
+        binding = {
+            'hotkey': hotkey,
+            'file': os.path.abspath(filename),
+            'speed': speed,
+            'repeat_times': repeat_times,
+            'skip_lead_in': skip_lead_in,
+            'compression': (max_gap, collapse_moves, settle),
+        }
+        try:
+            self.get_plan(binding)
+        except Exception as e:
+            print(f"Error loading macro {filename}: {e}")
+            return False
+
+        binding['handler'] = lambda: self.trigger(name)
+        self._bindings[name] = binding
+        self.hotkey_service.register(hotkey, binding['handler'])
+        print(f"Bound {os.path.basename(filename)} to {hotkey}")
+        return True
+
+    def unbind(self, hotkey):
+        """Remove a hotkey's macro. Its compiled plan stays cached until evicted"""
+        binding = self._bindings.pop(normalize_key(hotkey), None)
+        if binding is None:
+            return False
+        self.hotkey_service.unregister(binding['hotkey'], binding['handler'])
+        if self.active is binding:
+            self.active = None
+        return True
+
+    def unbind_all(self):
+        for binding in list(self._bindings.values()):
+            self.unbind(binding['hotkey'])
+
+    def bindings(self):
+        """Bound macros, as (hotkey, file, speed, repeat_times) dicts"""
+        return [{key: binding[key] for key in ('hotkey', 'file', 'speed', 'repeat_times')}
+                for binding in self._bindings.values()]
+
+    def get_plan(self, binding):
+        """Get the compiled plan for a binding, recompiling it if its file changed"""
+        filename = binding['file']
+        key = (filename, binding['speed'], binding['skip_lead_in'], binding['compression'])
+        stat = os.stat(filename)
+        with self._lock:
+            entry = self._plans.get(key)
+            if entry is not None:
+                if entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                    self._plans.move_to_end(key)
+                    self.hits += 1
+                    return entry.plan
+
+                digest = file_hash(filename)
+                if digest == entry.digest:
+                    # Touched or rewritten with identical content
+                    entry.size = stat.st_size
+                    entry.mtime_ns = stat.st_mtime_ns
+                    self._plans.move_to_end(key)
+                    self.hits += 1
+                    return entry.plan
+                self._drop(key)
+                self.invalidations += 1
+            else:
+                digest = file_hash(filename)
+
+            self.misses += 1
+            entry = BankEntry(self._compile(binding), stat.st_size, stat.st_mtime_ns, digest)
+            if entry.nbytes <= self.memory_budget:
+                self._plans[key] = entry
+                self.bytes_used += entry.nbytes
+                while self.bytes_used > self.memory_budget:
+                    self._drop(next(iter(self._plans)))
+                    self.evictions += 1
+            return entry.plan
+
+    def _compile(self, binding):
+        actions = open_macro(binding['file'])
+        try:
+            plan = self.recorder.compile_actions(actions, binding['speed'])
+        finally:
+            close = getattr(actions, 'close', None)
+            if close:
+                close()
+        # Before compressing, so compression only ever sees (and credits
+        # itself with) the macro's own gaps
+        if binding['skip_lead_in']:
+            drop_lead_in(plan)
+        max_gap, collapse_moves, settle = binding['compression']
+        if max_gap is not None or collapse_moves or settle is not None:
+            plan = compress_plan(plan, int(max_gap * NS_PER_SECOND) if max_gap is not None else None,
+                                 collapse_moves, int(settle * NS_PER_SECOND) if settle is not None else None)
+        return plan
+
+    def _drop(self, key):
+        entry = self._plans.pop(key)
+        self.bytes_used -= entry.nbytes
+
+    def trigger(self, hotkey):
+        """Queue a press of hotkey for the trigger thread; called from the hotkey listener"""
+        self._triggers.put((normalize_key(hotkey), clock_ns()))
+        if self._trigger_thread is None:
+            self._trigger_thread = threading.Thread(target=self._trigger_worker)
+            self._trigger_thread.daemon = True
+            self._trigger_thread.start()
+
+    def _trigger_worker(self):
+        """Trigger thread: play or stop the macros of queued hotkey presses"""
+        while True:
+            item = self._triggers.get()
+            try:
+                if item is None:
+                    break
+                self._handle_trigger(*item)
+            except Exception as e:
+                print(f"Macro bank error: {e}")
+            finally:
+                self._triggers.task_done()
+
+    def _handle_trigger(self, name, trigger_ns):
+        binding = self._bindings.get(name)
+        if binding is None:
+            return False
+
+        recorder = self.recorder
+        playing = recorder.playback_thread is not None and recorder.playback_thread.is_alive()
+        if playing:
+            same = self.active is binding
+            recorder.stop_playback()
+            recorder.playback_thread.join(1.0)
+            self.active = None
+            if same:
+                return False
+
+        try:
+            plan = self.get_plan(binding)
+        except Exception as e:
+            print(f"Error loading macro {binding['file']}: {e}")
+            return False
+        self.active = binding
+        return recorder.play_plan(plan, binding['repeat_times'], recorder.playback_hotkey, trigger_ns)
+
+    def wait(self):
+        """Block until every queued hotkey press has been handled"""
+        self._triggers.join()
+
+    def refresh(self):
+        """Recompile bound macros whose files changed, ahead of their next trigger"""
+        for binding in list(self._bindings.values()):
+            try:
+                self.get_plan(binding)
+            except Exception as e:
+                print(f"Error loading macro {binding['file']}: {e}")
+
+    def clear(self):
+        """Drop every compiled plan"""
+        with self._lock:
+            self._plans.clear()
+            self.bytes_used = 0
+
+    def get_stats(self):
+        """Get cache and trigger latency statistics"""
+        latency = self.recorder.trigger_latency_metric.snapshot()
+        return {
+            'bound': len(self._bindings),
+            'cached': len(self._plans),
+            'bytes_used': self.bytes_used,
+            'memory_budget': self.memory_budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'triggers': latency['count'],
+            'trigger_latency_p50_ms': latency['p50'] * 1000,
+            'trigger_latency_p99_ms': latency['p99'] * 1000,
+            'trigger_latency_max_ms': latency['max'] * 1000,
+        }
+
+    def cleanup(self):
+        """Unbind every hotkey, stop the trigger thread and release the cache"""
+        self.unbind_all()
+        if self._trigger_thread is not None:
+            self._triggers.put(None)
+            self._trigger_thread.join(2.0)
+            self._trigger_thread = None
+        self.clear()
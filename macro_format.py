@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Macro Format Module
+Compact binary macro files with memory-mapped, lazily decoded loading
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+
+from event_buffer import (EventBuffer, EVENT_TYPES, MOUSE_MOVE, MOUSE_CLICK, MOUSE_SCROLL,
+                          NS_PER_SECOND)
+
+MAGIC = b'AMSMACRO'
+LOG_MAGIC = b'AMSMLOG1'  # streaming record log, see macro_log.py
+VERSION = 2  # 1 stored microsecond timestamps, 2 stores nanoseconds
+BINARY_EXTENSION = '.amsm'
+DEFAULT_BLOCK_SIZE = 4096  # events per independently decodable block
+HASH_CHUNK = 1 << 20  # bytes read at a time by file_hash
+
+# File layout (all integers little-endian):
+#   header  - HEADER struct, fixed width
+#   blocks  - varint-encoded event records, one run per block
+#   symbols - symbol table: u32 count, then (u16 length, utf-8 bytes) per name
+#   index   - one INDEX_ENTRY struct per block, fixed width
+#
+# Within a block the timestamp (nanoseconds) and x/y are delta-encoded
+# against the previous event, starting from the base values stored in the
+# block's index entry, so any block can be decoded on its own.
+HEADER = struct.Struct('<8sHHIQQQd')  # magic, version, flags, block_size, event_count, symbol_offset, index_offset, created
+INDEX_ENTRY = struct.Struct('<QIqii')  # byte_offset, byte_length, base_timestamp_ns, base_x, base_y
+
+# Nanoseconds per stored time unit, by file version
+TIME_SCALES = {1: 1000, 2: 1}
+
+
+class MacroFormatError(Exception):
+    """Raised when a macro file is malformed or of an unsupported version"""
+
+
+def detect_format(filename):
+    """Detect a macro file's format from its magic bytes ('binary', 'log' or 'json')"""
+    with open(filename, 'rb') as f:
+        head = f.read(len(MAGIC))
+    if head == MAGIC:
+        return 'binary'
+    if head == LOG_MAGIC:
+        return 'log'
+    return 'json'
+
+
+# Varint / zigzag helpers
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_signed(out, value):
+    _write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_signed(data, pos):
+    value, pos = _read_varint(data, pos)
+    return ((value >> 1) ^ -(value & 1)), pos
+
+
+def encode_block(buffer, start, stop, out):
+    """Append events [start, stop) of an EventBuffer to out.
+
+    Returns the (base_timestamp, base_x, base_y) the deltas are relative to.
+    """
+    types = buffer.types
+    timestamps = buffer.timestamps
+    xs, ys = buffer.xs, buffer.ys
+    base = (timestamps[start], xs[start], ys[start]) if start < stop else (0, 0, 0)
+    last_t, last_x, last_y = base
+
+    for i in range(start, stop):
+        code = types[i]
+        out.append(code | (buffer.pressed[i] << 3))
+
+        t = timestamps[i]
+        _write_signed(out, t - last_t)
+        last_t = t
+
+        if code <= MOUSE_SCROLL:
+            x, y = xs[i], ys[i]
+            _write_signed(out, x - last_x)
+            _write_signed(out, y - last_y)
+            last_x, last_y = x, y
+            if code == MOUSE_SCROLL:
+                _write_signed(out, buffer.dxs[i])
+                _write_signed(out, buffer.dys[i])
+            elif code == MOUSE_CLICK:
+                _write_varint(out, buffer.symbols[i])
+        else:
+            _write_varint(out, buffer.symbols[i])
+
+    return base
+
+
+def decode_block(data, count, base, symbol_table, pos=0, time_scale=1):
+    """Decode count events from data starting at pos into action dicts.
+
+    time_scale converts stored time units to nanoseconds (see TIME_SCALES).
+    """
+    actions = []
+    last_t, last_x, last_y = base
+
+    for _ in range(count):
+        tag = data[pos]
+        pos += 1
+        code = tag & 0x07
+
+        delta, pos = _read_signed(data, pos)
+        last_t += delta
+        timestamp_ns = last_t * time_scale
+        timestamp = timestamp_ns / NS_PER_SECOND
+
+        if code <= MOUSE_SCROLL:
+            delta, pos = _read_signed(data, pos)
+            last_x += delta
+            delta, pos = _read_signed(data, pos)
+            last_y += delta
+            if code == MOUSE_MOVE:
+                actions.append({'type': 'mouse_move', 'timestamp': timestamp,
+                                'timestamp_ns': timestamp_ns,
+                                'x': last_x, 'y': last_y})
+            elif code == MOUSE_CLICK:
+                symbol, pos = _read_varint(data, pos)
+                actions.append({'type': 'mouse_click', 'timestamp': timestamp,
+                                'timestamp_ns': timestamp_ns,
+                                'x': last_x, 'y': last_y,
+                                'button': symbol_table[symbol],
+                                'pressed': bool(tag & 0x08)})
+            else:
+                dx, pos = _read_signed(data, pos)
+                dy, pos = _read_signed(data, pos)
+                actions.append({'type': 'mouse_scroll', 'timestamp': timestamp,
+                                'timestamp_ns': timestamp_ns,
+                                'x': last_x, 'y': last_y, 'dx': dx, 'dy': dy})
+        else:
+            symbol, pos = _read_varint(data, pos)
+            actions.append({'type': EVENT_TYPES[code], 'timestamp': timestamp,
+                            'timestamp_ns': timestamp_ns,
+                            'key': symbol_table[symbol]})
+
+    return actions
+
+
+def encode_symbols(symbol_table):
+    """Serialise a symbol table"""
+    out = bytearray(struct.pack('<I', len(symbol_table)))
+    for name in symbol_table:
+        raw = name.encode('utf-8')
+        out += struct.pack('<H', len(raw))
+        out += raw
+    return out
+
+
+def decode_symbols(data, pos=0):
+    """Deserialise a symbol table, returning (names, end position)"""
+    (count,) = struct.unpack_from('<I', data, pos)
+    pos += 4
+    names = []
+    for _ in range(count):
+        (length,) = struct.unpack_from('<H', data, pos)
+        pos += 2
+        names.append(bytes(data[pos:pos + length]).decode('utf-8'))
+        pos += length
+    return names, pos
+
+
+def _stream_blocks(actions, block_size, interner):
+    """Read an iterable of action dicts into block_size EventBuffers.
+
+    The blocks share interner's symbol table, which is complete once the
+    stream is exhausted. Only one block is held in memory at a time.
+    """
+    chunk = None
+    for action in actions:
+        if chunk is None:
+            chunk = EventBuffer()
+            chunk.symbol_table = interner.symbol_table
+            chunk.symbol_ids = interner.symbol_ids
+        chunk.append(action)
+        if len(chunk) == block_size:
+            yield chunk, 0, block_size
+            chunk = None
+    if chunk is not None:
+        yield chunk, 0, len(chunk)
+
+
+def write_binary(filename, actions, block_size=DEFAULT_BLOCK_SIZE, created=None):
+    """Write actions (EventBuffer or iterable of action dicts) as a binary macro file.
+
+    Iterables are consumed once and encoded block by block, so a generator
+    of any length is written in constant memory.
+    """
+    if isinstance(actions, EventBuffer):
+        blocks = ((actions, start, min(start + block_size, len(actions)))
+                  for start in range(0, len(actions), block_size))
+        symbol_table = actions.symbol_table
+    else:
+        interner = EventBuffer()
+        blocks = _stream_blocks(actions, block_size, interner)
+        symbol_table = interner.symbol_table
+    created = time.time() if created is None else created
+
+    tmp_name = filename + '.tmp'
+    with open(tmp_name, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        offset = HEADER.size
+
+        count = 0
+        index = bytearray()
+        for buffer, start, stop in blocks:
+            block = bytearray()
+            base = encode_block(buffer, start, stop, block)
+            f.write(block)
+            index += INDEX_ENTRY.pack(offset, len(block), *base)
+            offset += len(block)
+            count += stop - start
+
+        symbol_offset = offset
+        symbols = encode_symbols(symbol_table)
+        f.write(symbols)
+        index_offset = symbol_offset + len(symbols)
+        f.write(index)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, block_size, count,
+                            symbol_offset, index_offset, created))
+
+    os.replace(tmp_name, filename)
+
+
+class BlockMacroView:
+    """Read-only, list-like view over delta-encoded event blocks in a memory map.
+
+    Subclasses parse their file's framing and fill in the symbol table and
+    one (byte_offset, event_count, base) entry per block. Blocks are then
+    decoded on demand as the view is indexed or iterated.
+    """
+
+    CACHED_BLOCKS = 4
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.symbol_table = []
+        self.event_count = 0
+        self._blocks = []
+        self._starts = []  # index of each block's first event
+        self.time_scale = 1  # ns per stored time unit
+        self._cache = {}
+        self._map = None
+        self._file = open(filename, 'rb')
+        try:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                raise MacroFormatError(f"{filename}: file is empty")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.close()
+            raise
+
+    def _add_block(self, offset, count, base):
+        self._blocks.append((offset, count, base))
+        self._starts.append(self.event_count)
+        self.event_count += count
+
+    def _decode(self, block_no):
+        offset, count, base = self._blocks[block_no]
+        return decode_block(self._map, count, base, self.symbol_table, offset, self.time_scale)
+
+    def _block(self, block_no):
+        actions = self._cache.get(block_no)
+        if actions is None:
+            actions = self._decode(block_no)
+            if len(self._cache) >= self.CACHED_BLOCKS:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[block_no] = actions
+        return actions
+
+    def __len__(self):
+        return self.event_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.event_count))]
+        if index < 0:
+            index += self.event_count
+        if not 0 <= index < self.event_count:
+            raise IndexError("event index out of range")
+        block_no = bisect.bisect_right(self._starts, index) - 1
+        return self._block(block_no)[index - self._starts[block_no]]
+
+    def __iter__(self):
+        # Stream blocks without filling the cache
+        for block_no in range(len(self._blocks)):
+            yield from self._decode(block_no)
+
+    def to_buffer(self):
+        """Decode the whole file into an in-memory EventBuffer"""
+        return EventBuffer(self)
+
+    def close(self):
+        """Release the memory map and file handle"""
+        self._cache = {}
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class MappedMacro(BlockMacroView):
+    """Memory-mapped binary macro file.
+
+    Only the header, symbol table and block index are parsed when the file
+    is opened, so playback can start without decoding the whole file.
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise MacroFormatError(f"{filename}: file too short for a macro header")
+
+        (magic, version, _flags, self.block_size, event_count,
+         symbol_offset, index_offset, self.created_ts) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise MacroFormatError(f"{filename}: not a binary macro file")
+        if version not in TIME_SCALES:
+            self.close()
+            raise MacroFormatError(f"{filename}: unsupported macro format version {version}")
+        self.version = version
+        self.time_scale = TIME_SCALES[version]
+
+        self.symbol_table, _ = decode_symbols(self._map, symbol_offset)
+        block_count = (event_count + self.block_size - 1) // self.block_size
+        for block_no in range(block_count):
+            offset, _length, base_t, base_x, base_y = INDEX_ENTRY.unpack_from(
+                self._map, index_offset + block_no * INDEX_ENTRY.size)
+            count = min(self.block_size, event_count - block_no * self.block_size)
+            self._add_block(offset, count, (base_t, base_x, base_y))
+
+    @property
+    def created(self):
+        return datetime.fromtimestamp(self.created_ts).isoformat()
+
+
+def open_macro(filename):
+    """Open a macro file of any format as a sequence of actions.
+
+    Binary files and record logs are memory-mapped and decoded lazily;
+    JSON files are parsed into an EventBuffer.
+    """
+    file_format = detect_format(filename)
+    if file_format == 'binary':
+        return MappedMacro(filename)
+    if file_format == 'log':
+        # Streaming record log; stops at the first incomplete chunk.
+        # Imported here because macro_log builds on this module.
+        from macro_log import MacroLog
+        return MacroLog(filename)
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    return EventBuffer(data.get('recorded_actions', []))
+
+
+def file_hash(filename):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
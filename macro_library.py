@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Macro Library Module
+Directory of macro files with an incrementally updated SQLite metadata index
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from event_buffer import EVENT_TYPES, NS_PER_SECOND, action_timestamp_ns
+from macro_format import BINARY_EXTENSION, detect_format, file_hash, open_macro
+from macro_log import LOG_EXTENSION
+
+MACRO_EXTENSIONS = ('.json', BINARY_EXTENSION, LOG_EXTENSION)
+INDEX_FILENAME = '.macro_index.sqlite'
+DEFAULT_LIBRARY_DIR = os.environ.get(
+    'AMS_MACRO_LIBRARY', os.path.join(os.path.expanduser('~'), '.automation_suite', 'macros'))
+
+SCHEMA_VERSION = 2  # 2 added file_tags
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS macros (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    format TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT ',',
+    file_tags TEXT NOT NULL DEFAULT ',',
+    duration_ns INTEGER NOT NULL,
+    events INTEGER NOT NULL,
+    mouse_move INTEGER NOT NULL,
+    mouse_click INTEGER NOT NULL,
+    mouse_scroll INTEGER NOT NULL,
+    key_press INTEGER NOT NULL,
+    key_release INTEGER NOT NULL,
+    min_x INTEGER, min_y INTEGER, max_x INTEGER, max_y INTEGER,
+    hash TEXT NOT NULL,
+    created TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS macros_name ON macros (name);
+CREATE INDEX IF NOT EXISTS macros_hash ON macros (hash);
+"""
+
+def summarize_actions(actions):
+    """Duration, counts by event type and coordinate bounding box in one pass"""
+    counts = dict.fromkeys(EVENT_TYPES, 0)
+    min_x = min_y = max_x = max_y = None
+    duration_ns = 0
+    for action in actions:
+        counts[action['type']] += 1
+        duration_ns = action_timestamp_ns(action)
+        x = action.get('x')
+        if x is None:
+            continue
+        y = action['y']
+        if min_x is None:
+            min_x = max_x = x
+            min_y = max_y = y
+            continue
+        if x < min_x:
+            min_x = x
+        elif x > max_x:
+            max_x = x
+        if y < min_y:
+            min_y = y
+        elif y > max_y:
+            max_y = y
+    summary = {'duration_ns': duration_ns, 'events': sum(counts.values()),
+               'min_x': min_x, 'min_y': min_y, 'max_x': max_x, 'max_y': max_y}
+    summary.update(counts)
+    return summary
+
+
+def _tag_field(tags):
+    """Store tags as ',a,b,' so one LIKE '%,tag,%' matches a whole tag"""
+    cleaned = sorted({str(tag).strip().lower() for tag in tags if str(tag).strip()})
+    return ',' + ','.join(cleaned) + (',' if cleaned else '')
+
+
+def _tag_list(field):
+    return [tag for tag in field.split(',') if tag]
+
+
+def _like_escape(text):
+    """Escape LIKE wildcards so text matches literally, with ESCAPE '\\'"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class MacroLibrary:
+    """Macro files in one directory tree, indexed by metadata in SQLite.
+
+    refresh() only reads files whose size or mtime changed since they were
+    last indexed, and only re-parses them if their content hash changed,
+    so listing and searching a library of thousands of macros never opens
+    the macro files themselves.
+    """
+
+    def __init__(self, directory=DEFAULT_LIBRARY_DIR, index_path=None):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = index_path or os.path.join(self.directory, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.executescript(SCHEMA)
+            columns = {row['name'] for row in self._db.execute("PRAGMA table_info(macros)")}
+            if 'file_tags' not in columns:
+                # Version 1 index; tags read from files are told apart from here on
+                self._db.execute("ALTER TABLE macros ADD COLUMN file_tags TEXT NOT NULL DEFAULT ','")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.last_refresh = None
+
+    def _scan(self):
+        """Yield (relative path, stat) for every macro file under the library"""
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for filename in files:
+                if filename.lower().endswith(MACRO_EXTENSIONS):
+                    full = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(full)
+                    except OSError:
+                        # Removed or unreadable since the directory was listed
+                        continue
+                    yield os.path.relpath(full, self.directory), stat
+
+    def refresh(self):
+        """Bring the index up to date with the directory. Returns what changed"""
+        start = time.perf_counter()
+        stats = {'added': 0, 'updated': 0, 'touched': 0, 'removed': 0, 'unchanged': 0, 'errors': 0}
+        with self._lock:
+            known = {row['path']: row for row in
+                     self._db.execute("SELECT path, size, mtime_ns, hash, tags, file_tags FROM macros")}
+            seen = set()
+            with self._db:
+                for path, stat in self._scan():
+                    seen.add(path)
+                    row = known.get(path)
+                    if row is not None and row['size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns:
+                        stats['unchanged'] += 1
+                        continue
+
+                    full = os.path.join(self.directory, path)
+                    try:
+                        digest = file_hash(full)
+                        if row is not None and row['hash'] == digest:
+                            # Touched or copied over with identical content
+                            self._db.execute("UPDATE macros SET size = ?, mtime_ns = ? WHERE path = ?",
+                                             (stat.st_size, stat.st_mtime_ns, path))
+                            stats['touched'] += 1
+                            continue
+                        self._index_file(path, full, stat, digest, row)
+                    except Exception as e:
+                        print(f"Error indexing macro {path}: {e}")
+                        stats['errors'] += 1
+                        continue
+                    stats['updated' if row is not None else 'added'] += 1
+
+                for path in known.keys() - seen:
+                    self._db.execute("DELETE FROM macros WHERE path = ?", (path,))
+                    stats['removed'] += 1
+
+        stats['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        self.last_refresh = stats
+        return stats
+
+    def _index_file(self, path, full, stat, digest, row):
+        file_format = detect_format(full)
+        if file_format == 'json':
+            # Summarise the parsed dicts directly; JSON macros may also carry tags
+            with open(full, 'r') as f:
+                data = json.load(f)
+            summary = summarize_actions(data.get('recorded_actions', []))
+            created = data.get('created')
+            file_tags = data.get('tags', [])
+        else:
+            actions = open_macro(full)
+            try:
+                summary = summarize_actions(actions)
+            finally:
+                actions.close()
+            created = datetime.fromtimestamp(actions.created_ts).isoformat()
+            file_tags = []
+        if not created:
+            created = datetime.fromtimestamp(stat.st_mtime).isoformat()
+
+        # Tags from the file replace the ones it had when last indexed;
+        # tags added with set_tags are kept
+        user_tags = []
+        if row is not None:
+            old_file_tags = set(_tag_list(row['file_tags']))
+            user_tags = [tag for tag in _tag_list(row['tags']) if tag not in old_file_tags]
+        file_field = _tag_field(file_tags)
+        tags = _tag_field(user_tags + _tag_list(file_field))
+        name = os.path.splitext(os.path.basename(path))[0]
+        self._db.execute(
+            "INSERT OR REPLACE INTO macros (path, name, format, tags, file_tags, duration_ns, events, "
+            "mouse_move, mouse_click, mouse_scroll, key_press, key_release, "
+            "min_x, min_y, max_x, max_y, hash, created, size, mtime_ns) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, name, file_format, tags, file_field, summary['duration_ns'], summary['events'],
+             summary['mouse_move'], summary['mouse_click'], summary['mouse_scroll'],
+             summary['key_press'], summary['key_release'],
+             summary['min_x'], summary['min_y'], summary['max_x'], summary['max_y'],
+             digest, created, stat.st_size, stat.st_mtime_ns))
+
+    def _row(self, row):
+        entry = dict(row)
+        entry['tags'] = _tag_list(entry['tags'])
+        del entry['file_tags']
+        entry['duration'] = entry['duration_ns'] / NS_PER_SECOND
+        entry['file'] = os.path.join(self.directory, entry['path'])
+        return entry
+
+    def query(self, name=None, tag=None, min_duration=None, max_duration=None,
+              event_type=None, order_by='name', limit=None):
+        """Macros matching every given filter, from the index only.
+
+        name matches a substring of the macro name, tag a whole tag,
+        durations are in seconds and event_type keeps macros that contain
+        at least one event of that type.
+        """
+        if order_by not in ('name', 'duration_ns', 'events', 'created', 'mtime_ns'):
+            raise ValueError(f"Cannot order macros by {order_by}")
+        clauses = []
+        params = []
+        if name:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like_escape(name)}%")
+        if tag:
+            clauses.append("tags LIKE ? ESCAPE '\\'")
+            params.append(f"%,{_like_escape(tag.strip().lower())},%")
+        if min_duration is not None:
+            clauses.append("duration_ns >= ?")
+            params.append(int(min_duration * NS_PER_SECOND))
+        if max_duration is not None:
+            clauses.append("duration_ns <= ?")
+            params.append(int(max_duration * NS_PER_SECOND))
+        if event_type:
+            if event_type not in EVENT_TYPES:
+                raise ValueError(f"Unknown event type: {event_type}")
+            clauses.append(f"{event_type} > 0")
+
+        sql = "SELECT * FROM macros"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            return [self._row(row) for row in self._db.execute(sql, params)]
+
+    def list(self):
+        """Every indexed macro, by name"""
+        return self.query()
+
+    def get(self, name):
+        """Index entry for a macro by name or relative path, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM macros WHERE path = ? OR name = ? ORDER BY path LIMIT 1",
+                                   (name, name)).fetchone()
+        return self._row(row) if row else None
+
+    def resolve(self, name):
+        """Full path of a macro by name or relative path, or None"""
+        entry = self.get(name)
+        return entry['file'] if entry else None
+
+    def set_tags(self, name, tags):
+        """Replace a macro's tags. Returns False if there is no such macro"""
+        entry = self.get(name)
+        if entry is None:
+            return False
+        with self._lock, self._db:
+            self._db.execute("UPDATE macros SET tags = ? WHERE path = ?", (_tag_field(tags), entry['path']))
+        return True
+
+    def add(self, recorder, name, file_format='binary'):
+        """Save the recorder's current macro into the library and index it. Returns its path"""
+        extension = BINARY_EXTENSION if file_format == 'binary' else '.json'
+        filename = os.path.join(self.directory, name + extension)
+        if not recorder.save_macro(filename, file_format):
+            return None
+        self.refresh()
+        return filename
+
+    def close(self):
+        with self._lock:
+            self._db.close()
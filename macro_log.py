@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Macro Log Module
+Append-only on-disk event log for streaming (record-to-disk) recordings
+"""
+
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from event_buffer import EventBuffer, NS_PER_SECOND, action_timestamp_ns
+from macro_format import (BlockMacroView, LOG_MAGIC, MacroFormatError, TIME_SCALES,
+                          decode_symbols, encode_block, encode_symbols)
+
+LOG_VERSION = 2  # 1 stored microsecond timestamps, 2 stores nanoseconds
+LOG_EXTENSION = '.amslog'
+
+# File layout: LOG_HEADER, then any number of self-contained chunks, each a
+# CHUNK_HEADER followed by its payload. The payload holds the symbols first
+# seen in this chunk (same encoding as macro_format) and then the chunk's
+# delta/varint-encoded events. A chunk is only trusted if its payload is
+# complete and matches its CRC, so a crash mid-write loses at most the chunk
+# being written.
+LOG_HEADER = struct.Struct('<8sHHd')         # magic, version, flags, created
+CHUNK_HEADER = struct.Struct('<IIIqii')      # payload_length, event_count, crc32, base_timestamp, base_x, base_y
+
+# fsync policies
+FSYNC_ALWAYS = 'always'      # fsync after every chunk
+FSYNC_INTERVAL = 'interval'  # fsync at most once per fsync_interval seconds
+FSYNC_NEVER = 'never'        # leave durability to the OS
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER)
+
+
+class MacroLogWriter:
+    """Streams recorded events to an append-only log from a background thread.
+
+    Exposes the same append_* methods as EventBuffer, so the recorder
+    callbacks can write to it directly. Events collect in a small in-memory
+    chunk; full chunks (by event count or age) are handed to a writer thread
+    through a bounded queue, which caps memory use at roughly
+    (max_pending_chunks + 1) * chunk_events events. The writer thread also
+    seals a chunk that has aged past flush_interval while no events arrive,
+    so an idle recording still reaches disk.
+    """
+
+    def __init__(self, filename, chunk_events=4096, flush_interval=1.0,
+                 fsync_policy=FSYNC_INTERVAL, fsync_interval=1.0, max_pending_chunks=8):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+
+        self.filename = filename
+        self.chunk_events = chunk_events
+        self.flush_interval = flush_interval
+        self.flush_interval_ns = int(flush_interval * NS_PER_SECOND)
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+
+        # All chunks share one symbol table so ids are stable across the log
+        self._symbol_table = []
+        self._symbol_ids = {}
+        self._chunk = self._new_chunk()
+        self._chunk_start = None
+        self._chunk_opened = None  # time.monotonic() of the chunk's first event
+        self._sealed_events = 0
+        # Guards the open chunk between the appending thread and the writer's idle flush
+        self._chunk_lock = threading.Lock()
+
+        self.chunks_written = 0
+        self.events_written = 0
+        self.bytes_written = 0
+        self.error = None
+
+        self._file = open(filename, 'wb')
+        self._file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, 0, time.time()))
+        self._file.flush()
+        self._last_fsync = time.monotonic()
+
+        # Backpressure: if the disk stalls, callbacks block rather than grow memory
+        self._queue = queue.Queue(maxsize=max_pending_chunks)
+        self._thread = threading.Thread(target=self._writer_worker)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _new_chunk(self):
+        chunk = EventBuffer()
+        chunk.symbol_table = self._symbol_table
+        chunk.symbol_ids = self._symbol_ids
+        return chunk
+
+    def _after_append(self, timestamp):
+        if self._chunk_start is None:
+            self._chunk_start = timestamp
+            self._chunk_opened = time.monotonic()
+        if (len(self._chunk) >= self.chunk_events
+                or timestamp - self._chunk_start >= self.flush_interval_ns):
+            self._seal()
+
+    def _seal(self):
+        chunk = self._chunk
+        if not len(chunk):
+            return
+        self._chunk = self._new_chunk()
+        self._chunk_start = None
+        self._chunk_opened = None
+        self._sealed_events += len(chunk)
+        # Every symbol this chunk uses already exists at this point
+        self._queue.put((chunk, len(self._symbol_table)))
+
+    # EventBuffer-compatible appenders
+    def append_move(self, timestamp, x, y):
+        with self._chunk_lock:
+            self._chunk.append_move(timestamp, x, y)
+            self._after_append(timestamp)
+
+    def append_click(self, timestamp, x, y, button, pressed):
+        with self._chunk_lock:
+            self._chunk.append_click(timestamp, x, y, button, pressed)
+            self._after_append(timestamp)
+
+    def append_scroll(self, timestamp, x, y, dx, dy):
+        with self._chunk_lock:
+            self._chunk.append_scroll(timestamp, x, y, dx, dy)
+            self._after_append(timestamp)
+
+    def append_key(self, timestamp, key, pressed):
+        with self._chunk_lock:
+            self._chunk.append_key(timestamp, key, pressed)
+            self._after_append(timestamp)
+
+    def append(self, action):
+        with self._chunk_lock:
+            self._chunk.append(action)
+            self._after_append(action_timestamp_ns(action))
+
+    def __len__(self):
+        return self._sealed_events + len(self._chunk)
+
+    def _writer_worker(self):
+        """Writer thread: encode sealed chunks and append them to the log"""
+        symbols_written = 0
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._seal_idle_chunk()
+                continue
+            if item is None:
+                break
+            chunk, symbol_count = item
+            try:
+                payload = encode_symbols(self._symbol_table[symbols_written:symbol_count])
+                base = encode_block(chunk, 0, len(chunk), payload)
+                symbols_written = symbol_count
+
+                self._file.write(CHUNK_HEADER.pack(len(payload), len(chunk),
+                                                   zlib.crc32(payload), *base))
+                self._file.write(payload)
+                self._file.flush()
+                self._maybe_fsync()
+
+                self.chunks_written += 1
+                self.events_written += len(chunk)
+                self.bytes_written += CHUNK_HEADER.size + len(payload)
+            except Exception as e:
+                # Keep draining so producers never block on a dead writer
+                self.error = e
+                print(f"Error writing macro log: {e}")
+
+    def _seal_idle_chunk(self):
+        """Seal the open chunk once it is flush_interval old (writer thread, queue empty)"""
+        # Never wait for the lock: an appender holding it may be blocked on a
+        # full queue that only this thread drains
+        if not self._chunk_lock.acquire(blocking=False):
+            return
+        try:
+            opened = self._chunk_opened
+            if opened is not None and time.monotonic() - opened >= self.flush_interval:
+                # Only appenders put under this lock, so the queue is still empty
+                self._seal()
+        finally:
+            self._chunk_lock.release()
+
+    def _maybe_fsync(self):
+        if self.fsync_policy == FSYNC_NEVER:
+            return
+        now = time.monotonic()
+        if self.fsync_policy == FSYNC_ALWAYS or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def close(self):
+        """Flush the pending chunk, stop the writer thread and sync the file"""
+        if self._file is None:
+            return
+        with self._chunk_lock:
+            self._seal()
+        self._queue.put(None)
+        self._thread.join()
+        if self.fsync_policy != FSYNC_NEVER:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def get_stats(self):
+        """Get writer progress statistics"""
+        return {
+            'events_recorded': len(self),
+            'events_written': self.events_written,
+            'chunks_written': self.chunks_written,
+            'bytes_written': self.bytes_written,
+            'pending_chunks': self._queue.qsize(),
+            'fsync_policy': self.fsync_policy,
+            'error': str(self.error) if self.error else None
+        }
+
+
+class MacroLog(BlockMacroView):
+    """Memory-mapped, lazily decoded view over a streaming record log.
+
+    Chunks are validated when the log is opened. Reading stops at the first
+    truncated or corrupt chunk, so a log left behind by a crash opens as
+    everything that was durably written before it.
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        data = self._map
+        size = len(data)
+        if size < LOG_HEADER.size:
+            self.close()
+            raise MacroFormatError(f"{filename}: file too short for a macro log header")
+
+        magic, version, _flags, self.created_ts = LOG_HEADER.unpack_from(data, 0)
+        if magic != LOG_MAGIC:
+            self.close()
+            raise MacroFormatError(f"{filename}: not a macro log")
+        if version not in TIME_SCALES:
+            self.close()
+            raise MacroFormatError(f"{filename}: unsupported macro log version {version}")
+        self.version = version
+        self.time_scale = TIME_SCALES[version]
+
+        self.truncated = False
+        pos = LOG_HEADER.size
+        while pos < size:
+            if pos + CHUNK_HEADER.size > size:
+                self.truncated = True
+                break
+            length, count, crc, base_t, base_x, base_y = CHUNK_HEADER.unpack_from(data, pos)
+            payload_start = pos + CHUNK_HEADER.size
+            payload_end = payload_start + length
+            if payload_end > size or zlib.crc32(data[payload_start:payload_end]) != crc:
+                self.truncated = True
+                break
+
+            names, events_start = decode_symbols(data, payload_start)
+            self.symbol_table.extend(names)
+            self._add_block(events_start, count, (base_t, base_x, base_y))
+            pos = payload_end
+
+        # Size of the intact prefix of the file
+        self.valid_size = pos
+
+
+def recover_log(filename):
+    """Truncate a crashed log to its last intact chunk. Returns events recovered"""
+    log = MacroLog(filename)
+    try:
+        recovered = len(log)
+        truncated = log.truncated
+        valid_size = log.valid_size
+    finally:
+        log.close()
+
+    if truncated:
+        with open(filename, 'r+b') as f:
+            f.truncate(valid_size)
+            f.flush()
+            os.fsync(f.fileno())
+    return recovered
@@ -8,55 +8,133 @@ import threading
 import time
 import json
 from datetime import datetime
-try:
-    import pynput
-    from pynput import mouse, keyboard
-    from pynput.mouse import Button, Listener as MouseListener
-    from pynput.keyboard import Key, Listener as KeyboardListener
-except ImportError:
-    print("Warning: pynput not installed. Please install with: pip install pynput")
-    pynput = None
+from scheduler import clock_ns, get_sleep_granularity_ns, wait_until
+from event_buffer import EventBuffer, MOUSE_MOVE, MOUSE_CLICK, MOUSE_SCROLL, KEY_PRESS, NS_PER_SECOND
+from macro_format import BINARY_EXTENSION, BlockMacroView, open_macro, write_binary
+from macro_log import FSYNC_INTERVAL, MacroLog, MacroLogWriter, recover_log
+from path_simplify import MotionFilter, simplify_macro
+from playback_plan import PlanCache, compile_plan, compress_plan
+from input_backend import get_backend
+from hotkey_service import get_hotkey_service, normalize_key
+from ring_buffer import RingBuffer
+from macro_transform import apply_steps, write_macro
+from metrics import get_registry
+from status_bus import get_status_bus
 
 class MacroRecorder:
-    def __init__(self):
-        self.recorded_actions = []
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.recorded_actions = EventBuffer()
         self.is_recording = False
         self.is_playing = False
-        self.start_time = None
+        self.start_ns = None  # clock_ns() when recording started
         self.record_hotkey = 'F9'
         self.playback_hotkey = 'F10'
+        self.status_bus = get_status_bus()
+        
+        # Streaming record-to-disk writer (None when recording in memory)
+        self.log_writer = None
+        
+        # Record-time mouse path simplification (None when disabled)
+        self.motion_filter = None
+        self.simplify_stats = None
+        
+        # Listener callbacks only push raw events into the ring; the ingest
+        # thread normalises them into the recording
+        self.ingest_ring = None
+        self.ingest_thread = None
+        self.ingest_stop_flag = False
+        self.late_threshold = 0.1  # seconds from capture to normalisation
+        self.ingest_stats = self._new_ingest_stats()
         
         # Listeners
         self.mouse_listener = None
         self.keyboard_listener = None
-        self.hotkey_listener = None
+        self.hotkey_service = get_hotkey_service(self.backend)
+        self.registered_playback_hotkey = None
         
         # Threading
         self.record_thread = None
         self.playback_thread = None
         self.stop_playback_flag = False
         
-    def start_recording(self, record_hotkey='F9'):
-        """Start recording user actions"""
-        if not pynput:
-            print("Cannot start recording: pynput not available")
+        # Controllers are reused across playbacks so compiled plans stay bound to them
+        self.mouse_controller = None
+        self.keyboard_controller = None
+        self.plan_cache = PlanCache()
+        
+        # Playback timing stats (lateness of each action vs. its timeline deadline)
+        self.playback_stats = self._new_playback_stats()
+        
+        # Process-wide metrics
+        registry = get_registry()
+        self.recorded_metric = registry.counter(
+            'automation_events_recorded_total', 'Input events captured while recording')
+        self.dropped_metric = registry.counter(
+            'automation_events_dropped_total', 'Input events lost before they could be recorded')
+        self.ingest_lag_metric = registry.histogram(
+            'automation_ingest_lag_seconds', 'Capture to normalisation delay of recorded events')
+        self.played_metric = registry.counter(
+            'automation_actions_played_total', 'Macro actions executed by playback')
+        self.playback_lateness_metric = registry.histogram(
+            'automation_playback_lateness_seconds', 'Playback action fire time minus scheduled time')
+        self.time_saved_metric = registry.counter(
+            'automation_playback_seconds_saved_total', 'Wall-clock time saved by compressed playback')
+        self.trigger_latency_metric = registry.histogram(
+            'automation_macro_trigger_latency_seconds', 'Hotkey press to first event of a bound macro')
+        
+    def start_recording(self, record_hotkey='F9', stream_to=None, fsync_policy=FSYNC_INTERVAL,
+                        path_tolerance=0, min_move_distance=0, max_move_rate=0):
+        """Start recording user actions.
+        
+        With stream_to, events are appended in chunks to that log file by a
+        background writer instead of being kept in memory, so unbounded
+        recordings use bounded memory and survive a crash (see
+        recover_recording).
+        
+        path_tolerance (pixels, RDP), min_move_distance (pixels) and
+        max_move_rate (moves/sec) simplify mouse paths as they are recorded.
+        """
+        if not self.backend.available:
+            print(f"Cannot start recording: {self.backend.name} backend not available")
             return
             
         self.record_hotkey = record_hotkey
-        self.recorded_actions = []
+        if stream_to:
+            self.log_writer = MacroLogWriter(stream_to, fsync_policy=fsync_policy)
+            self._set_actions(self.log_writer)
+        else:
+            self._set_actions(EventBuffer())
+            
+        self.simplify_stats = None
+        if path_tolerance > 0 or min_move_distance > 0 or max_move_rate > 0:
+            self.motion_filter = MotionFilter(self.recorded_actions, path_tolerance,
+                                              min_move_distance, max_move_rate)
+        else:
+            self.motion_filter = None
+            
+        self.record_hotkey_name = normalize_key(record_hotkey)
+        self.ingest_ring = RingBuffer()
+        self.ingest_stats = self._new_ingest_stats()
+        self.ingest_stop_flag = False
+        self.ingest_thread = threading.Thread(target=self._ingest_worker)
+        self.ingest_thread.daemon = True
+        self.ingest_thread.start()
+        
         self.is_recording = True
-        self.start_time = time.time()
+        self.start_ns = clock_ns()
+        self.status_bus.publish('recorder', 'recording')
         
         print(f"Started recording. Press {record_hotkey} to stop.")
         
         # Start listeners
-        self.mouse_listener = MouseListener(
+        self.mouse_listener = self.backend.mouse_listener(
             on_move=self.on_mouse_move,
             on_click=self.on_mouse_click,
             on_scroll=self.on_mouse_scroll
         )
         
-        self.keyboard_listener = KeyboardListener(
+        self.keyboard_listener = self.backend.keyboard_listener(
             on_press=self.on_key_press,
             on_release=self.on_key_release
         )
@@ -73,88 +151,196 @@ class MacroRecorder:
         if self.keyboard_listener:
             self.keyboard_listener.stop()
             
+        # Let the ingest thread drain what the callbacks already queued
+        if self.ingest_thread:
+            self.ingest_stop_flag = True
+            if self.ingest_thread is not threading.current_thread():
+                self.ingest_thread.join()
+            self.ingest_thread = None
+            
+        self._flush_motion()
+        if self.motion_filter:
+            self.simplify_stats = self.motion_filter.get_stats()
+            self.motion_filter = None
+            print(f"Mouse path simplified {self.simplify_stats['compression_ratio']:.1f}x, "
+                  f"max error {self.simplify_stats['max_error_px']:.1f}px")
+            
+        if self.log_writer:
+            # Flush the tail of the log and switch to reading it back from disk
+            writer = self.log_writer
+            self.log_writer = None
+            writer.close()
+            self._set_actions(MacroLog(writer.filename))
+            
+        self.status_bus.publish('recorder', 'stopped', actions=len(self.recorded_actions))
         print(f"Recording stopped. Recorded {len(self.recorded_actions)} actions.")
         
     def on_mouse_move(self, x, y):
         """Record mouse movement"""
         if self.is_recording:
-            timestamp = time.time() - self.start_time
-            self.recorded_actions.append({
-                'type': 'mouse_move',
-                'timestamp': timestamp,
-                'x': x,
-                'y': y
-            })
+            self.ingest_ring.push((clock_ns(), MOUSE_MOVE, x, y))
             
     def on_mouse_click(self, x, y, button, pressed):
         """Record mouse clicks"""
         if self.is_recording:
-            timestamp = time.time() - self.start_time
-            self.recorded_actions.append({
-                'type': 'mouse_click',
-                'timestamp': timestamp,
-                'x': x,
-                'y': y,
-                'button': str(button),
-                'pressed': pressed
-            })
+            self.ingest_ring.push((clock_ns(), MOUSE_CLICK, x, y, button, pressed))
             
     def on_mouse_scroll(self, x, y, dx, dy):
         """Record mouse scroll"""
         if self.is_recording:
-            timestamp = time.time() - self.start_time
-            self.recorded_actions.append({
-                'type': 'mouse_scroll',
-                'timestamp': timestamp,
-                'x': x,
-                'y': y,
-                'dx': dx,
-                'dy': dy
-            })
+            self.ingest_ring.push((clock_ns(), MOUSE_SCROLL, x, y, dx, dy))
             
     def on_key_press(self, key):
         """Record key press"""
         if self.is_recording:
-            # Check for stop recording hotkey
-            try:
-                if hasattr(key, 'name') and key.name.upper() == self.record_hotkey.upper():
-                    self.stop_recording()
-                    return
-                elif str(key).replace("'", "").upper() == self.record_hotkey.upper():
-                    self.stop_recording()
-                    return
-            except:
-                pass
-                
-            timestamp = time.time() - self.start_time
-            key_str = str(key).replace("'", "")
-            self.recorded_actions.append({
-                'type': 'key_press',
-                'timestamp': timestamp,
-                'key': key_str
-            })
+            self.ingest_ring.push((clock_ns(), KEY_PRESS, key, True))
             
     def on_key_release(self, key):
         """Record key release"""
         if self.is_recording:
-            timestamp = time.time() - self.start_time
-            key_str = str(key).replace("'", "")
-            self.recorded_actions.append({
-                'type': 'key_release',
-                'timestamp': timestamp,
-                'key': key_str
-            })
-            
-    def play_macro(self, speed=1.0, repeat_times=1, playback_hotkey='F10'):
-        """Play back recorded macro"""
-        if not pynput:
-            print("Cannot play macro: pynput not available")
-            return
+            self.ingest_ring.push((clock_ns(), KEY_PRESS, key, False))
+            
+    def _new_ingest_stats(self):
+        """Create an empty ingestion stats record"""
+        return {
+            'received': 0,
+            'dropped': 0,
+            'late': 0,
+            'max_lag_ms': 0.0
+        }
+        
+    def get_ingest_stats(self):
+        """Get ingestion stats for the current (or last) recording"""
+        return dict(self.ingest_stats)
+        
+    def _ingest_worker(self):
+        """Ingest thread: normalise raw listener events into the recording"""
+        ring = self.ingest_ring
+        while True:
+            items = ring.pop_all(4096)
+            if items:
+                self._normalise(items)
+            elif self.ingest_stop_flag:
+                break
+            else:
+                time.sleep(0.001)
+                
+            stats = self.ingest_stats
+            self.recorded_metric.inc(ring.received - stats['received'])
+            self.dropped_metric.inc(ring.dropped - stats['dropped'])
+            stats['received'] = ring.received
+            stats['dropped'] = ring.dropped
+            
+    def _normalise(self, items):
+        """Convert a batch of raw events and append them to the recording"""
+        stats = self.ingest_stats
+        start_ns = self.start_ns
+        sink = self.recorded_actions
+        motion_filter = self.motion_filter
+        
+        now = clock_ns()
+        late_ns = int(self.late_threshold * NS_PER_SECOND)
+        oldest_lag = now - items[0][0]
+        self.ingest_lag_metric.observe(oldest_lag / 1e9)
+        if oldest_lag > stats['max_lag_ms'] * 1e6:
+            stats['max_lag_ms'] = oldest_lag / 1e6
+        if oldest_lag > late_ns:
+            stats['late'] += sum(1 for item in items if now - item[0] > late_ns)
+            
+        for item in items:
+            code = item[1]
+            timestamp = item[0] - start_ns
+            
+            if code == MOUSE_MOVE:
+                if motion_filter:
+                    motion_filter.add(timestamp, item[2], item[3])
+                else:
+                    sink.append_move(timestamp, item[2], item[3])
+                continue
+                
+            self._flush_motion()
+            if code == MOUSE_CLICK:
+                sink.append_click(timestamp, item[2], item[3], str(item[4]), item[5])
+            elif code == MOUSE_SCROLL:
+                sink.append_scroll(timestamp, item[2], item[3], item[4], item[5])
+            else:
+                key, pressed = item[2], item[3]
+                # The stop-recording hotkey itself is not recorded
+                if pressed and normalize_key(key) == self.record_hotkey_name:
+                    self._stop_from_hotkey()
+                    return
+                sink.append_key(timestamp, str(key).replace("'", ""), pressed)
+                
+    def _stop_from_hotkey(self):
+        """Stop recording after the record hotkey, discarding anything queued after it"""
+        self.is_recording = False
+        self.ingest_stop_flag = True
+        self.ingest_ring.pop_all()
+        # stop_recording joins this thread, so it has to run elsewhere
+        stopper = threading.Thread(target=self.stop_recording)
+        stopper.daemon = True
+        stopper.start()
+        
+    def _flush_motion(self):
+        """Write buffered mouse moves ahead of a non-move event"""
+        if self.motion_filter:
+            self.motion_filter.flush()
+            
+    def simplify_recording(self, tolerance=1.0, min_distance=0, max_rate=0):
+        """Simplify the mouse paths of the current macro in place. Returns stats"""
+        simplified, stats = simplify_macro(self.recorded_actions, tolerance, min_distance, max_rate)
+        self._set_actions(simplified)
+        print(f"Simplified {stats['moves_in']} mouse moves to {stats['moves_out']} "
+              f"({stats['compression_ratio']:.1f}x), max error {stats['max_error_px']:.1f}px")
+        return stats
+            
+    def play_macro(self, speed=1.0, repeat_times=1, playback_hotkey='F10',
+                   max_gap=None, collapse_moves=False, settle=None):
+        """Play back recorded macro. Returns True if playback started.
+        
+        max_gap (seconds) caps idle gaps, collapse_moves plays each run of
+        mouse moves as its final position and settle (seconds) plays as fast
+        as possible, keeping only that much time around clicks and keys.
+        See compress_plan.
+        """
+        if not self.backend.available:
+            print(f"Cannot play macro: {self.backend.name} backend not available")
+            return False
             
         if not self.recorded_actions:
             print("No macro recorded to play")
-            return
+            return False
             
+        compression = None
+        if max_gap is not None or collapse_moves or settle is not None:
+            compression = {
+                'max_gap_ns': int(max_gap * NS_PER_SECOND) if max_gap is not None else None,
+                'collapse_moves': collapse_moves,
+                'settle_ns': int(settle * NS_PER_SECOND) if settle is not None else None,
+            }
+        self._start_playback(speed, repeat_times, playback_hotkey, compression=compression)
+        return True
+        
+    def play_plan(self, plan, repeat_times=1, playback_hotkey='F10', trigger_ns=None):
+        """Play an already compiled plan (see compile_actions). Returns True if playback started.
+        
+        trigger_ns is the clock_ns() of the hotkey press that asked for the
+        playback; the timeline is anchored there and the delay to the first
+        injected event is recorded as trigger latency.
+        """
+        if not self.backend.available:
+            print(f"Cannot play macro: {self.backend.name} backend not available")
+            return False
+            
+        if not len(plan):
+            print("No macro recorded to play")
+            return False
+            
+        self._start_playback(plan.speed, repeat_times, playback_hotkey, plan=plan, trigger_ns=trigger_ns)
+        return True
+        
+    def _start_playback(self, speed, repeat_times, playback_hotkey, plan=None, trigger_ns=None,
+                        compression=None):
         self.playback_hotkey = playback_hotkey
         self.stop_playback_flag = False
         
@@ -164,63 +350,190 @@ class MacroRecorder:
         # Start playback in separate thread
         self.playback_thread = threading.Thread(
             target=self._playback_worker,
-            args=(speed, repeat_times)
+            args=(speed, repeat_times, plan, trigger_ns, compression)
         )
         self.playback_thread.daemon = True
         self.playback_thread.start()
         
     def setup_playback_hotkey_listener(self):
-        """Setup hotkey listener for stopping playback"""
-        def on_hotkey_press(key):
-            try:
-                if hasattr(key, 'name') and key.name.upper() == self.playback_hotkey.upper():
-                    self.stop_playback()
-                elif str(key).replace("'", "").upper() == self.playback_hotkey.upper():
-                    self.stop_playback()
-            except:
-                pass
-                
-        self.hotkey_listener = KeyboardListener(on_press=on_hotkey_press)
-        self.hotkey_listener.start()
+        """Register the playback hotkey (stops playback) with the shared hotkey service"""
+        if self.registered_playback_hotkey is None:
+            self.hotkey_service.register(self.playback_hotkey, self.stop_playback)
+        elif self.registered_playback_hotkey != self.playback_hotkey:
+            self.hotkey_service.rebind(self.registered_playback_hotkey, self.playback_hotkey,
+                                       self.stop_playback)
+        self.registered_playback_hotkey = self.playback_hotkey
+        
+    def _release_playback_hotkey(self):
+        """Unregister the playback hotkey once playback is over"""
+        if self.registered_playback_hotkey is not None:
+            self.hotkey_service.unregister(self.registered_playback_hotkey, self.stop_playback)
+            self.registered_playback_hotkey = None
         
-    def _playback_worker(self, speed, repeat_times):
+    def _playback_worker(self, speed, repeat_times, plan=None, trigger_ns=None, compression=None):
         """Worker thread for macro playback"""
-        if not pynput:
+        self.playback_stats = stats = self._new_playback_stats()
+        if not self.backend.available:
+            stats['error'] = f"{self.backend.name} backend not available"
             return
             
-        mouse_controller = mouse.Controller()
-        keyboard_controller = keyboard.Controller()
-        
         self.is_playing = True
         
+        spin_threshold_ns = get_sleep_granularity_ns() * 2 + 100_000
+        should_stop = lambda: self.stop_playback_flag
+        
         try:
+            # Resolve buttons, keys and controller methods once, not per action
+            if plan is None:
+                plan = self.compile_playback(speed)
+            if compression:
+                plan = compress_plan(plan, **compression)
+            cycle_ns = plan.duration_ns
+            saved_per_cycle = (plan.original_duration_ns - cycle_ns) / NS_PER_SECOND
+            stats['cycle_s'] = cycle_ns / NS_PER_SECOND
+            stats['original_cycle_s'] = plan.original_duration_ns / NS_PER_SECOND
+            schedule = list(zip(plan.offsets_ns, plan.steps, plan.labels))
+            stats['actions_per_cycle'] = len(schedule)
+            stats['repeat_times'] = repeat_times
+            self.status_bus.publish('playback', 'playing')
+            
+            # Every action fires at anchor + timestamp / speed on one monotonic
+            # timeline, so execution cost and sleep overshoot never accumulate
+            anchor_ns = trigger_ns or clock_ns()
+            cycle_offset_ns = 0
+            
             current_repeat = 0
             while (repeat_times == 0 or current_repeat < repeat_times) and not self.stop_playback_flag:
-                last_timestamp = 0
+                cycle_anchor_ns = anchor_ns + cycle_offset_ns
                 
-                for action in self.recorded_actions:
+                for offset_ns, (step, args), label in schedule:
+                    deadline_ns = cycle_anchor_ns + offset_ns
+                    if not wait_until(deadline_ns, spin_threshold_ns, should_stop):
+                        break
                     if self.stop_playback_flag:
                         break
                         
-                    # Calculate delay
-                    delay = (action['timestamp'] - last_timestamp) / speed
-                    if delay > 0:
-                        time.sleep(delay)
+                    self._record_lateness(stats, clock_ns() - deadline_ns, spin_threshold_ns)
                         
                     # Execute action
-                    self._execute_action(action, mouse_controller, keyboard_controller)
-                    last_timestamp = action['timestamp']
+                    try:
+                        step(*args)
+                    except Exception as e:
+                        print(f"Error executing action {label}: {e}")
+                        
+                    if trigger_ns:
+                        # Hotkey press to first injected event, not counting the macro's own lead-in
+                        latency_ns = clock_ns() - deadline_ns
+                        stats['trigger_latency_ms'] = latency_ns / 1e6
+                        self.trigger_latency_metric.observe(latency_ns / 1e9)
+                        trigger_ns = None
+                else:
+                    # Only a cycle that ran to its last step counts as a repeat
+                    stats['repeats_completed'] += 1
+                    if saved_per_cycle:
+                        stats['time_saved_s'] += saved_per_cycle
+                        self.time_saved_metric.inc(saved_per_cycle)
                     
+                # Next repeat continues the same timeline
+                cycle_offset_ns += cycle_ns
                 if repeat_times > 0:
                     current_repeat += 1
                     
         except Exception as e:
             print(f"Error during playback: {e}")
+            stats['error'] = str(e)
         finally:
             self.is_playing = False
-            if self.hotkey_listener:
-                self.hotkey_listener.stop()
+            self._release_playback_hotkey()
+            self.status_bus.publish('playback', 'stopped', actions=stats['actions_played'],
+                                    time_saved=stats['time_saved_s'])
                 
+    def _get_controllers(self):
+        """Get the playback controllers, creating them on first use"""
+        if self.mouse_controller is None:
+            self.mouse_controller = self.backend.mouse_controller()
+            self.keyboard_controller = self.backend.keyboard_controller()
+        return self.mouse_controller, self.keyboard_controller
+        
+    def _resolve_button(self, button_str):
+        """Map a recorded button name to a backend button"""
+        return self.backend.button(button_str)
+        
+    def compile_actions(self, actions, speed=1.0):
+        """Compile any sequence of actions into a plan bound to this recorder's controllers"""
+        mouse_controller, keyboard_controller = self._get_controllers()
+        return compile_plan(actions, speed, mouse_controller, keyboard_controller,
+                            self._resolve_button, self._parse_key)
+        
+    def compile_playback(self, speed=1.0):
+        """Get the compiled playback plan for the current macro (cached per macro and speed)"""
+        return self.plan_cache.get(self.recorded_actions, speed, self.compile_actions)
+        
+    def _new_playback_stats(self):
+        """Create an empty playback timing stats record"""
+        return {
+            'actions_played': 0,
+            'repeats_completed': 0,
+            'late_actions': 0,
+            'max_lateness_ms': 0.0,
+            'mean_lateness_ms': 0.0,
+            'last_lateness_ms': 0.0,
+            'actions_per_cycle': 0,
+            'repeat_times': 1,
+            'trigger_latency_ms': None,
+            'cycle_s': 0.0,
+            'original_cycle_s': 0.0,
+            'time_saved_s': 0.0,
+            'error': None  # why the playback failed, if it did
+        }
+        
+    def _record_lateness(self, stats, lateness_ns, late_threshold_ns):
+        """Fold one action's lateness into the playback stats"""
+        lateness_ms = lateness_ns / 1e6
+        count = stats['actions_played'] + 1
+        stats['actions_played'] = count
+        stats['mean_lateness_ms'] += (lateness_ms - stats['mean_lateness_ms']) / count
+        stats['last_lateness_ms'] = lateness_ms
+        if lateness_ms > stats['max_lateness_ms']:
+            stats['max_lateness_ms'] = lateness_ms
+        if lateness_ns > late_threshold_ns:
+            stats['late_actions'] += 1
+        self.played_metric.inc()
+        self.playback_lateness_metric.observe(lateness_ns / 1e9)
+            
+    def get_playback_stats(self):
+        """Get timing stats for the current (or last) playback"""
+        return dict(self.playback_stats)
+        
+    def get_playback_progress(self):
+        """Fraction of the current (or last) playback done; of the current cycle when unlimited"""
+        stats = self.playback_stats
+        per_cycle = stats['actions_per_cycle']
+        if not per_cycle:
+            return 0.0
+        if stats['repeat_times'] == 0:
+            return (stats['actions_played'] % per_cycle) / per_cycle
+        return min(1.0, stats['actions_played'] / (per_cycle * stats['repeat_times']))
+        
+    def get_status(self):
+        """Get current status information"""
+        return {
+            'is_recording': self.is_recording,
+            'is_playing': self.is_playing,
+            'record_hotkey': self.record_hotkey,
+            'playback_hotkey': self.playback_hotkey,
+            'recorded_actions': len(self.recorded_actions),
+            'recording_seconds': (clock_ns() - self.start_ns) / NS_PER_SECOND
+                                 if self.is_recording and self.start_ns else 0.0,
+            'streaming': self.log_writer is not None,
+            'ingest': self.get_ingest_stats(),
+            'playback': self.get_playback_stats(),
+            'playback_progress': self.get_playback_progress(),
+            'total_events_recorded': self.recorded_metric.value,
+            'total_events_dropped': self.dropped_metric.value,
+            'total_actions_played': self.played_metric.value
+        }
+        
     def _execute_action(self, action, mouse_controller, keyboard_controller):
         """Execute a single recorded action"""
         try:
@@ -228,13 +541,7 @@ class MacroRecorder:
                 mouse_controller.position = (action['x'], action['y'])
                 
             elif action['type'] == 'mouse_click':
-                button_map = {
-                    'Button.left': Button.left,
-                    'Button.right': Button.right,
-                    'Button.middle': Button.middle
-                }
-                
-                button = button_map.get(action['button'], Button.left)
+                button = self._resolve_button(action['button'])
                 
                 if action['pressed']:
                     mouse_controller.press(button)
@@ -258,12 +565,12 @@ class MacroRecorder:
             print(f"Error executing action {action['type']}: {e}")
             
     def _parse_key(self, key_str):
-        """Parse key string to pynput key object"""
+        """Parse key string to a backend key object"""
         try:
             # Handle special keys
             if key_str.startswith('Key.'):
                 key_name = key_str.replace('Key.', '')
-                return getattr(Key, key_name, None)
+                return self.backend.special_key(key_name)
             else:
                 # Regular character key
                 return key_str
@@ -274,33 +581,86 @@ class MacroRecorder:
         """Stop macro playback"""
         self.stop_playback_flag = True
         self.is_playing = False
-        
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
+        self._release_playback_hotkey()
             
         print("Macro playback stopped")
         
-    def save_macro(self, filename):
-        """Save recorded macro to file"""
+    def _set_actions(self, actions):
+        """Replace the current macro, releasing any memory-mapped file"""
+        previous = self.recorded_actions
+        self.recorded_actions = actions
+        if isinstance(previous, BlockMacroView) and previous is not actions:
+            previous.close()
+            
+    def save_macro(self, filename, file_format=None):
+        """Save recorded macro to file.
+        
+        file_format is 'json' or 'binary'; by default it is chosen from the
+        file extension (binary for .amsm, JSON otherwise).
+        """
+        if file_format is None:
+            file_format = 'binary' if filename.lower().endswith(BINARY_EXTENSION) else 'json'
+            
         try:
-            with open(filename, 'w') as f:
-                json.dump({
-                    'recorded_actions': self.recorded_actions,
-                    'created': datetime.now().isoformat()
-                }, f, indent=2)
+            if file_format == 'binary':
+                actions = self.recorded_actions
+                if isinstance(actions, BlockMacroView):
+                    # Don't replace the file we're reading from while it's mapped
+                    actions = actions.to_buffer()
+                write_binary(filename, actions)
+            else:
+                with open(filename, 'w') as f:
+                    json.dump({
+                        'recorded_actions': list(self.recorded_actions),
+                        'created': datetime.now().isoformat()
+                    }, f, indent=2)
             print(f"Macro saved to {filename}")
+            return True
         except Exception as e:
             print(f"Error saving macro: {e}")
+            return False
             
     def load_macro(self, filename):
-        """Load macro from file"""
+        """Load macro from file (format detected from its magic bytes). Returns True on success"""
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                self.recorded_actions = data.get('recorded_actions', [])
+            # Binary files and logs are memory-mapped and decoded lazily during playback
+            self._set_actions(open_macro(filename))
             print(f"Macro loaded from {filename}")
+            return True
         except Exception as e:
             print(f"Error loading macro: {e}")
+            return False
+            
+    def transform_macro(self, steps, filename=None):
+        """Run the current macro through transform steps (see macro_transform). Returns True on success.
+        
+        steps are callables taking and returning an action stream, e.g.
+        lambda actions: trim(actions, 1.0, 5.0). With filename the result is
+        streamed to that file and loaded back from it, so macros larger than
+        memory can be edited; otherwise it replaces the macro in memory.
+        """
+        try:
+            stream = apply_steps(iter(self.recorded_actions), steps)
+            if filename:
+                count = write_macro(filename, stream)
+                print(f"Transformed macro written to {filename} ({count} actions)")
+                return self.load_macro(filename)
+            self._set_actions(EventBuffer(stream))
+            print(f"Transformed macro: {len(self.recorded_actions)} actions")
+            return True
+        except Exception as e:
+            print(f"Error transforming macro: {e}")
+            return False
+            
+    def recover_recording(self, filename):
+        """Repair a streaming log left by a crash and load what was saved. Returns True on success"""
+        try:
+            recovered = recover_log(filename)
+            print(f"Recovered {recovered} actions from {filename}")
+        except Exception as e:
+            print(f"Error recovering recording: {e}")
+            return False
+        return self.load_macro(filename)
             
     def cleanup(self):
         """Cleanup resources"""
@@ -311,5 +671,7 @@ class MacroRecorder:
             self.mouse_listener.stop()
         if self.keyboard_listener:
             self.keyboard_listener.stop()
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
\ No newline at end of file
+        self._release_playback_hotkey()
+            
+        if isinstance(self.recorded_actions, BlockMacroView):
+            self.recorded_actions.close()
\ No newline at end of file
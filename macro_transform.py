@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Macro Transform Module
+Streaming edits of macro event streams: trim, splice, retime, merge, filter and offset
+"""
+
+import heapq
+import json
+import os
+from datetime import datetime
+
+from event_buffer import EVENT_TYPES, NS_PER_SECOND, action_timestamp_ns, seconds_to_ns
+from macro_format import BINARY_EXTENSION, open_macro, write_binary
+from macro_log import FSYNC_NEVER, LOG_EXTENSION, MacroLogWriter
+
+# Every transform takes an iterable of action dicts in timestamp order (as
+# recorded) and returns a generator, so transforms chain into a pipeline
+# that holds only a few events in memory whatever the macro's length.
+# Times are in seconds, like the 'timestamp' of an action.
+
+
+def retimed(action, timestamp_ns):
+    """Copy of an action moved to timestamp_ns"""
+    moved = dict(action)
+    moved['timestamp_ns'] = timestamp_ns
+    moved['timestamp'] = timestamp_ns / NS_PER_SECOND
+    return moved
+
+
+def trim(actions, start=None, end=None, rebase=True, release_held=True):
+    """Events from start (inclusive) to end (exclusive).
+
+    With rebase the result starts at time 0. With release_held, keys and
+    buttons pressed inside the range but released after it get a release
+    at the last kept event, so the trimmed macro never leaves them down.
+    """
+    start_ns = seconds_to_ns(start) if start is not None else 0
+    end_ns = seconds_to_ns(end) if end is not None else None
+    shift_ns = start_ns if rebase else 0
+    held = {}
+    last_ns = start_ns
+
+    for action in actions:
+        timestamp_ns = action_timestamp_ns(action)
+        if end_ns is not None and timestamp_ns >= end_ns:
+            break
+        if timestamp_ns < start_ns:
+            continue
+        last_ns = timestamp_ns
+
+        action_type = action['type']
+        if action_type == 'mouse_click':
+            if action['pressed']:
+                held[('button', action['button'])] = action
+            else:
+                held.pop(('button', action['button']), None)
+        elif action_type == 'key_press':
+            held[('key', action['key'])] = action
+        elif action_type == 'key_release':
+            held.pop(('key', action['key']), None)
+        yield retimed(action, timestamp_ns - shift_ns)
+
+    if release_held:
+        for press in held.values():
+            if press['type'] == 'mouse_click':
+                release = {'type': 'mouse_click', 'x': press['x'], 'y': press['y'],
+                           'button': press['button'], 'pressed': False}
+            else:
+                release = {'type': 'key_release', 'key': press['key']}
+            yield retimed(release, last_ns - shift_ns)
+
+
+def shift(actions, seconds):
+    """Move every event later (or earlier, for negative seconds)"""
+    shift_ns = seconds_to_ns(seconds)
+    for action in actions:
+        yield retimed(action, action_timestamp_ns(action) + shift_ns)
+
+
+def concat(*streams, gap=0.0):
+    """Play streams one after another, gap seconds apart"""
+    gap_ns = seconds_to_ns(gap)
+    offset_ns = 0
+    for stream in streams:
+        end_ns = offset_ns
+        for action in stream:
+            end_ns = action_timestamp_ns(action) + offset_ns
+            yield retimed(action, end_ns)
+        offset_ns = end_ns + gap_ns
+
+
+def splice(actions, insert, at, gap=0.0):
+    """Insert a stream at time at, pushing the rest of actions back by its length plus gap"""
+    at_ns = seconds_to_ns(at)
+    gap_ns = seconds_to_ns(gap)
+    shift_ns = None
+    for action in actions:
+        timestamp_ns = action_timestamp_ns(action)
+        if shift_ns is None and timestamp_ns >= at_ns:
+            end_ns = at_ns
+            for inserted in insert:
+                end_ns = at_ns + action_timestamp_ns(inserted)
+                yield retimed(inserted, end_ns)
+            shift_ns = end_ns - at_ns + gap_ns
+        if shift_ns:
+            action = retimed(action, timestamp_ns + shift_ns)
+        yield action
+
+    if shift_ns is None:
+        # at is past the end of actions
+        for inserted in insert:
+            yield retimed(inserted, at_ns + action_timestamp_ns(inserted))
+
+
+def retime(actions, segments):
+    """Scale time inside segments, given as (start, end, scale) tuples.
+
+    scale multiplies the length of its segment (0.5 plays it twice as fast,
+    2 half as fast); events after a segment move by the time it gained or
+    lost. Segments must not overlap.
+    """
+    bounds = sorted((seconds_to_ns(start), seconds_to_ns(end), scale) for start, end, scale in segments)
+    previous_end = None
+    for start_ns, end_ns, scale in bounds:
+        if scale <= 0 or end_ns <= start_ns:
+            raise ValueError("Retime segments need end > start and a positive scale")
+        if previous_end is not None and start_ns < previous_end:
+            raise ValueError("Retime segments overlap")
+        previous_end = end_ns
+
+    extra_ns = 0
+    segment = 0
+    for action in actions:
+        timestamp_ns = action_timestamp_ns(action)
+        while segment < len(bounds) and timestamp_ns >= bounds[segment][1]:
+            start_ns, end_ns, scale = bounds[segment]
+            extra_ns += int((end_ns - start_ns) * (scale - 1))
+            segment += 1
+        new_ns = timestamp_ns + extra_ns
+        if segment < len(bounds) and timestamp_ns > bounds[segment][0]:
+            start_ns, _, scale = bounds[segment]
+            new_ns += int((timestamp_ns - start_ns) * (scale - 1))
+        yield retimed(action, new_ns)
+
+
+def merge(*streams):
+    """Interleave streams by timestamp; ties keep the order streams are given in"""
+    return heapq.merge(*streams, key=action_timestamp_ns)
+
+
+def filter_types(actions, types, keep=True):
+    """Keep (or with keep=False, drop) events of the given types"""
+    types = set(types)
+    unknown = types - set(EVENT_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown event type: {', '.join(sorted(unknown))}")
+    for action in actions:
+        if (action['type'] in types) == keep:
+            yield action
+
+
+def offset(actions, dx, dy):
+    """Move every mouse event by (dx, dy) pixels"""
+    for action in actions:
+        if 'x' in action:
+            action = dict(action)
+            action['x'] += dx
+            action['y'] += dy
+        yield action
+
+
+def apply_steps(actions, steps):
+    """Chain transform steps, each a callable taking and returning an action stream"""
+    for step in steps:
+        actions = step(actions)
+    return actions
+
+
+def read_macro(filename):
+    """Stream the actions of a macro file, closing it when the stream ends.
+
+    Binary macros and record logs are decoded one block at a time. JSON
+    macros have to be parsed whole, so use those only for small macros.
+    """
+    actions = open_macro(filename)
+    try:
+        yield from actions
+    finally:
+        close = getattr(actions, 'close', None)
+        if close:
+            close()
+
+
+def write_macro(filename, actions, file_format=None):
+    """Write an action stream to a macro file in constant memory. Returns the event count.
+
+    file_format is 'binary', 'log' or 'json'; by default it is chosen from
+    the extension (.amsm, .amslog, anything else JSON). The file is written
+    under a temporary name and moved into place at the end, so filename may
+    be one of the stream's own inputs.
+    """
+    if file_format is None:
+        lower = filename.lower()
+        file_format = ('binary' if lower.endswith(BINARY_EXTENSION)
+                       else 'log' if lower.endswith(LOG_EXTENSION) else 'json')
+
+    count = 0
+
+    def counted(stream):
+        nonlocal count
+        for action in stream:
+            count += 1
+            yield action
+
+    if file_format == 'binary':
+        write_binary(filename, counted(actions))
+        return count
+
+    tmp_name = filename + '.tmp'
+    if file_format == 'log':
+        writer = MacroLogWriter(tmp_name, fsync_policy=FSYNC_NEVER)
+        try:
+            for action in counted(actions):
+                writer.append(action)
+        finally:
+            writer.close()
+        if writer.error:
+            raise writer.error
+    else:
+        with open(tmp_name, 'w') as f:
+            f.write('{\n  "recorded_actions": [')
+            for action in counted(actions):
+                f.write(('\n    ' if count == 1 else ',\n    ') + json.dumps(action))
+            f.write(f'\n  ],\n  "created": "{datetime.now().isoformat()}"\n}}\n')
+    os.replace(tmp_name, filename)
+    return count
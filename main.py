@@ -6,15 +6,29 @@ Features: Macro Recording/Playback, Auto Clicker, Auto Hotkey Presser
 
 import tkinter as tk
 from tkinter import ttk
+import importlib
 import threading
 import time
 import json
 from datetime import datetime
 
-# Import our modules
-from macro_recorder import MacroRecorder
-from auto_clicker import AutoClicker
-from hotkey_presser import HotkeyPresser
+# Import our modules (engines are imported lazily, see ENGINES)
+from status_bus import get_status_bus
+
+# Engine behind each tab as (module, class). Each is imported and created the
+# first time its tab is used, so the window comes up without loading pynput
+# or any engine code
+ENGINES = {
+    'macro_recorder': ('macro_recorder', 'MacroRecorder'),
+    'auto_clicker': ('auto_clicker', 'AutoClicker'),
+    'hotkey_presser': ('hotkey_presser', 'HotkeyPresser'),
+}
+
+# Status labels refresh at most this many times per second, however fast the engines run
+STATUS_FPS = 10
+
+# Smoothing for the live rates shown in the UI (weight of the newest frame)
+RATE_SMOOTHING = 0.3
 
 class AutoMationSuite:
     def __init__(self):
@@ -26,13 +40,39 @@ class AutoMationSuite:
         # Set app icon and style
         self.root.configure(bg='#f0f0f0')
         
-        # Initialize modules
-        self.macro_recorder = MacroRecorder()
-        self.auto_clicker = AutoClicker()
-        self.hotkey_presser = HotkeyPresser()
+        # Modules are created on first use
+        self.engines = {}
         
         self.setup_ui()
         
+        # Engines publish state changes from their own threads; the Tk thread
+        # drains them and samples live counters on a capped frame timer
+        self.status_bus = get_status_bus()
+        self.status_interval_ms = int(1000 / STATUS_FPS)
+        self.rate_samples = {}
+        self.root.after(self.status_interval_ms, self.update_status)
+        
+    def get_engine(self, name, create=True):
+        """Get a tab's engine, importing and creating it on first use unless create is False"""
+        engine = self.engines.get(name)
+        if engine is None and create:
+            module_name, class_name = ENGINES[name]
+            engine_class = getattr(importlib.import_module(module_name), class_name)
+            engine = self.engines[name] = engine_class()
+        return engine
+        
+    @property
+    def macro_recorder(self):
+        return self.get_engine('macro_recorder')
+        
+    @property
+    def auto_clicker(self):
+        return self.get_engine('auto_clicker')
+        
+    @property
+    def hotkey_presser(self):
+        return self.get_engine('hotkey_presser')
+        
     def setup_ui(self):
         """Setup the main user interface with tabs"""
         # Create notebook for tabs
@@ -43,15 +83,19 @@ class AutoMationSuite:
         self.macro_frame = ttk.Frame(self.notebook)
         self.clicker_frame = ttk.Frame(self.notebook)
         self.hotkey_frame = ttk.Frame(self.notebook)
+        self.library_frame = ttk.Frame(self.notebook)
         
         self.notebook.add(self.macro_frame, text="Macro Recorder")
         self.notebook.add(self.clicker_frame, text="Auto Clicker")
         self.notebook.add(self.hotkey_frame, text="Hotkey Presser")
+        self.notebook.add(self.library_frame, text="Macro Library")
         
         # Setup each tab
         self.setup_macro_tab()
         self.setup_clicker_tab()
         self.setup_hotkey_tab()
+        self.setup_library_tab()
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # Add status bar
         self.status_bar = tk.Label(self.root, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
@@ -94,6 +138,20 @@ class AutoMationSuite:
         self.macro_unlimited = tk.BooleanVar()
         tk.Checkbutton(playback_frame, text="Unlimited (until stopped)", variable=self.macro_unlimited).grid(row=1, column=2, padx=5)
         
+        # Compressed playback: shorten idle time instead of replaying it
+        tk.Label(playback_frame, text="Max Gap (s):").grid(row=2, column=0, sticky='w')
+        self.macro_max_gap = tk.Entry(playback_frame, width=10)
+        self.macro_max_gap.grid(row=2, column=1, padx=5)
+        
+        self.macro_collapse_moves = tk.BooleanVar()
+        tk.Checkbutton(playback_frame, text="Collapse mouse moves", variable=self.macro_collapse_moves).grid(row=2, column=2, padx=5)
+        
+        self.macro_max_speed = tk.BooleanVar()
+        tk.Checkbutton(playback_frame, text="Max speed, settle (ms):", variable=self.macro_max_speed).grid(row=3, column=0, sticky='w')
+        self.macro_settle = tk.Entry(playback_frame, width=10)
+        self.macro_settle.insert(0, "10")
+        self.macro_settle.grid(row=3, column=1, padx=5)
+        
         # Control buttons
         button_frame = tk.Frame(self.macro_frame)
         button_frame.pack(pady=20)
@@ -167,6 +225,12 @@ class AutoMationSuite:
         self.click_type.set("Single")
         self.click_type.grid(row=1, column=1, padx=5)
         
+        # Burst size (clicks emitted per wake-up, for very short intervals)
+        tk.Label(options_frame, text="Burst Size:").grid(row=2, column=0, sticky='w')
+        self.click_burst = ttk.Combobox(options_frame, values=["1", "5", "10", "25", "50"], width=10)
+        self.click_burst.set("1")
+        self.click_burst.grid(row=2, column=1, padx=5)
+        
         # Repeat options frame
         repeat_frame = tk.LabelFrame(self.clicker_frame, text="Click Repeat", padx=10, pady=10)
         repeat_frame.pack(fill='x', padx=10, pady=5)
@@ -231,6 +295,16 @@ class AutoMationSuite:
         self.hotkey_interval.set(50)
         self.hotkey_interval.grid(row=0, column=1, padx=5)
         
+        tk.Label(speed_frame, text="Hold Duration (ms):").grid(row=1, column=0, sticky='w')
+        self.hotkey_hold = tk.Entry(speed_frame, width=8)
+        self.hotkey_hold.insert(0, "1")
+        self.hotkey_hold.grid(row=1, column=1, padx=5, sticky='w')
+        
+        tk.Label(speed_frame, text="Jitter (ms):").grid(row=2, column=0, sticky='w')
+        self.hotkey_jitter = tk.Entry(speed_frame, width=8)
+        self.hotkey_jitter.insert(0, "0")
+        self.hotkey_jitter.grid(row=2, column=1, padx=5, sticky='w')
+        
         # Control buttons
         button_frame = tk.Frame(self.hotkey_frame)
         button_frame.pack(pady=20)
@@ -245,6 +319,165 @@ class AutoMationSuite:
         self.hotkey_status = tk.Label(self.hotkey_frame, text="Status: Stopped", fg='red')
         self.hotkey_status.pack(pady=5)
         
+    def setup_library_tab(self):
+        """Setup macro library tab"""
+        self.macro_library = None  # opened the first time the tab is shown
+        self.macro_bank = None  # created with the first hotkey binding
+        self.library_entries = []
+        
+        # Title
+        title = tk.Label(self.library_frame, text="Macro Library", font=('Arial', 14, 'bold'))
+        title.pack(pady=10)
+        
+        # Search
+        search_frame = tk.Frame(self.library_frame)
+        search_frame.pack(fill='x', padx=10)
+        tk.Label(search_frame, text="Name:").pack(side='left')
+        self.library_search = tk.Entry(search_frame, width=12)
+        self.library_search.pack(side='left', padx=2)
+        tk.Label(search_frame, text="Tag:").pack(side='left')
+        self.library_tag = tk.Entry(search_frame, width=10)
+        self.library_tag.pack(side='left', padx=2)
+        tk.Button(search_frame, text="Search", command=self.search_library).pack(side='left', padx=2)
+        tk.Button(search_frame, text="Refresh", command=self.refresh_library).pack(side='left', padx=2)
+        self.library_search.bind('<Return>', lambda event: self.search_library())
+        self.library_tag.bind('<Return>', lambda event: self.search_library())
+        
+        # Results
+        list_frame = tk.Frame(self.library_frame)
+        list_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side='right', fill='y')
+        self.library_list = tk.Listbox(list_frame, height=8, yscrollcommand=scrollbar.set)
+        self.library_list.pack(side='left', fill='both', expand=True)
+        scrollbar.config(command=self.library_list.yview)
+        
+        # Actions
+        action_frame = tk.Frame(self.library_frame)
+        action_frame.pack(fill='x', padx=10)
+        tk.Button(action_frame, text="Load", command=self.load_library_macro, bg='#2196F3', fg='white').pack(side='left', padx=2)
+        tk.Label(action_frame, text="Save as:").pack(side='left')
+        self.library_save_name = tk.Entry(action_frame, width=12)
+        self.library_save_name.pack(side='left', padx=2)
+        tk.Button(action_frame, text="Save", command=self.save_library_macro, bg='#4CAF50', fg='white').pack(side='left', padx=2)
+        tk.Label(action_frame, text="Tags:").pack(side='left')
+        self.library_tags = tk.Entry(action_frame, width=12)
+        self.library_tags.pack(side='left', padx=2)
+        tk.Button(action_frame, text="Set", command=self.tag_library_macro).pack(side='left', padx=2)
+        
+        # Hotkey bindings: bound macros stay compiled in memory and play on their hotkey
+        bind_frame = tk.Frame(self.library_frame)
+        bind_frame.pack(fill='x', padx=10, pady=5)
+        tk.Label(bind_frame, text="Hotkey:").pack(side='left')
+        self.library_hotkey = tk.Entry(bind_frame, width=6)
+        self.library_hotkey.pack(side='left', padx=2)
+        tk.Button(bind_frame, text="Bind", command=self.bind_library_macro).pack(side='left', padx=2)
+        tk.Button(bind_frame, text="Unbind", command=self.unbind_library_macro).pack(side='left', padx=2)
+        
+        # Status
+        self.library_status = tk.Label(self.library_frame, text="", fg='green')
+        self.library_status.pack(pady=5)
+        
+    def on_tab_changed(self, event):
+        if self.notebook.select() == str(self.library_frame) and self.macro_library is None:
+            self.refresh_library()
+            
+    # Library functions
+    def get_library(self):
+        if self.macro_library is None:
+            from macro_library import MacroLibrary
+            self.macro_library = MacroLibrary()
+        return self.macro_library
+        
+    def refresh_library(self):
+        """Pick up added, changed and removed macro files, then redo the search"""
+        stats = self.get_library().refresh()
+        self.search_library()
+        self.library_status.config(
+            text=f"Indexed in {stats['elapsed_ms']:.0f}ms: {stats['added']} added, "
+                 f"{stats['updated']} updated, {stats['removed']} removed", fg='green')
+        
+    def search_library(self):
+        """List macros matching the search fields (from the index only)"""
+        self.library_entries = self.get_library().query(
+            name=self.library_search.get().strip() or None,
+            tag=self.library_tag.get().strip() or None)
+        bound = {}
+        if self.macro_bank is not None:
+            bound = {binding['file']: binding['hotkey'] for binding in self.macro_bank.bindings()}
+        self.library_list.delete(0, tk.END)
+        for entry in self.library_entries:
+            tags = f"  [{', '.join(entry['tags'])}]" if entry['tags'] else ""
+            hotkey = f"  <{bound[entry['file']]}>" if entry['file'] in bound else ""
+            self.library_list.insert(tk.END, f"{entry['name']}  -  {entry['duration']:.1f}s, "
+                                             f"{entry['events']} events{tags}{hotkey}")
+                                             
+    def selected_library_entry(self):
+        selection = self.library_list.curselection()
+        if not selection:
+            self.library_status.config(text="Select a macro first", fg='red')
+            return None
+        return self.library_entries[selection[0]]
+        
+    def load_library_macro(self):
+        entry = self.selected_library_entry()
+        if entry and self.macro_recorder.load_macro(entry['file']):
+            self.library_status.config(text=f"Loaded {entry['name']} - play it from the Macro Recorder tab", fg='green')
+            
+    def save_library_macro(self):
+        name = self.library_save_name.get().strip()
+        if not name:
+            self.library_status.config(text="Enter a name to save the current macro as", fg='red')
+            return
+        if not self.macro_recorder.recorded_actions:
+            self.library_status.config(text="No macro recorded", fg='red')
+            return
+        if self.get_library().add(self.macro_recorder, name):
+            self.search_library()
+            self.library_status.config(text=f"Saved {name}", fg='green')
+            
+    def tag_library_macro(self):
+        entry = self.selected_library_entry()
+        if entry:
+            tags = [tag for tag in self.library_tags.get().replace(',', ' ').split() if tag]
+            self.get_library().set_tags(entry['path'], tags)
+            self.search_library()
+            self.library_status.config(text=f"Tagged {entry['name']}", fg='green')
+            
+    def get_macro_bank(self):
+        if self.macro_bank is None:
+            from macro_bank import MacroBank
+            self.macro_bank = MacroBank(self.macro_recorder)
+        return self.macro_bank
+        
+    def bind_library_macro(self):
+        entry = self.selected_library_entry()
+        hotkey = self.library_hotkey.get().strip()
+        if not entry:
+            return
+        if not hotkey:
+            self.library_status.config(text="Enter a hotkey to bind the macro to", fg='red')
+            return
+        bank = self.get_macro_bank()
+        speed = self.macro_speed.get()
+        repeats = 0 if self.macro_unlimited.get() else int(self.macro_repeat.get() or "1")
+        if bank.bind(hotkey, entry['file'], speed, repeats, **self.get_playback_compression()):
+            self.search_library()
+            stats = bank.get_stats()
+            self.library_status.config(
+                text=f"{entry['name']} plays on {hotkey} ({stats['bound']} bound, "
+                     f"{stats['bytes_used'] / 1e6:.1f}MB compiled)", fg='green')
+        else:
+            self.library_status.config(text=f"Could not load {entry['name']}", fg='red')
+            
+    def unbind_library_macro(self):
+        hotkey = self.library_hotkey.get().strip()
+        if self.macro_bank is not None and hotkey and self.macro_bank.unbind(hotkey):
+            self.search_library()
+            self.library_status.config(text=f"Unbound {hotkey}", fg='green')
+        else:
+            self.library_status.config(text="No macro bound to that hotkey", fg='red')
+            
     # Macro functions
     def toggle_macro_recording(self):
         if self.macro_recorder.is_recording:
@@ -264,11 +497,21 @@ class AutoMationSuite:
             times = 0 if unlimited else int(self.macro_repeat.get() or "1")
             playback_key = self.macro_playback_key.get()
             
-            self.macro_recorder.play_macro(speed, times, playback_key)
+            self.macro_recorder.play_macro(speed, times, playback_key, **self.get_playback_compression())
             self.macro_status.config(text="Status: Playing macro...")
         else:
             self.macro_status.config(text="Status: No macro recorded")
             
+    def get_playback_compression(self):
+        """Max gap, move collapsing and max-speed settings from the playback frame"""
+        max_gap = self.macro_max_gap.get().strip()
+        settle = self.macro_settle.get().strip() or "0"
+        return {
+            'max_gap': float(max_gap) if max_gap else None,
+            'collapse_moves': self.macro_collapse_moves.get(),
+            'settle': float(settle) / 1000.0 if self.macro_max_speed.get() else None,
+        }
+        
     def stop_macro(self):
         self.macro_recorder.stop_playback()
         self.macro_status.config(text="Status: Stopped")
@@ -280,7 +523,7 @@ class AutoMationSuite:
             hours = int(self.click_hours.get())
             mins = int(self.click_mins.get())
             secs = int(self.click_secs.get())
-            ms = int(self.click_ms.get())
+            ms = float(self.click_ms.get())
             interval = hours * 3600 + mins * 60 + secs + ms / 1000.0
             
             # Get other settings
@@ -288,13 +531,15 @@ class AutoMationSuite:
             random_ms_val = int(self.random_ms.get() or "0")
             mouse_btn = self.mouse_button.get().lower()
             click_type_val = self.click_type.get().lower()
+            burst_size = int(self.click_burst.get() or "1")
             
             # Get repeat settings
             unlimited = self.click_repeat_type.get() == "unlimited"
             times = 0 if unlimited else int(self.click_repeat_times.get() or "1")
             
             self.auto_clicker.start_clicking(interval, random_offset, random_ms_val/1000.0, 
-                                           mouse_btn, click_type_val, times)
+                                           mouse_btn, click_type_val, times,
+                                           burst_size=burst_size)
             self.clicker_start_btn.config(text="Stop (F6)")
             self.clicker_status.config(text="Status: Clicking...", fg='green')
         else:
@@ -312,8 +557,11 @@ class AutoMationSuite:
             mode = self.hotkey_mode.get()
             interval = self.hotkey_interval.get() / 1000.0
             activation_key = self.hotkey_activation.get()
+            hold = float(self.hotkey_hold.get() or "1") / 1000.0
+            jitter = float(self.hotkey_jitter.get() or "0") / 1000.0
             
-            self.hotkey_presser.start_pressing(key, mode, interval, activation_key)
+            self.hotkey_presser.start_pressing(key, mode, interval, activation_key,
+                                               hold_duration=hold, jitter=jitter)
             self.hotkey_start_btn.config(text="Stop")
             self.hotkey_status.config(text="Status: Active", fg='green')
         else:
@@ -324,15 +572,110 @@ class AutoMationSuite:
         self.hotkey_start_btn.config(text="Start")
         self.hotkey_status.config(text="Status: Stopped", fg='red')
         
+    # Status updates (Tk thread only)
+    def update_status(self):
+        """Apply queued engine state changes and refresh live rates, then reschedule"""
+        try:
+            for event in self.status_bus.drain():
+                self.apply_status_event(event)
+            self.refresh_live_status()
+        except Exception as e:
+            print(f"Status update error: {e}")
+        finally:
+            self.root.after(self.status_interval_ms, self.update_status)
+            
+    def apply_status_event(self, event):
+        """Update buttons and labels for an engine starting or stopping"""
+        source, state = event['source'], event['state']
+        if source == 'clicker':
+            if state == 'running':
+                self.clicker_start_btn.config(text="Stop (F6)")
+            else:
+                self.clicker_start_btn.config(text="Start (F6)")
+                self.set_label(self.clicker_status, f"Status: Stopped ({event.get('clicks', 0)} clicks)", 'red')
+                self.rate_samples.pop('clicker', None)
+        elif source == 'presser':
+            if state == 'running':
+                self.hotkey_start_btn.config(text="Stop")
+            else:
+                self.hotkey_start_btn.config(text="Start")
+                self.set_label(self.hotkey_status, f"Status: Stopped ({event.get('presses', 0)} presses)", 'red')
+                self.rate_samples.pop('presser', None)
+        elif source == 'recorder':
+            if state == 'recording':
+                self.macro_record_btn.config(text="Stop Recording")
+            else:
+                self.macro_record_btn.config(text="Start Recording")
+                self.set_label(self.macro_status, f"Status: Recording stopped ({event.get('actions', 0)} actions)")
+        elif source == 'playback' and state == 'stopped':
+            saved = event.get('time_saved', 0.0)
+            saved_text = f", {saved:.1f}s saved" if saved else ""
+            self.set_label(self.macro_status, f"Status: Playback stopped ({event.get('actions', 0)} actions{saved_text})")
+            
+    def refresh_live_status(self):
+        """Show live rates and progress of whatever is running"""
+        parts = []
+        auto_clicker = self.get_engine('auto_clicker', create=False)
+        hotkey_presser = self.get_engine('hotkey_presser', create=False)
+        macro_recorder = self.get_engine('macro_recorder', create=False)
+        
+        if auto_clicker and auto_clicker.is_clicking:
+            clicks = auto_clicker.get_status()['clicks']
+            cps = self.live_rate('clicker', clicks)
+            self.set_label(self.clicker_status, f"Status: Clicking - {cps:.0f} CPS ({clicks} clicks)", 'green')
+            parts.append(f"Clicking {cps:.0f} CPS")
+            
+        if hotkey_presser and hotkey_presser.is_pressing:
+            presses = hotkey_presser.press_count
+            rate = self.live_rate('presser', presses)
+            self.set_label(self.hotkey_status, f"Status: Active - {rate:.1f} presses/s ({presses} presses)", 'green')
+            parts.append(f"Pressing {rate:.1f}/s")
+            
+        if macro_recorder and macro_recorder.is_recording:
+            actions = len(macro_recorder.recorded_actions)
+            self.set_label(self.macro_status, f"Status: Recording... ({actions} actions)")
+            parts.append(f"Recording {actions} actions")
+        elif macro_recorder and macro_recorder.is_playing:
+            progress = macro_recorder.get_playback_progress()
+            self.set_label(self.macro_status, f"Status: Playing macro... {progress:.0%}")
+            parts.append(f"Playback {progress:.0%}")
+            
+        self.set_label(self.status_bar, " | ".join(parts) if parts else "Ready")
+        
+    def live_rate(self, name, count):
+        """Smoothed events/sec of a running counter, sampled once per frame"""
+        now = time.perf_counter()
+        previous = self.rate_samples.get(name)
+        if previous is None or count < previous[1]:
+            self.rate_samples[name] = (now, count, 0.0)
+            return 0.0
+        last_time, last_count, rate = previous
+        if now > last_time:
+            instant = (count - last_count) / (now - last_time)
+            rate = instant if rate == 0.0 else rate + RATE_SMOOTHING * (instant - rate)
+        self.rate_samples[name] = (now, count, rate)
+        return rate
+        
+    def set_label(self, label, text, fg=None):
+        """Configure a label only when its text or colour changes"""
+        if label.cget('text') != text or (fg is not None and label.cget('fg') != fg):
+            if fg is None:
+                label.config(text=text)
+            else:
+                label.config(text=text, fg=fg)
+                
     def run(self):
         """Start the application"""
         self.root.mainloop()
         
     def cleanup(self):
         """Cleanup when closing"""
-        self.macro_recorder.cleanup()
-        self.auto_clicker.cleanup()
-        self.hotkey_presser.cleanup()
+        if self.macro_bank is not None:
+            self.macro_bank.cleanup()
+        for engine in self.engines.values():
+            engine.cleanup()
+        if self.macro_library is not None:
+            self.macro_library.close()
 
 if __name__ == "__main__":
     app = AutoMationSuite()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+Process-wide counters, gauges and latency histograms with JSON and Prometheus export
+"""
+
+import bisect
+import json
+import threading
+import time
+
+# Upper bounds (seconds) for scheduled-vs-actual fire time histograms
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+DEFAULT_PORT = 9464
+
+
+class Counter:
+    """Monotonically increasing total.
+
+    Engines on different threads can share a counter, so updates take
+    the counter's own lock; an uncontended lock keeps them cheap on
+    worker hot paths.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text=''):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+    def prometheus_lines(self):
+        return [f"{self.name} {self.value}"]
+
+
+class Gauge:
+    """Value that can go up and down (e.g. whether an engine is running)"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text=''):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self):
+        return self.value
+
+    def prometheus_lines(self):
+        return [f"{self.name} {self.value}"]
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets (seconds for latencies).
+
+    Updates and snapshots take the histogram's own lock, so the buckets,
+    count and sum always agree even with several threads observing.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text='', buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations"""
+        with self._lock:
+            return self._percentile(fraction)
+
+    def _percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                # A bucket's bound can be above anything actually observed
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.bounds, self.counts):
+                cumulative += count
+                buckets[repr(bound)] = cumulative
+            buckets['+Inf'] = self.count
+            return {
+                'count': self.count,
+                'sum': self.sum,
+                'mean': self.sum / self.count if self.count else 0.0,
+                'max': self.max,
+                'p50': self._percentile(0.50),
+                'p99': self._percentile(0.99),
+                'buckets': buckets,
+            }
+
+    def prometheus_lines(self):
+        lines = []
+        cumulative = 0
+        with self._lock:
+            for bound, count in zip(self.bounds, self.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{le="{bound!r}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+            lines.append(f"{self.name}_sum {self.sum}")
+            lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics shared by every engine in the process.
+
+    counter()/gauge()/histogram() return the existing metric of that name
+    or create it, so engines just ask for what they need when they start.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.server = None
+        self.created = time.time()
+
+    def _get(self, cls, name, help_text, *args):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, help_text, *args)
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text=''):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text=''):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text='', buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets)
+
+    def _sorted_metrics(self):
+        # Copied under the lock: engines may register metrics mid-scrape
+        with self._lock:
+            return sorted(self._metrics.items())
+
+    def snapshot(self):
+        """Current value of every metric, keyed by name"""
+        return {name: metric.snapshot() for name, metric in self._sorted_metrics()}
+
+    def to_json(self, indent=2):
+        return json.dumps({'timestamp': time.time(), 'metrics': self.snapshot()}, indent=indent)
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in self._sorted_metrics():
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=DEFAULT_PORT, host='127.0.0.1'):
+        """Serve /metrics (Prometheus text) and /metrics.json on a background thread"""
+        if self.server is not None:
+            return self.server
+        # Imported here: http.server pulls in ssl and friends, which only
+        # this optional endpoint needs
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = registry.to_prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path == '/metrics.json':
+                    body = registry.to_json().encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        print(f"Serving metrics on http://{host}:{self.server.server_port}/metrics")
+        return self.server
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """Get the process-wide metrics registry"""
+    return _registry
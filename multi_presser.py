@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Multi-Key Presser Module
+Many key jobs, each with its own rate, mode and hotkey, on one scheduler thread
+"""
+
+import heapq
+import itertools
+import queue
+import random
+import threading
+from functools import partial
+
+from event_buffer import NS_PER_SECOND
+from scheduler import POLICY_SKIP, POLICIES, clock_ns, get_sleep_granularity_ns
+from input_backend import get_backend
+from hotkey_service import get_hotkey_service
+from hotkey_presser import get_press_metrics, parse_key
+
+# Heap event kinds. Heap entries are (deadline, kind, seq, ...), so at equal
+# deadlines releases come first and a key can be released and pressed again
+# in the same flush; otherwise events go out in deadline order, which keeps
+# every press ahead of its own release however short the hold
+RELEASE = 0
+PRESS = 1
+
+# Events due within this long of the earliest one go out in the same flush
+DEFAULT_COALESCE_WINDOW = 0.0002  # 200us
+
+
+class KeyJob:
+    """One key driven by a MultiKeyPresser.
+
+    Continuous jobs press every interval seconds (or rate presses/sec),
+    holding each press for hold_duration (or duty_cycle of the period),
+    with optional jitter as in HotkeyPresser. Hold jobs press when started
+    and release when stopped. activation_hotkey, if given, toggles the job.
+    """
+
+    def __init__(self, key, mode='continuous', interval=0.05, activation_hotkey=None,
+                 rate=None, hold_duration=0.001, duty_cycle=None, jitter=0.0):
+        if mode not in ('continuous', 'hold'):
+            raise ValueError(f"Unknown press mode: {mode}")
+        if rate:
+            interval = 1.0 / rate
+
+        self.key = key.lower()
+        self.mode = mode
+        self.interval = max(0.001, interval)  # Minimum 1ms
+        if duty_cycle is not None:
+            hold_duration = self.interval * duty_cycle
+        self.hold_duration = min(max(0.0, hold_duration), self.interval / 2)
+        self.jitter = min(max(0.0, jitter), (self.interval - self.hold_duration) / 2)
+        self.activation_hotkey = activation_hotkey
+
+        # Engine state, owned by the scheduler thread
+        self.active = False
+        self.generation = 0  # bumped on every start/stop so stale heap events are dropped
+        self.key_down = False
+        self.handler = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.presses = 0
+        self.skipped = 0
+        self.late = 0
+        self.max_lateness_ns = 0
+        self.first_press_ns = None
+        self.last_press_ns = None
+
+    def achieved_rate(self):
+        """Presses per second this job actually got"""
+        if self.presses < 2:
+            return 0.0
+        span = (self.last_press_ns - self.first_press_ns) / NS_PER_SECOND
+        return (self.presses - 1) / span if span > 0 else 0.0
+
+    def get_stats(self):
+        return {
+            'key': self.key,
+            'mode': self.mode,
+            'active': self.active,
+            'activation_hotkey': self.activation_hotkey,
+            'target_rate': 1.0 / self.interval if self.mode == 'continuous' else 0.0,
+            'achieved_rate': self.achieved_rate(),
+            'presses': self.presses,
+            'skipped': self.skipped,
+            'late': self.late,
+            'max_lateness_ms': self.max_lateness_ns / 1e6,
+        }
+
+
+class MultiKeyPresser:
+    """Runs any number of KeyJobs from a single timer heap on one thread.
+
+    Every pending press and release sits in one heap keyed by deadline.
+    The thread sleeps until the earliest one, then sends every event due
+    within coalesce_window of it through one backend key_batch() call.
+    Starting and stopping jobs (directly or from their hotkeys) is queued
+    to the thread, which wakes immediately to apply it; only that thread
+    reads or changes a job's active state.
+
+    With the catch_up policy a job that falls behind fires at most
+    max_catch_up missed presses back to back before the rest are skipped.
+    """
+
+    def __init__(self, backend=None, policy=POLICY_SKIP, coalesce_window=DEFAULT_COALESCE_WINDOW,
+                 max_catch_up=10):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+
+        self.backend = backend or get_backend()
+        self.hotkey_service = get_hotkey_service(self.backend)
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.coalesce_ns = int(coalesce_window * NS_PER_SECOND)
+        self.jobs = []
+
+        self.thread = None
+        self.stop_flag = False
+        self._commands = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._seq = itertools.count()
+
+        # Engine-wide counters
+        self.flushes = 0
+        self.events_sent = 0
+        self.max_batch = 0
+        self.presses_metric, self.lateness_metric = get_press_metrics()
+
+    # Job management
+    def add_job(self, job=None, **options):
+        """Add a KeyJob (or build one from KeyJob arguments) and return it"""
+        if job is None:
+            job = KeyJob(**options)
+        self.jobs.append(job)
+        if job.activation_hotkey:
+            job.handler = partial(self.toggle_job, job)
+            self.hotkey_service.register(job.activation_hotkey, job.handler)
+        return job
+
+    def remove_job(self, job):
+        """Stop a job and forget it"""
+        self.stop_job(job)
+        if job.handler is not None:
+            self.hotkey_service.unregister(job.activation_hotkey, job.handler)
+            job.handler = None
+        if job in self.jobs:
+            self.jobs.remove(job)
+
+    def start_job(self, job):
+        if not self.backend.available:
+            print(f"Cannot start key pressing: {self.backend.name} backend not available")
+            return
+        self._ensure_thread()
+        self._send(('start', job))
+
+    def stop_job(self, job):
+        if self.thread is not None:
+            self._send(('stop', job))
+
+    def toggle_job(self, job):
+        """Start the job if it is stopped, otherwise stop it (hotkey handler).
+
+        Which one is decided on the scheduler thread, so toggles pressed
+        faster than it applies them still alternate.
+        """
+        if not self.backend.available:
+            print(f"Cannot start key pressing: {self.backend.name} backend not available")
+            return
+        self._ensure_thread()
+        self._send(('toggle', job))
+
+    def start_all(self):
+        for job in self.jobs:
+            self.start_job(job)
+
+    def stop_all(self):
+        for job in self.jobs:
+            self.stop_job(job)
+
+    def _send(self, command):
+        self._commands.put(command)
+        self._wake.set()
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_flag = False
+            self.thread = threading.Thread(target=self._scheduler_worker)
+            self.thread.daemon = True
+            self.thread.start()
+
+    # Scheduler thread
+    def _scheduler_worker(self):
+        """Worker thread: fire due key events from the heap, batching coincident ones"""
+        keyboard_controller = self.backend.keyboard_controller()
+        key_batch = self.backend.key_batch
+        spin_threshold_ns = get_sleep_granularity_ns() * 2 + 100_000
+        heap = []
+        resolved = {}
+
+        try:
+            while not self.stop_flag:
+                self._apply_commands(heap, resolved, keyboard_controller)
+
+                if not heap:
+                    self._wake.wait()
+                    self._wake.clear()
+                    continue
+
+                # Sleep until close to the earliest deadline, waking early for commands
+                deadline_ns = heap[0][0]
+                remaining = deadline_ns - clock_ns()
+                if remaining > spin_threshold_ns:
+                    if self._wake.wait((remaining - spin_threshold_ns) / NS_PER_SECOND):
+                        self._wake.clear()
+                    continue
+                while clock_ns() < deadline_ns:
+                    pass
+
+                # Everything due now (or within the coalesce window) goes in one flush
+                now = clock_ns()
+                horizon = max(now, deadline_ns + self.coalesce_ns)
+                batch = []
+                while heap and heap[0][0] <= horizon:
+                    event_deadline, kind, _seq, generation, job = heapq.heappop(heap)
+                    if generation != job.generation or not job.active:
+                        continue
+                    self._fire(heap, batch, now, event_deadline, kind, job, resolved,
+                               spin_threshold_ns)
+                if batch:
+                    # Already in (deadline, kind) order, as popped from the heap
+                    key_batch(keyboard_controller, batch)
+                    self.flushes += 1
+                    self.events_sent += len(batch)
+                    if len(batch) > self.max_batch:
+                        self.max_batch = len(batch)
+        except Exception as e:
+            print(f"Key pressing error: {e}")
+        finally:
+            # Never leave a key stuck down
+            released = [(resolved[job.key], False) for job in self.jobs
+                        if job.key_down and job.key in resolved]
+            for job in self.jobs:
+                job.key_down = False
+                job.active = False
+            if released:
+                try:
+                    key_batch(keyboard_controller, released)
+                except Exception as e:
+                    print(f"Key pressing error: {e}")
+
+    def _push(self, heap, deadline_ns, kind, job):
+        heapq.heappush(heap, (deadline_ns, kind, next(self._seq), job.generation, job))
+
+    def _apply_commands(self, heap, resolved, keyboard_controller):
+        batch = []
+        while True:
+            try:
+                command, job = self._commands.get_nowait()
+            except queue.Empty:
+                break
+
+            if job.key not in resolved:
+                resolved[job.key] = parse_key(self.backend, job.key)
+            key = resolved[job.key]
+            if key is None:
+                print(f"Invalid key: {job.key}")
+                continue
+
+            if command == 'toggle':
+                command = 'stop' if job.active else 'start'
+            if command == 'start' and not job.active:
+                job.active = True
+                job.generation += 1
+                job.reset_stats()
+                now = clock_ns()
+                if job.mode == 'hold':
+                    batch.append((key, True))
+                    job.key_down = True
+                    job.presses = 1
+                    self.presses_metric.inc()
+                else:
+                    job.next_deadline_ns = now
+                    self._push(heap, now, PRESS, job)
+            elif command == 'stop' and job.active:
+                job.active = False
+                job.generation += 1
+                if job.key_down:
+                    batch.append((key, False))
+                    job.key_down = False
+
+        if batch:
+            self.backend.key_batch(keyboard_controller, batch)
+            self.flushes += 1
+            self.events_sent += len(batch)
+
+    def _fire(self, heap, batch, now, deadline_ns, kind, job, resolved, spin_threshold_ns):
+        key = resolved[job.key]
+        if kind == RELEASE:
+            batch.append((key, False))
+            job.key_down = False
+            return
+
+        lateness = now - deadline_ns
+        if lateness > spin_threshold_ns:
+            job.late += 1
+        if lateness > job.max_lateness_ns:
+            job.max_lateness_ns = lateness
+        self.lateness_metric.observe(lateness / 1e9)
+        self.presses_metric.inc()
+        if job.first_press_ns is None:
+            job.first_press_ns = now
+        job.last_press_ns = now
+        job.presses += 1
+
+        batch.append((key, True))
+        job.key_down = True
+        self._push(heap, deadline_ns + int(job.hold_duration * NS_PER_SECOND), RELEASE, job)
+        self._push(heap, self._next_deadline(job), PRESS, job)
+
+    def _next_deadline(self, job):
+        """Advance a continuous job's grid deadline, applying jitter and the missed-deadline policy"""
+        interval_ns = int(job.interval * NS_PER_SECOND)
+        job.next_deadline_ns += interval_ns
+        behind = clock_ns() - job.next_deadline_ns
+        if behind > 0:
+            missed = behind // interval_ns
+            if self.policy == POLICY_SKIP:
+                job.next_deadline_ns += missed * interval_ns
+                job.skipped += missed
+            elif missed > self.max_catch_up:
+                # Too far behind to catch up sensibly - drop the excess backlog
+                dropped = missed - self.max_catch_up
+                job.next_deadline_ns += dropped * interval_ns
+                job.skipped += dropped
+
+        # Jitter shifts the press within its slot; the grid itself stays exact
+        if job.jitter > 0:
+            return job.next_deadline_ns + int(random.uniform(-job.jitter, job.jitter) * NS_PER_SECOND)
+        return job.next_deadline_ns
+
+    # Status and lifecycle
+    def is_running(self):
+        return any(job.active for job in self.jobs)
+
+    def get_status(self):
+        """Engine counters plus per-job rates"""
+        return {
+            'running': self.is_running(),
+            'jobs': [job.get_stats() for job in self.jobs],
+            'presses': sum(job.presses for job in self.jobs),
+            'flushes': self.flushes,
+            'events_sent': self.events_sent,
+            'max_batch': self.max_batch,
+        }
+
+    def cleanup(self):
+        """Stop every job, release held keys and unregister hotkeys"""
+        for job in list(self.jobs):
+            if job.handler is not None:
+                self.hotkey_service.unregister(job.activation_hotkey, job.handler)
+                job.handler = None
+        self.stop_all()
+        if self.thread is not None:
+            self.stop_flag = True
+            self._wake.set()
+            self.thread.join(timeout=1.0)
+            self.thread = None
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Path Simplify Module
+Mouse path simplification (Ramer-Douglas-Peucker, distance and rate decimation)
+"""
+
+import math
+
+from event_buffer import EventBuffer, MOUSE_MOVE, NS_PER_SECOND
+
+# Optional fast path: with NumPy installed (see requirements.txt) long runs
+# are measured with vectorised array maths; without it the pure Python
+# loops below give the same results.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Runs shorter than this aren't worth handing to NumPy
+NUMPY_MIN_POINTS = 64
+
+
+def _columns(xs, ys):
+    """xs and ys as NumPy float arrays, converted once per simplify call, or None"""
+    if numpy is None or len(xs) < NUMPY_MIN_POINTS:
+        return None
+    return numpy.asarray(xs, dtype=float), numpy.asarray(ys, dtype=float)
+
+
+def _segment_distances(xs, ys, start, end, indices, columns=None):
+    """Perpendicular distance of each point in indices from segment start-end.
+
+    With columns (from _columns) long runs are measured in NumPy and a
+    NumPy array is returned; otherwise a list.
+    """
+    x0, y0 = xs[start], ys[start]
+    x1, y1 = xs[end], ys[end]
+    dx, dy = x1 - x0, y1 - y0
+    length_sq = dx * dx + dy * dy
+
+    if columns is not None and len(indices) >= NUMPY_MIN_POINTS:
+        cx, cy = columns
+        if isinstance(indices, range):
+            px, py = cx[indices.start:indices.stop], cy[indices.start:indices.stop]
+        else:
+            px, py = cx[indices], cy[indices]
+        if length_sq == 0:
+            return numpy.hypot(px - x0, py - y0)
+        t = numpy.clip(((px - x0) * dx + (py - y0) * dy) / length_sq, 0.0, 1.0)
+        return numpy.hypot(px - (x0 + t * dx), py - (y0 + t * dy))
+
+    distances = []
+    for i in indices:
+        px, py = xs[i], ys[i]
+        if length_sq == 0:
+            distances.append(math.hypot(px - x0, py - y0))
+            continue
+        t = max(0.0, min(1.0, ((px - x0) * dx + (py - y0) * dy) / length_sq))
+        distances.append(math.hypot(px - (x0 + t * dx), py - (y0 + t * dy)))
+    return distances
+
+
+def _farthest(distances):
+    """Position of the largest of a run of distances"""
+    if numpy is not None and isinstance(distances, numpy.ndarray):
+        return int(distances.argmax())
+    return max(range(len(distances)), key=distances.__getitem__)
+
+
+def rdp(xs, ys, indices, tolerance, columns=None):
+    """Ramer-Douglas-Peucker over the points at indices. Returns kept indices in order"""
+    if len(indices) < 3 or tolerance <= 0:
+        return list(indices)
+
+    index_array = numpy.asarray(indices) if columns is not None else None
+    keep = {indices[0], indices[-1]}
+    stack = [(0, len(indices) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        if index_array is not None and last - first - 1 >= NUMPY_MIN_POINTS:
+            inner = index_array[first + 1:last]
+        else:
+            inner = indices[first + 1:last]
+        distances = _segment_distances(xs, ys, indices[first], indices[last], inner, columns)
+        best = _farthest(distances)
+        if distances[best] > tolerance:
+            split = first + 1 + best
+            keep.add(indices[split])
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [i for i in indices if i in keep]
+
+
+def decimate(ts, xs, ys, start, end, min_distance=0, min_interval=0):
+    """Drop points closer than min_distance pixels or min_interval ns to the
+    previously kept point. The first and last points of the run are always kept.
+    """
+    if end - start < 3 or (min_distance <= 0 and min_interval <= 0):
+        return list(range(start, end))
+
+    min_distance_sq = min_distance * min_distance
+    kept = [start]
+    last_t, last_x, last_y = ts[start], xs[start], ys[start]
+    for i in range(start + 1, end - 1):
+        if ts[i] - last_t < min_interval:
+            continue
+        dx, dy = xs[i] - last_x, ys[i] - last_y
+        if dx * dx + dy * dy < min_distance_sq:
+            continue
+        kept.append(i)
+        last_t, last_x, last_y = ts[i], xs[i], ys[i]
+    kept.append(end - 1)
+    return kept
+
+
+def max_error(xs, ys, start, end, kept, columns=None):
+    """Largest distance of any original point in [start, end) from the kept polyline"""
+    worst = 0.0
+    for a, b in zip(kept, kept[1:]):
+        if b - a > 1:
+            distances = _segment_distances(xs, ys, a, b, range(a + 1, b), columns)
+            worst = max(worst, float(distances[_farthest(distances)]))
+    return worst
+
+
+def simplify_run(ts, xs, ys, start, end, tolerance=0, min_distance=0, max_rate=0, columns=None):
+    """Simplify the move run [start, end). Returns (kept indices, max positional error).
+
+    Callers simplifying many runs of the same arrays pass columns (from
+    _columns) so they are converted only once; otherwise long runs build
+    their own.
+    """
+    if columns is None and end - start >= NUMPY_MIN_POINTS:
+        columns = _columns(xs, ys)
+    min_interval = NS_PER_SECOND / max_rate if max_rate > 0 else 0
+    kept = decimate(ts, xs, ys, start, end, min_distance, min_interval)
+    kept = rdp(xs, ys, kept, tolerance, columns)
+    return kept, max_error(xs, ys, start, end, kept, columns)
+
+
+class SimplifyStats:
+    """Running totals for a simplification pass"""
+
+    def __init__(self):
+        self.moves_in = 0
+        self.moves_out = 0
+        self.max_error = 0.0
+
+    def add(self, moves_in, moves_out, error):
+        self.moves_in += moves_in
+        self.moves_out += moves_out
+        self.max_error = max(self.max_error, error)
+
+    def as_dict(self):
+        return {
+            'moves_in': self.moves_in,
+            'moves_out': self.moves_out,
+            'compression_ratio': (self.moves_in / self.moves_out) if self.moves_out else 1.0,
+            'max_error_px': self.max_error
+        }
+
+
+def simplify_macro(actions, tolerance=1.0, min_distance=0, max_rate=0):
+    """Offline pass: simplify every run of mouse moves in a macro.
+
+    Non-move events are copied unchanged, and each run keeps its first and
+    last position so clicks still land where they were recorded. Returns
+    (EventBuffer, stats dict).
+    """
+    source = EventBuffer.from_actions(actions)
+    types, ts, xs, ys = source.types, source.timestamps, source.xs, source.ys
+    columns = _columns(xs, ys)
+
+    result = EventBuffer()
+    stats = SimplifyStats()
+    count = len(source)
+    i = 0
+    while i < count:
+        if types[i] != MOUSE_MOVE:
+            result.append_from(source, i)
+            i += 1
+            continue
+
+        end = i
+        while end < count and types[end] == MOUSE_MOVE:
+            end += 1
+        kept, error = simplify_run(ts, xs, ys, i, end, tolerance, min_distance, max_rate, columns)
+        for k in kept:
+            result.append_from(source, k)
+        stats.add(end - i, len(kept), error)
+        i = end
+
+    return result, stats.as_dict()
+
+
+class MotionFilter:
+    """Record-time mouse path simplifier.
+
+    Buffers consecutive mouse moves and writes the simplified run to sink
+    (anything with append_move) when a non-move event arrives (flush), or
+    when window moves have piled up. The last point of a full window
+    carries over as the start of the next one so the path stays continuous.
+    """
+
+    def __init__(self, sink, tolerance=1.0, min_distance=0, max_rate=0, window=512):
+        self.sink = sink
+        self.tolerance = tolerance
+        self.min_distance = min_distance
+        self.max_rate = max_rate
+        self.window = max(3, window)
+        self.stats = SimplifyStats()
+        self._ts = []
+        self._xs = []
+        self._ys = []
+
+    def add(self, timestamp, x, y):
+        """Buffer one mouse move"""
+        self._ts.append(timestamp)
+        self._xs.append(x)
+        self._ys.append(y)
+        if len(self._ts) >= self.window:
+            self._emit(carry_last=True)
+
+    def flush(self):
+        """Write out all buffered moves (call before any non-move event)"""
+        if self._ts:
+            self._emit(carry_last=False)
+
+    def _emit(self, carry_last):
+        ts, xs, ys = self._ts, self._xs, self._ys
+        kept, error = simplify_run(ts, xs, ys, 0, len(ts), self.tolerance,
+                                   self.min_distance, self.max_rate)
+        emitted = kept[:-1] if carry_last else kept
+        for k in emitted:
+            self.sink.append_move(ts[k], xs[k], ys[k])
+        # A carried point is counted when the next window emits it
+        self.stats.add(len(ts) - (1 if carry_last else 0), len(emitted), error)
+
+        if carry_last:
+            last = kept[-1]
+            self._ts, self._xs, self._ys = [ts[last]], [xs[last]], [ys[last]]
+        else:
+            self._ts, self._xs, self._ys = [], [], []
+
+    def get_stats(self):
+        """Compression ratio and maximum positional error so far"""
+        return self.stats.as_dict()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Playback Plan Module
+Compiles recorded actions into flat, pre-resolved playback plans
+"""
+
+import weakref
+from array import array
+from functools import partial
+
+from event_buffer import action_timestamp_ns
+
+
+class PlaybackPlan:
+    """A macro compiled for one speed and one pair of controllers.
+
+    offsets_ns[i] is when step i fires relative to the start of the
+    timeline, already scaled by speed. steps[i] is a (callable, args)
+    pair bound to the controller method that performs it, so playback does
+    no type dispatch, button mapping or key parsing per action.
+    """
+
+    def __init__(self, offsets_ns, steps, labels, speed, source_length, duration_ns):
+        self.offsets_ns = offsets_ns
+        self.steps = steps
+        self.labels = labels  # action type per step, for error messages
+        self.speed = speed
+        self.source_length = source_length
+        self.duration_ns = duration_ns  # scaled timestamp of the macro's last action
+        self.original_duration_ns = duration_ns  # before compress_plan, if it was compressed
+
+    def __len__(self):
+        return len(self.steps)
+
+
+def compile_plan(actions, speed, mouse_controller, keyboard_controller,
+                 resolve_button, resolve_key):
+    """Compile action dicts into a PlaybackPlan.
+
+    resolve_button maps a recorded button name to a backend button and
+    resolve_key maps a recorded key name to a backend key (or None to skip).
+    Each distinct name is resolved only once.
+    """
+    set_position = partial(setattr, mouse_controller, 'position')
+    mouse_press = mouse_controller.press
+    mouse_release = mouse_controller.release
+    mouse_scroll = mouse_controller.scroll
+    key_press = keyboard_controller.press
+    key_release = keyboard_controller.release
+
+    buttons = {}
+    keys = {}
+    offsets_ns = array('q')
+    steps = []
+    labels = []
+    source_length = 0
+    duration_ns = 0
+
+    for action in actions:
+        source_length += 1
+        action_type = action['type']
+        offset_ns = action_timestamp_ns(action)
+        if speed != 1.0:
+            offset_ns = int(offset_ns / speed)
+        duration_ns = offset_ns
+
+        if action_type == 'mouse_move':
+            step = (set_position, ((action['x'], action['y']),))
+        elif action_type == 'mouse_click':
+            name = action['button']
+            button = buttons.get(name)
+            if button is None:
+                button = buttons[name] = resolve_button(name)
+            step = (mouse_press if action['pressed'] else mouse_release, (button,))
+        elif action_type == 'mouse_scroll':
+            step = (mouse_scroll, (action['dx'], action['dy']))
+        elif action_type in ('key_press', 'key_release'):
+            name = action['key']
+            if name not in keys:
+                keys[name] = resolve_key(name)
+            key = keys[name]
+            if not key:
+                continue
+            step = (key_press if action_type == 'key_press' else key_release, (key,))
+        else:
+            continue
+
+        offsets_ns.append(offset_ns)
+        steps.append(step)
+        labels.append(action_type)
+
+    return PlaybackPlan(offsets_ns, steps, labels, speed, source_length, duration_ns)
+
+
+def compress_plan(plan, max_gap_ns=None, collapse_moves=False, settle_ns=None):
+    """Retime a plan to waste less wall-clock time. Returns a new PlaybackPlan.
+
+    max_gap_ns caps every gap between consecutive steps (including the
+    lead-in before the first one). collapse_moves keeps only the last
+    mouse_move of each run of moves, since the pointer ends up there anyway.
+    settle_ns switches to max-speed mode: steps fire back to back, except
+    that the gaps before and after clicks, scrolls and key events stay
+    settle_ns long (or their recorded length, if that is shorter).
+    """
+    offsets_ns = array('q')
+    steps = []
+    labels = []
+    count = len(plan.labels)
+    previous_ns = 0
+    previous_label = None
+    time_ns = 0
+
+    for i in range(count):
+        label = plan.labels[i]
+        if collapse_moves and label == 'mouse_move' and i + 1 < count and plan.labels[i + 1] == 'mouse_move':
+            continue
+
+        offset_ns = plan.offsets_ns[i]
+        gap_ns = offset_ns - previous_ns
+        if settle_ns is not None:
+            if label != 'mouse_move' or (previous_label is not None and previous_label != 'mouse_move'):
+                gap_ns = min(gap_ns, settle_ns)
+            else:
+                gap_ns = 0
+        elif max_gap_ns is not None and gap_ns > max_gap_ns:
+            gap_ns = max_gap_ns
+        time_ns += gap_ns
+        previous_ns = offset_ns
+        previous_label = label
+
+        offsets_ns.append(time_ns)
+        steps.append(plan.steps[i])
+        labels.append(label)
+
+    if settle_ns is not None and previous_label not in (None, 'mouse_move'):
+        # Let the last click or key settle before a repeat starts over
+        time_ns += settle_ns
+    compressed = PlaybackPlan(offsets_ns, steps, labels, plan.speed, plan.source_length, time_ns)
+    compressed.original_duration_ns = plan.original_duration_ns
+    return compressed
+
+
+class PlanCache:
+    """Caches compiled plans per macro object and speed.
+
+    Entries are held weakly by macro, so replacing a macro drops its plans,
+    and a plan is recompiled if its macro has grown since it was compiled.
+    """
+
+    def __init__(self):
+        self._plans = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, actions, speed, compile_fn):
+        """Get the plan for actions at speed, compiling it with compile_fn if needed"""
+        try:
+            by_speed = self._plans.get(actions)
+            if by_speed is None:
+                by_speed = self._plans[actions] = {}
+        except TypeError:
+            # Plain lists can't be weakly referenced; compile without caching
+            self.misses += 1
+            return compile_fn(actions, speed)
+
+        plan = by_speed.get(speed)
+        if plan is not None and plan.source_length == len(actions):
+            self.hits += 1
+            return plan
+
+        self.misses += 1
+        plan = by_speed[speed] = compile_fn(actions, speed)
+        return plan
+
+    def invalidate(self, actions=None):
+        """Drop cached plans for one macro, or for all macros"""
+        if actions is None:
+            self._plans = weakref.WeakKeyDictionary()
+        else:
+            self._plans.pop(actions, None)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Ring Buffer Module
+Preallocated lock-free ring buffer for handing events between threads
+"""
+
+import itertools
+import time
+
+
+class RingBuffer:
+    """Fixed-capacity multi-producer, single-consumer ring buffer.
+
+    Producers claim a sequence number with next() on an itertools.count,
+    which is atomic under the GIL, and store (seq, item) into a
+    preallocated slot. No lock is taken on the producer side, so producers
+    can be OS input hook threads. If producers lap the consumer, the oldest
+    unread items are overwritten. The consumer notices this from the
+    sequence numbers and counts the lost items in dropped.
+    """
+
+    def __init__(self, capacity=65536, stall_timeout=0.05):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.capacity = size
+        self._mask = size - 1
+        self._slots = [None] * size
+        self._claim = itertools.count()
+
+        # A producer that claimed a slot but hasn't filled it yet is waited
+        # for this long before its item is given up as dropped
+        self.stall_timeout_ns = int(stall_timeout * 1e9)
+        self._stall_since = None
+
+        # Consumer-side state
+        self.read_seq = 0
+        self.received = 0
+        self.dropped = 0
+
+    def push(self, item):
+        """Add an item (producer side, any thread)"""
+        seq = next(self._claim)
+        self._slots[seq & self._mask] = (seq, item)
+
+    def pop_all(self, limit=None):
+        """Remove and return the available items in order (single consumer only)"""
+        items = []
+        slots = self._slots
+        mask = self._mask
+        expected = self.read_seq
+
+        while limit is None or len(items) < limit:
+            entry = slots[expected & mask]
+            if entry is not None and entry[0] == expected:
+                items.append(entry[1])
+                expected += 1
+                self._stall_since = None
+                continue
+
+            if entry is not None and entry[0] > expected:
+                # Lapped: everything older than the last capacity writes is gone
+                oldest = entry[0] - self.capacity + 1
+                self.dropped += oldest - expected
+                expected = oldest
+                continue
+
+            # Slot not written yet: either nothing more is queued, or a
+            # producer is between claiming and storing
+            following = slots[(expected + 1) & mask]
+            if following is None or following[0] <= expected:
+                break
+            now = time.perf_counter_ns()
+            if self._stall_since is None:
+                self._stall_since = now
+                break
+            if now - self._stall_since < self.stall_timeout_ns:
+                break
+            self.dropped += 1
+            expected += 1
+            self._stall_since = None
+
+        self.read_seq = expected
+        self.received += len(items)
+        return items
@@ -5,8 +5,34 @@ Simple launcher with dependency checking and error handling
 """
 
 import sys
-import subprocess
 import os
+import time
+import importlib.util
+
+# Taken before anything else so startup timings cover the whole launcher
+LAUNCH_TIME = time.perf_counter()
+
+# Modules that should not be loaded by the time the window appears
+LAZY_MODULES = ['pynput', 'macro_recorder', 'auto_clicker', 'hotkey_presser']
+
+startup_phases = []
+
+def mark_startup(phase):
+    """Record how long after launch a startup phase finished"""
+    startup_phases.append((phase, time.perf_counter() - LAUNCH_TIME))
+
+def report_startup_timing():
+    """Print startup phases and which lazy modules were loaded, -X importtime style"""
+    print("startup time: cumulative [ms] | phase")
+    for phase, elapsed in startup_phases:
+        print(f"startup time: {elapsed * 1000:>15.1f} | {phase}")
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+    print(f"startup time: {len(sys.modules):>15} | modules loaded")
+    print(f"startup time: {', '.join(loaded) or 'none':>15} | lazy modules loaded")
+
+def is_installed(name):
+    """Check for a package without importing it"""
+    return importlib.util.find_spec(name) is not None
 
 def check_python_version():
     """Check if Python version is adequate"""
@@ -17,43 +43,43 @@ def check_python_version():
     return True
 
 def check_dependencies():
-    """Check if required dependencies are installed"""
-    try:
-        import tkinter
+    """Check if required dependencies are installed (without importing them)"""
+    # The tkinter package is pure Python and ships even when Python was
+    # built without Tk; the _tkinter extension is what is really missing then
+    if is_installed('_tkinter'):
         print("✓ tkinter found")
-    except ImportError:
+    else:
         print("✗ tkinter not found - please install Python with tkinter support")
         return False
     
-    try:
-        import pynput
+    if is_installed('pynput'):
         print("✓ pynput found")
-    except ImportError:
+    else:
         print("✗ pynput not found")
-        print("Installing pynput...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "pynput"])
-            print("✓ pynput installed successfully")
-            import pynput
-        except subprocess.CalledProcessError:
-            print("✗ Failed to install pynput")
-            print("Please run: pip install pynput")
-            return False
-        except ImportError:
-            print("✗ pynput installation failed")
-            return False
+        print("Please run: pip install pynput")
+        return False
     
     return True
 
-def run_application():
+def run_application(show_timing=False):
     """Run the main application"""
     try:
         from main import AutoMationSuite
+        mark_startup("import main")
         
         print("\n🤖 Starting AutoMation Suite...")
         print("Press Ctrl+C in terminal to force quit if needed\n")
         
         app = AutoMationSuite()
+        mark_startup("create window")
+        
+        def on_first_map(event):
+            if event.widget is app.root and not any(phase == "first window shown" for phase, _ in startup_phases):
+                mark_startup("first window shown")
+                if show_timing:
+                    report_startup_timing()
+        app.root.bind('<Map>', on_first_map, add='+')
+        
         try:
             app.run()
         finally:
@@ -70,6 +96,8 @@ def run_application():
 
 def main():
     """Main launcher function"""
+    show_timing = '--timing' in sys.argv[1:]
+    
     print("=" * 50)
     print("🤖 AutoMation Suite Launcher")
     print("=" * 50)
@@ -90,6 +118,7 @@ def main():
         return
     
     print("✓ All dependencies found")
+    mark_startup("dependency check")
     
     # Check if main files exist
     required_files = ['main.py', 'macro_recorder.py', 'auto_clicker.py', 'hotkey_presser.py']
@@ -108,7 +137,7 @@ def main():
     print("✓ All required files found")
     
     # Run the application
-    run_application()
+    run_application(show_timing)
     
     print("\n👋 Thanks for using AutoMation Suite!")
 
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Scheduler Module
+Drift-free deadline scheduling for timed automation loops
+"""
+
+import time
+
+# Missed-deadline policies
+POLICY_CATCH_UP = 'catch_up'  # fire missed deadlines back-to-back until on time again
+POLICY_SKIP = 'skip'          # drop missed deadlines and resync to the next future slot
+POLICIES = (POLICY_CATCH_UP, POLICY_SKIP)
+
+# Longest single sleep, so stop flags are noticed promptly even for long intervals
+MAX_SLEEP_CHUNK_NS = 50_000_000  # 50ms
+
+# The clock behind every timestamp and deadline in the suite: monotonic,
+# integer nanoseconds and unaffected by wall-clock (NTP) adjustments, so
+# recording, playback and clicker timings are directly comparable
+clock_ns = time.perf_counter_ns
+
+_sleep_granularity_ns = None
+
+
+def calibrate_sleep_granularity(samples=25, request_ns=200_000):
+    """Measure how far time.sleep overshoots a short request on this host (ns)"""
+    overshoots = []
+    for _ in range(samples):
+        start = clock_ns()
+        time.sleep(request_ns / 1e9)
+        overshoots.append(clock_ns() - start - request_ns)
+
+    # Use a high percentile so occasional scheduler hiccups are covered
+    overshoots.sort()
+    return max(0, overshoots[int(len(overshoots) * 0.9) - 1])
+
+
+def get_sleep_granularity_ns():
+    """Get the calibrated sleep granularity, calibrating once per process"""
+    global _sleep_granularity_ns
+    if _sleep_granularity_ns is None:
+        _sleep_granularity_ns = calibrate_sleep_granularity()
+    return _sleep_granularity_ns
+
+
+def wait_until(deadline_ns, spin_threshold_ns, should_stop=None):
+    """Sleep until close to deadline_ns, then spin on clock_ns.
+
+    Returns False if should_stop() became true while waiting, else True.
+    """
+    while True:
+        remaining = deadline_ns - clock_ns()
+        if remaining <= spin_threshold_ns:
+            break
+        if should_stop and should_stop():
+            return False
+        time.sleep(min(remaining - spin_threshold_ns, MAX_SLEEP_CHUNK_NS) / 1e9)
+
+    while clock_ns() < deadline_ns:
+        pass
+    return True
+
+
+class DeadlineScheduler:
+    """Fires events on an absolute clock_ns timeline.
+
+    Deadlines are computed as anchor + n * interval rather than by sleeping
+    a fixed delay after each event, so the cost of the work done between
+    deadlines and sleep overshoot never accumulate into drift.
+    """
+
+    def __init__(self, interval, policy=POLICY_SKIP, max_catch_up=10, spin_threshold_ns=None,
+                 lateness_histogram=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+
+        self.interval_ns = max(1, int(interval * 1e9))
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        if spin_threshold_ns is None:
+            # Spin for the measured overshoot plus a safety margin
+            spin_threshold_ns = get_sleep_granularity_ns() * 2 + 100_000
+        self.spin_threshold_ns = spin_threshold_ns
+
+        # Optional metrics Histogram that receives every fire's lateness (seconds)
+        self.lateness_histogram = lateness_histogram
+
+        self.start_ns = None
+        self.next_deadline_ns = None
+        self.fired = 0
+        self.skipped = 0
+        self.late_events = 0
+        self.max_lateness_ns = 0
+        self.total_lateness_ns = 0
+        self.last_fire_ns = None
+
+    def start(self, start_ns=None):
+        """Anchor the timeline; the first deadline is the anchor itself"""
+        self.start_ns = clock_ns() if start_ns is None else start_ns
+        self.next_deadline_ns = self.start_ns
+        self.fired = 0
+        self.skipped = 0
+        self.late_events = 0
+        self.max_lateness_ns = 0
+        self.total_lateness_ns = 0
+        self.last_fire_ns = None
+
+    def wait(self, should_stop=None):
+        """Wait for the next deadline. Returns False if stopped while waiting"""
+        if self.start_ns is None:
+            self.start()
+        if not wait_until(self.next_deadline_ns, self.spin_threshold_ns, should_stop):
+            return False
+
+        now = clock_ns()
+        lateness = now - self.next_deadline_ns
+        if lateness > self.spin_threshold_ns:
+            self.late_events += 1
+        if lateness > self.max_lateness_ns:
+            self.max_lateness_ns = lateness
+        self.total_lateness_ns += lateness
+        if self.lateness_histogram is not None:
+            self.lateness_histogram.observe(lateness / 1e9)
+        self.fired += 1
+        self.last_fire_ns = now
+        return True
+
+    def advance(self, interval=None):
+        """Move to the next deadline, applying the missed-deadline policy.
+
+        interval overrides the configured interval for this step only
+        (used for randomised offsets).
+        """
+        step_ns = self.interval_ns if interval is None else max(1, int(interval * 1e9))
+        self.next_deadline_ns += step_ns
+
+        now = clock_ns()
+        behind = now - self.next_deadline_ns
+        if behind <= 0:
+            return
+
+        missed = behind // step_ns
+        if self.policy == POLICY_SKIP:
+            if missed:
+                self.next_deadline_ns += missed * step_ns
+                self.skipped += missed
+        elif missed > self.max_catch_up:
+            # Too far behind to catch up sensibly - drop the excess backlog
+            dropped = missed - self.max_catch_up
+            self.next_deadline_ns += dropped * step_ns
+            self.skipped += dropped
+
+    def elapsed(self):
+        """Seconds since the timeline was anchored"""
+        if self.start_ns is None:
+            return 0.0
+        return (clock_ns() - self.start_ns) / 1e9
+
+    def achieved_rate(self):
+        """Events per second actually fired since the anchor"""
+        if self.start_ns is None or self.fired < 2:
+            return 0.0
+        span = (self.last_fire_ns - self.start_ns) / 1e9
+        if span <= 0:
+            return 0.0
+        return (self.fired - 1) / span
+
+    def target_rate(self):
+        """Configured events per second"""
+        return 1e9 / self.interval_ns
+
+    def get_stats(self):
+        """Get timing statistics for the timeline so far"""
+        return {
+            'target_rate': self.target_rate(),
+            'achieved_rate': self.achieved_rate(),
+            'fired': self.fired,
+            'skipped': self.skipped,
+            'late_events': self.late_events,
+            'max_lateness_ms': self.max_lateness_ns / 1e6,
+            'mean_lateness_ms': (self.total_lateness_ns / self.fired / 1e6) if self.fired else 0.0,
+            'spin_threshold_ms': self.spin_threshold_ns / 1e6,
+        }
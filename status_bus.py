@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Status Bus Module
+Hands engine state changes from worker threads to the UI thread
+"""
+
+import threading
+
+from scheduler import clock_ns
+
+
+class StatusBus:
+    """Latest state per engine, published from any thread and drained by one.
+
+    Engines publish on state changes (started, stopped, finished), never
+    per click or press. Only the newest event per source is kept, so a
+    burst of changes between two UI frames costs one update.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.coalesced = 0
+
+    def publish(self, source, state, **details):
+        """Record the current state of an engine (any thread)"""
+        event = {'source': source, 'state': state, 'time_ns': clock_ns()}
+        event.update(details)
+        with self._lock:
+            if source in self._pending:
+                self.coalesced += 1
+            self._pending[source] = event
+            self.published += 1
+
+    def drain(self):
+        """Take the pending events, oldest source first (consumer thread only)"""
+        if not self._pending:
+            return []
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return sorted(pending.values(), key=lambda event: event['time_ns'])
+
+
+_status_bus = StatusBus()
+
+
+def get_status_bus():
+    """Get the process-wide status bus"""
+    return _status_bus
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Text Injector Module
+Bulk text typing: chunked backend calls, token-bucket rate limiting and clipboard paste
+"""
+
+import threading
+
+from event_buffer import NS_PER_SECOND
+from scheduler import clock_ns, get_sleep_granularity_ns, wait_until
+
+# Strategies
+STRATEGY_TYPE = 'type'    # send the text through the keyboard in chunks
+STRATEGY_PASTE = 'paste'  # put the text on the clipboard and send the paste shortcut
+STRATEGY_AUTO = 'auto'    # paste above paste_threshold characters (if possible), else type
+STRATEGIES = (STRATEGY_TYPE, STRATEGY_PASTE, STRATEGY_AUTO)
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_PASTE_THRESHOLD = 10_000
+
+# With a rate limit, a chunk holds at most this much of the rate budget, so
+# slow typing still goes out a character or two at a time
+CHUNK_PERIOD = 0.01  # seconds
+
+
+class TokenBucket:
+    """Token bucket on the shared clock: rate tokens/sec, bursts of up to capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated_ns = clock_ns()
+        self.spin_threshold_ns = get_sleep_granularity_ns() * 2 + 100_000
+
+    def _refill(self, limit=True):
+        now = clock_ns()
+        self.tokens += (now - self.updated_ns) * self.rate / NS_PER_SECOND
+        if limit and self.tokens > self.capacity:
+            self.tokens = self.capacity
+        self.updated_ns = now
+
+    def take(self, count, should_stop=None):
+        """Block until count tokens are available and take them. Returns False if stopped"""
+        self._refill()
+        if self.tokens < count:
+            wait_ns = int((count - self.tokens) / self.rate * NS_PER_SECOND)
+            if not wait_until(clock_ns() + wait_ns, self.spin_threshold_ns, should_stop):
+                return False
+            # Tokens that accrued while oversleeping were owed to this caller;
+            # capping them would turn every overshoot into lost rate
+            self._refill(limit=False)
+        self.tokens -= count
+        return True
+
+
+class TypingJob:
+    """Types one block of text, with progress reporting and cancellation.
+
+    rate limits characters per second (None for as fast as the backend
+    goes). Text is sent in chunks of up to chunk_size characters per
+    backend call. With the paste strategy the whole text is pasted through
+    the clipboard in one go; if the backend has no clipboard it is typed
+    instead. The clipboard's previous text is restored after the paste
+    unless restore_clipboard is False.
+    """
+
+    def __init__(self, backend, text, rate=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 strategy=STRATEGY_TYPE, paste_threshold=DEFAULT_PASTE_THRESHOLD,
+                 on_progress=None, restore_clipboard=True):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown typing strategy: {strategy}")
+
+        self.backend = backend
+        self.text = text
+        self.rate = rate if rate and rate > 0 else None
+        self.chunk_size = max(1, chunk_size)
+        if self.rate:
+            self.chunk_size = max(1, min(self.chunk_size, int(self.rate * CHUNK_PERIOD)))
+        if strategy == STRATEGY_AUTO:
+            strategy = STRATEGY_PASTE if len(text) >= paste_threshold else STRATEGY_TYPE
+        self.strategy = strategy
+        self.on_progress = on_progress
+        self.restore_clipboard = restore_clipboard
+
+        self.typed = 0
+        self.start_ns = None
+        self.end_ns = None
+        self.cancelled = False
+        self.error = None
+        self.thread = None
+
+    def run(self):
+        """Type the text on the calling thread. Returns the number of characters sent"""
+        keyboard_controller = self.backend.keyboard_controller()
+        self.start_ns = clock_ns()
+        try:
+            if self.strategy == STRATEGY_PASTE:
+                if self.backend.paste_text(keyboard_controller, self.text, self.restore_clipboard):
+                    self.typed = len(self.text)
+                    self._report()
+                    return self.typed
+                print("Clipboard not available, typing instead")
+                self.strategy = STRATEGY_TYPE
+            self._type_chunks(keyboard_controller)
+        except Exception as e:
+            self.error = e
+            print(f"Error typing text: {e}")
+        finally:
+            self.end_ns = clock_ns()
+        return self.typed
+
+    def _type_chunks(self, keyboard_controller):
+        text = self.text
+        total = len(text)
+        chunk_size = self.chunk_size
+        type_chunk = keyboard_controller.type
+        bucket = TokenBucket(self.rate, chunk_size) if self.rate else None
+        should_stop = lambda: self.cancelled
+
+        position = self.typed
+        while position < total and not self.cancelled:
+            chunk = text[position:position + chunk_size]
+            if bucket and not bucket.take(len(chunk), should_stop):
+                break
+            type_chunk(chunk)
+            position += len(chunk)
+            self.typed = position
+            self._report()
+
+    def _report(self):
+        if self.on_progress:
+            self.on_progress(self.progress())
+
+    def start(self):
+        """Type on a background thread and return immediately"""
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        """Stop after the chunk currently being sent"""
+        self.cancelled = True
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def is_done(self):
+        return self.end_ns is not None
+
+    def progress(self):
+        """Characters sent so far, completion and achieved characters/sec"""
+        elapsed = 0.0
+        if self.start_ns is not None:
+            elapsed = ((self.end_ns or clock_ns()) - self.start_ns) / NS_PER_SECOND
+        total = len(self.text)
+        return {
+            'typed': self.typed,
+            'total': total,
+            'fraction': self.typed / total if total else 1.0,
+            'elapsed': elapsed,
+            'chars_per_second': self.typed / elapsed if elapsed > 0 else 0.0,
+            'target_rate': self.rate,
+            'strategy': self.strategy,
+            'chunk_size': self.chunk_size,
+            'done': self.is_done(),
+            'cancelled': self.cancelled,
+            'error': str(self.error) if self.error else None
+        }